@@ -1,28 +1,46 @@
 """Local Flask web UI for goodreads-tools.
 
 Two buttons:
-  - Sync to StoryGraph: spawns book_sync.py as a subprocess, streams the log.
+  - Sync to StoryGraph: previews the sync plan, then runs the sync; both
+    go to a long-lived worker process (sync_worker.py), and the sync's log
+    is streamed.
   - Generate Year in Books: runs the goodreads_stats pipeline and exposes the
-    three generated files (PDF, web PNG, social card PNG) as downloads.
-
-Binds to 127.0.0.1 only. No auth.
+    three generated files (PDF, web PNG, social card PNG) as downloads. Only
+    the HTML is written up front; each PDF/PNG is rendered the first time
+    it's requested.
+
+Runs and report jobs are tracked in output/runs.sqlite (run_store), so
+several server threads or processes can share them. `python app.py` binds
+to 127.0.0.1 and opens a browser; `python app.py --serve` runs the
+multi-threaded production server instead. No auth either way.
 """
 
 from __future__ import annotations
 
+import argparse
+import atexit
+import hashlib
 import json
 import logging
-import subprocess
+import mimetypes
+import os
+import signal
 import sys
+import tempfile
 import threading
 import uuid
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-from flask import Flask, jsonify, render_template, request, send_from_directory
+from flask import Flask, abort, jsonify, render_template, request, send_file
+from werkzeug.security import safe_join
 
 import goodreads_stats
+import image_variants
+from run_store import RunStore
+from sync_worker import SyncWorker
 
 
 ROOT = Path(__file__).resolve().parent
@@ -32,8 +50,30 @@ SYNC_SCRIPT = ROOT / "book_sync.py"
 
 app = Flask(__name__)
 
-_runs: dict = {}
-_runs_lock = threading.Lock()
+# Opened on first use (main() or the first request that needs it), so
+# importing app doesn't create output/runs.sqlite.
+_STORE: RunStore | None = None
+_store_lock = threading.Lock()
+
+# Report generation runs here instead of in the request thread. One worker:
+# jobs write the same output files, so they never overlap anyway.
+_jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stats-job")
+
+# A finished report is served again for the same inputs without rebuilding.
+# Once it's older than report_max_age_minutes (config.json) it's still
+# served, but a fresh one is built in the background.
+DEFAULT_REPORT_MAX_AGE_MIN = 60
+
+# One lock per lazily rendered output (see output_file), so concurrent
+# requests for the same file render it once and different files in parallel.
+_render_locks = {name: threading.Lock() for name in goodreads_stats.OUTPUT_FILES}
+_LAZY_OUTPUTS = {filename: name for name, filename in goodreads_stats.OUTPUT_FILES.items()}
+
+# path -> (mtime_ns, size, sha256 prefix); outputs are only rehashed when
+# they change on disk.
+_hashes: dict = {}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+RENDER_ATTEMPTS = 3
 
 
 # -------- helpers --------
@@ -47,24 +87,28 @@ def _read_config() -> dict:
         return {}
 
 
-def _active_run() -> dict | None:
-    for run in _runs.values():
-        if run["status"] == "running":
-            return run
-    return None
+def _store() -> RunStore:
+    """The run store, opened once per process."""
+    global _STORE
+    with _store_lock:
+        if _STORE is None:
+            _STORE = RunStore(OUTPUT_DIR / "runs.sqlite")
+        return _STORE
 
 
-def _watch_sync(run_id: str) -> None:
-    run = _runs[run_id]
-    code = run["process"].wait()
-    try:
-        run["log_file"].close()
-    except Exception:
-        pass
-    with _runs_lock:
-        run["status"] = "done" if code == 0 else "failed"
-        run["ended"] = datetime.now().isoformat()
-        run["exit_code"] = code
+def _sync_finished(message: dict) -> None:
+    run = _store().get(message["run_id"])
+    # A run cancelled at shutdown keeps its "cancelled" status.
+    if run and run["status"] == "running":
+        _store().finish(
+            message["run_id"], message["status"],
+            exit_code=message.get("exit_code"), error=message.get("error"),
+        )
+
+
+# Syncs run in one long-lived worker process (see sync_worker) that keeps
+# its imports and a logged-in browser between runs.
+_sync_worker = SyncWorker(on_finish=_sync_finished)
 
 
 def _serializable(run: dict) -> dict:
@@ -77,6 +121,65 @@ def _serializable(run: dict) -> dict:
     }
 
 
+def _run_stats_job(run_id: str, user_id, source_csv, window, offline_index) -> None:
+    try:
+        result = goodreads_stats.generate(
+            user_id, OUTPUT_DIR, source_csv=source_csv, window=window,
+            offline_index=offline_index, lazy_outputs=True,
+        )
+    except Exception as e:
+        logging.exception("Stats generation failed")
+        _store().finish(run_id, "failed", error=f"stats generation failed: {e}")
+        return
+
+    outputs = result.get("outputs", {})
+    download_urls = {
+        name: f"/output/{Path(p).name}?v={_version(Path(p).name)}"
+        for name, p in outputs.items()
+    }
+    _store().finish(run_id, "done", result={
+        "window": result["window"],
+        "year_over_year": result.get("year_over_year"),
+        "total_books": result["total_books"],
+        "total_pages": result["total_pages"],
+        "books_missing_pages": result["books_missing_pages"],
+        "downloads": download_urls,
+    })
+
+
+def shutdown() -> None:
+    """Graceful stop: let a running report job finish (queued ones are
+    cancelled, and so are their runs), mark a sync still in progress cancelled and stop the sync
+    worker. Safe to call more than once."""
+    _jobs.shutdown(wait=True, cancel_futures=True)
+    for run_id in _sync_worker.pending():
+        _store().finish(run_id, "cancelled", error="server shut down")
+    _sync_worker.stop()
+
+
+atexit.register(shutdown)
+
+
+def _prefetch_genres(config: dict) -> None:
+    """Warm the genre cache for recently read books in the background, so
+    the first report after finishing a few books finds them cached."""
+    source_csv = config.get("goodreads_export_csv")
+    user_id = config.get("goodreads_user_id")
+    if source_csv:
+        def load():
+            return goodreads_stats.load_goodreads_export(ROOT / source_csv)[0]
+    elif user_id and user_id != "YOUR_GOODREADS_USER_ID":
+        def load():
+            return goodreads_stats.fetch_read_shelf(user_id)[0]
+    else:
+        return
+    offline_index = config.get("openlibrary_index")
+    goodreads_stats.prefetch_in_background(
+        load, OUTPUT_DIR / goodreads_stats.GENRE_CACHE_NAME,
+        offline_index=ROOT / offline_index if offline_index else None,
+    )
+
+
 # -------- routes --------
 
 @app.route("/")
@@ -84,50 +187,50 @@ def index():
     return render_template("index.html")
 
 
+@app.route("/sync-plan", methods=["POST"])
+def sync_plan():
+    """The sync plan, built by the long-lived sync worker (no browser, and
+    no fresh interpreter per click)."""
+    if not SYNC_SCRIPT.exists():
+        return jsonify({"error": f"sync script missing: {SYNC_SCRIPT}"}), 500
+    try:
+        message = _sync_worker.plan()
+    except TimeoutError:
+        return jsonify({"error": "sync plan timed out"}), 504
+    except OSError as e:
+        return jsonify({"error": f"could not reach the sync worker: {e}"}), 502
+    if message["status"] != "done":
+        return jsonify({"error": f"sync plan failed: {message.get('error') or 'unknown error'}"}), 502
+    return jsonify(message["plan"])
+
+
 @app.route("/sync", methods=["POST"])
 def start_sync():
-    with _runs_lock:
-        active = _active_run()
-        if active:
-            return jsonify({
-                "error": "Sync already running",
-                "active_run_id": active["id"],
-            }), 409
-
-        if not SYNC_SCRIPT.exists():
-            return jsonify({"error": f"sync script missing: {SYNC_SCRIPT}"}), 500
-
-        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        run_id = uuid.uuid4().hex[:8]
-        log_path = OUTPUT_DIR / f"sync_{run_id}.log"
-        log_file = open(log_path, "w", buffering=1, encoding="utf-8", errors="replace")
-
-        process = subprocess.Popen(
-            [sys.executable, str(SYNC_SCRIPT)],
-            stdout=log_file,
-            stderr=subprocess.STDOUT,
-            cwd=str(ROOT),
-        )
+    if not SYNC_SCRIPT.exists():
+        return jsonify({"error": f"sync script missing: {SYNC_SCRIPT}"}), 500
 
-        _runs[run_id] = {
-            "id": run_id,
-            "process": process,
-            "log_file": log_file,
-            "log_path": log_path,
-            "status": "running",
-            "started": datetime.now().isoformat(),
-            "ended": None,
-            "exit_code": None,
-        }
-
-    threading.Thread(target=_watch_sync, args=(run_id,), daemon=True).start()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    run_id = uuid.uuid4().hex[:8]
+    log_path = OUTPUT_DIR / f"sync_{run_id}.log"
+    if _store().create(run_id, "sync", exclusive=True, log_path=log_path) is None:
+        return jsonify({
+            "error": "Sync already running",
+            "active_run_id": _store().active("sync")["id"],
+        }), 409
+
+    log_path.touch()
+    try:
+        _sync_worker.submit(run_id, log_path)
+    except Exception as e:
+        _store().finish(run_id, "failed", error=str(e))
+        return jsonify({"error": f"could not start sync: {e}"}), 500
     return jsonify({"run_id": run_id, "log_url": f"/sync-log/{run_id}"})
 
 
 @app.route("/sync-log/<run_id>")
 def sync_log(run_id: str):
-    run = _runs.get(run_id)
-    if not run:
+    run = _store().get(run_id)
+    if not run or run["kind"] != "sync":
         return jsonify({"error": "run not found"}), 404
     try:
         offset = int(request.args.get("offset", 0))
@@ -155,50 +258,303 @@ def sync_log(run_id: str):
 
 @app.route("/generate-stats", methods=["POST"])
 def generate_stats():
+    body = request.get_json(silent=True) or {}
+    window = None
+    if body.get("window"):
+        try:
+            window = goodreads_stats.parse_window(str(body["window"]))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
     config = _read_config()
     user_id = config.get("goodreads_user_id")
-    if not user_id or user_id == "YOUR_GOODREADS_USER_ID":
+    source_csv = config.get("goodreads_export_csv") or None
+    offline_index = config.get("openlibrary_index") or None
+    if offline_index:
+        offline_index = ROOT / offline_index
+    if source_csv:
+        source_csv = ROOT / source_csv
+    elif not user_id or user_id == "YOUR_GOODREADS_USER_ID":
         return jsonify({
             "error": "goodreads_user_id missing or unset in config.json",
         }), 400
 
+    key = f"{user_id or ''}|{source_csv or ''}|{str(body.get('window') or '').strip().lower()}"
+    job_args = (key, user_id, source_csv, window, offline_index)
+    if not body.get("force"):
+        cached = _store().latest("stats", key)
+        if cached and _downloads_current(cached["result"]["downloads"]):
+            return jsonify(_cached_report(cached, config, job_args))
+
     try:
-        result = goodreads_stats.generate(user_id, OUTPUT_DIR)
-    except Exception as e:
-        logging.exception("Stats generation failed")
-        return jsonify({"error": f"stats generation failed: {e}"}), 502
+        run_id = _start_stats_job(*job_args)
+    except RuntimeError:
+        return jsonify({"error": "server shutting down"}), 503
+    if run_id is None:
+        return jsonify({
+            "error": "A report is already being generated",
+            "active_job_id": _store().active("stats")["id"],
+        }), 409
+    return jsonify({
+        "job_id": run_id,
+        "status_url": f"/generate-stats/{run_id}",
+    }), 202
 
-    outputs = result.get("outputs", {})
-    download_urls = {
-        name: f"/output/{Path(p).name}"
-        for name, p in outputs.items()
+
+def _start_stats_job(key, user_id, source_csv, window, offline_index):
+    """Queue a report job. Returns its id, or None if one is already
+    running; raises RuntimeError while the server shuts down."""
+    run_id = uuid.uuid4().hex[:8]
+    if _store().create(run_id, "stats", exclusive=True, key=key) is None:
+        return None
+    try:
+        future = _jobs.submit(_run_stats_job, run_id, user_id, source_csv, window, offline_index)
+    except RuntimeError:  # executor already shut down
+        _store().finish(run_id, "failed", error="server shutting down")
+        raise
+    # A job still queued at shutdown is cancelled without running; finish
+    # its run so it doesn't stay "running" and block the next one.
+    future.add_done_callback(
+        lambda f: f.cancelled() and _store().finish(run_id, "cancelled", error="server shut down")
+    )
+    return run_id
+
+
+def _cached_report(run: dict, config: dict, job_args: tuple) -> dict:
+    """Response for a cached report. A stale one also starts a background
+    rebuild (unless a report job is already running) and links to it."""
+    max_age = 60 * float(config.get("report_max_age_minutes", DEFAULT_REPORT_MAX_AGE_MIN))
+    age = (datetime.now() - datetime.fromisoformat(run["ended"])).total_seconds()
+    refresh_id = None
+    if age > max_age:
+        active = _store().active("stats")
+        if active:
+            refresh_id = active["id"] if active["key"] == job_args[0] else None
+        else:
+            try:
+                refresh_id = _start_stats_job(*job_args)
+            except RuntimeError:
+                pass
+    return {
+        "status": "done",
+        **run["result"],
+        "cached": True,
+        "generated_at": run["ended"],
+        "stale": age > max_age,
+        "refresh_url": f"/generate-stats/{refresh_id}" if refresh_id else None,
     }
-    return jsonify({
-        "total_books": result["total_books"],
-        "total_pages": result["total_pages"],
-        "books_missing_pages": result["books_missing_pages"],
-        "downloads": download_urls,
-    })
+
+
+def _downloads_current(downloads: dict) -> bool:
+    """Whether the output files are still the ones a cached result links
+    to. Every report writes the same files, so one for another window may
+    have replaced them since."""
+    for url in downloads.values():
+        filename = url.split("?", 1)[0].rsplit("/", 1)[-1]
+        if url != f"/output/{filename}?v={_version(filename)}":
+            return False
+    return True
+
+
+@app.route("/generate-stats/<job_id>")
+def stats_job(job_id: str):
+    """Poll a report job: {"status": "running"} until it finishes, then
+    the report summary and download links, or the error with a 502."""
+    run = _store().get(job_id)
+    if not run or run["kind"] != "stats":
+        return jsonify({"error": "job not found"}), 404
+    if run["status"] == "done":
+        return jsonify({"status": "done", **run["result"]})
+    if run["status"] == "running":
+        return jsonify({"status": "running"})
+    return jsonify({"status": run["status"], "error": run["error"] or "job failed"}), 502
 
 
 @app.route("/output/<path:filename>")
 def output_file(filename: str):
-    return send_from_directory(OUTPUT_DIR, filename)
+    """Serve a generated file with a content-hash ETag. Links from
+    /generate-stats carry ?v=<version>; when that still matches, the
+    response is cacheable for good, otherwise the browser revalidates
+    (and gets a 304 if nothing changed). PNGs are negotiated to the
+    smallest accepted image format, text outputs to their precompressed
+    .br/.gz copies."""
+    name = _LAZY_OUTPUTS.get(filename)
+    version = None
+    if name:
+        try:
+            version = _ensure_rendered(name)
+        except Exception as e:
+            logging.exception("Rendering %s failed", filename)
+            return jsonify({"error": f"rendering {filename} failed: {e}"}), 502
+    path = safe_join(str(OUTPUT_DIR), filename)
+    if path is None or not Path(path).is_file():
+        abort(404)
+    path = Path(path)
+
+    served, encoding, vary = path, None, None
+    mimetype = mimetypes.guess_type(filename)[0]
+    if path.suffix == ".png":
+        # Serve the smallest of PNG/WebP/AVIF the browser takes; the
+        # variants appear once the background optimization finishes.
+        served = image_variants.best_variant(path, request.headers.get("Accept", ""))
+        mimetype = mimetypes.guess_type(served.name)[0] or mimetype
+        vary = "Accept"
+    elif path.suffix in (".html", ".svg"):
+        served, encoding = _precompressed(path, request.headers.get("Accept-Encoding", ""))
+        vary = "Accept-Encoding"
+
+    etag = _content_hash(served) + (f"-{encoding}" if encoding else "")
+    response = send_file(
+        served, mimetype=mimetype, etag=etag, conditional=True,
+        download_name=path.name if encoding else served.name,
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if vary:
+        response.vary.add(vary)
+    if version is None:
+        version = _version(filename)
+    if version and request.args.get("v") == version:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = None
+    return response
+
+
+def _precompressed(path: Path, accept_encoding: str) -> tuple:
+    """(file to send, Content-Encoding or None): the .br or .gz copy
+    written by goodreads_stats.precompress when the client accepts it and
+    it is at least as new as the original."""
+    mtime = path.stat().st_mtime
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding not in accept_encoding:
+            continue
+        variant = path.with_name(path.name + suffix)
+        if variant.exists() and variant.stat().st_mtime >= mtime:
+            return variant, encoding
+    return path, None
+
+
+def _content_hash(path: Path) -> str:
+    stat = path.stat()
+    cached = _hashes.get(str(path))
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()[:16]
+    _hashes[str(path)] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+
+def _version(filename: str) -> str:
+    """Version token for ?v=: the file's content hash, or for outputs
+    rendered lazily from the HTML report (which may not exist yet), the
+    report's hash — the same HTML always renders the same file."""
+    if filename in _LAZY_OUTPUTS:
+        filename = "year_in_books.html"
+    path = OUTPUT_DIR / filename
+    return _content_hash(path) if path.is_file() else ""
+
+
+def _source_stamp(path: Path) -> Path:
+    """Sidecar holding the hash of the HTML report an output was rendered
+    from."""
+    return path.with_name(f".{path.name}.source")
+
+
+def _ensure_rendered(name: str) -> str:
+    """Render one PDF/PNG output from the current HTML report unless the
+    copy on disk was rendered from it. Returns that HTML's hash ("" when
+    there is no report), which is the output's version.
+
+    Freshness goes by the source stamp, not mtimes: a render that started
+    from the previous HTML can finish after a report job has replaced it,
+    and its file is newer than the new HTML. Renders go to a temporary
+    directory and are only moved into place (and stamped) when the HTML
+    is still the one they started from. The per-output lock makes a
+    second request wait for the first render instead of starting its own."""
+    html_path = OUTPUT_DIR / "year_in_books.html"
+    path = OUTPUT_DIR / goodreads_stats.OUTPUT_FILES[name]
+    stamp = _source_stamp(path)
+    with _render_locks[name]:
+        for _ in range(RENDER_ATTEMPTS):
+            if not html_path.exists():
+                return ""
+            source = _content_hash(html_path)
+            if path.exists() and stamp.is_file() and stamp.read_text(encoding="utf-8") == source:
+                return source
+            image_variants.remove_variants(path)
+            with tempfile.TemporaryDirectory(dir=OUTPUT_DIR, prefix=".render-") as tmp:
+                rendered = goodreads_stats.render_html_outputs(html_path, Path(tmp), formats=[name])[name]
+                if not html_path.exists() or _content_hash(html_path) != source:
+                    continue  # the report changed mid-render; start over
+                os.replace(rendered, path)
+            stamp.write_text(source, encoding="utf-8")
+            break
+        else:
+            raise RuntimeError("the report kept changing while it was being rendered")
+    if path.suffix == ".png":
+        # On the job executor, so it never overlaps a report job rewriting
+        # the outputs and shutdown() waits for it.
+        try:
+            _jobs.submit(image_variants.optimize_images, [path])
+        except RuntimeError:  # executor already shut down
+            pass
+    return source
 
 
 # -------- main --------
 
-def main() -> int:
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="goodreads-tools web UI")
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="Production mode: multi-threaded WSGI server (waitress), no browser.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=5000, help="Port (default: 5000).")
+    parser.add_argument("--threads", type=int, default=8, help="Worker threads with --serve (default: 8).")
+    args = parser.parse_args(argv)
+
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-    host, port = "127.0.0.1", 5000
-    url = f"http://{host}:{port}"
+    # Nothing from a previous server can still be running.
+    stale = _store().interrupt_running()
+    if stale:
+        logging.info("Marked %d run(s) from a previous server as failed", stale)
+    _prefetch_genres(_read_config())
+
+    # Turn SIGTERM into a normal exit so atexit's shutdown() drains jobs and
+    # stops sync subprocesses.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    url = f"http://{args.host}:{args.port}"
+    if args.serve:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("--serve needs waitress: pip install waitress", file=sys.stderr)
+            return 2
+        print(f"Goodreads Tools serving at {url} with {args.threads} threads")
+        try:
+            serve(app, host=args.host, port=args.port, threads=args.threads)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
     print(f"Goodreads Tools running at {url}")
     print("Press Ctrl+C to stop.")
 
     threading.Timer(1.0, lambda: webbrowser.open(url)).start()
-    app.run(host=host, port=port, debug=False, use_reloader=False)
+    app.run(host=args.host, port=args.port, debug=False, use_reloader=False, threaded=True)
     return 0
 
 
@@ -0,0 +1,170 @@
+"""Benchmark the columnar BookStore against the Book-list pipeline it
+replaced, on a synthetic Goodreads library export.
+
+    python benchmarks/book_store.py [--books 50000] [--repeat 3]
+
+Both sides load the export, then compute the rolling-12-month totals and
+a per-month rollup answering 20 calendar years. "list" is the pipeline as
+it was before: load_goodreads_export into a list of Book objects, then
+aggregate over that list. "store" streams the export into a BookStore with
+BookStore.from_chunks and aggregates over its columns; it runs twice, with
+NumPy when it's installed and with the plain-Python loops.
+
+Reports the best load and report wall times over --repeat runs, the peak
+traced memory across both, and the memory held by the loaded shelf.
+Checks that every variant returns the same totals. Loading is dominated by
+CSV parsing either way; the store's gains are in memory and aggregation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import goodreads_stats  # noqa: E402
+from goodreads_stats import _month_index  # noqa: E402
+
+TODAY = datetime(2025, 6, 15).astimezone()
+YEARS = range(TODAY.year - 19, TODAY.year + 1)
+
+
+def write_export(path: Path, n: int) -> None:
+    """n read-shelf rows spread over the last 20 years, in the export's
+    newest-first order."""
+    rng = random.Random(1)
+    first = TODAY - timedelta(days=20 * 365)
+    dates = sorted((first + timedelta(days=rng.randint(0, 20 * 365)) for _ in range(n)), reverse=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["Book Id", "Title", "Author", "ISBN", "ISBN13", "My Rating",
+                    "Number of Pages", "Date Read", "Exclusive Shelf"])
+        for i, d in enumerate(dates):
+            w.writerow([
+                i, f"Book number {i}: A Novel", f"Author {i % 2000}", f'="{1000000000 + i}"',
+                f'="{9780000000000 + i}"', rng.choice([0, 3, 4, 5]),
+                rng.choice(["", str(rng.randint(90, 900))]), d.strftime("%Y/%m/%d"), "read",
+            ])
+
+
+def load_list(path: Path) -> list:
+    return goodreads_stats.load_goodreads_export(path)[0]
+
+
+def report_list(books: list) -> tuple:
+    """The rolling-12-month totals and the per-month rollup over a Book
+    list, as aggregate_last_12_months and MonthlyRollup computed them
+    before the BookStore."""
+    window_start = TODAY - timedelta(days=365)
+    in_window = [b for b in books if window_start <= b.user_read_at <= TODAY]
+    bucketed = {_month_index(TODAY) - k for k in range(12)}
+    pages = missing = 0
+    for b in in_window:
+        if _month_index(b.user_read_at) not in bucketed:
+            continue
+        if b.num_pages:
+            pages += b.num_pages
+        else:
+            missing += 1
+    sorted((b.user_read_at, b.title, b.author) for b in in_window)
+
+    months = [_month_index(b.user_read_at) for b in books]
+    first_month = min(months, default=0)
+    span = (max(months) - first_month + 1) if months else 0
+    by_month: list = [[] for _ in range(span)]
+    book_counts = [0] * span
+    page_counts = [0] * span
+    for b, m in zip(books, months):
+        by_month[m - first_month].append(b)
+        book_counts[m - first_month] += 1
+        page_counts[m - first_month] += b.num_pages or 0
+    years = []
+    for year in YEARS:
+        lo = year * 12 - first_month
+        years.append((sum(book_counts[lo:lo + 12]), sum(page_counts[lo:lo + 12])))
+    return (len(in_window), pages, missing), years
+
+
+def load_store(path: Path) -> goodreads_stats.BookStore:
+    return goodreads_stats.BookStore.from_chunks(goodreads_stats.iter_goodreads_export(path))
+
+
+def report_store(store: goodreads_stats.BookStore) -> tuple:
+    stats = goodreads_stats.aggregate_last_12_months(store, today=TODAY)
+    rollup = goodreads_stats.MonthlyRollup(store)
+    years = []
+    for year in YEARS:
+        totals = rollup.totals(goodreads_stats.calendar_year_window(year))
+        years.append((totals["books"], totals["pages"]))
+    return (stats.total_books, stats.total_pages, stats.books_missing_pages), years
+
+
+def best_time(fn, arg, repeat: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def measure(load, report, path: Path, repeat: int) -> tuple:
+    shelf, load_time = best_time(load, path, repeat)
+    totals, report_time = best_time(report, shelf, repeat)
+    del shelf
+    tracemalloc.start()
+    shelf = load(path)
+    held = tracemalloc.get_traced_memory()[0]
+    report(shelf)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return totals, load_time, report_time, peak, held
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    variants = {"list": (load_list, report_list)}
+    if goodreads_stats._optional_numpy() is not None:
+        variants["store (numpy)"] = (load_store, report_store)
+
+    def without_numpy(fn):
+        def run(arg):
+            with mock.patch.object(goodreads_stats, "_optional_numpy", lambda: None):
+                return fn(arg)
+        return run
+
+    variants["store (plain)"] = (without_numpy(load_store), without_numpy(report_store))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "goodreads_library_export.csv"
+        write_export(path, args.books)
+        print(f"{args.books} books, {path.stat().st_size // 1024} KB export")
+        print(f"{'variant':<16}{'load ms':>10}{'report ms':>11}{'peak MB':>10}{'held MB':>10}  same")
+        expected = None
+        ok = True
+        for name, (load, report) in variants.items():
+            totals, load_time, report_time, peak, held = measure(load, report, path, args.repeat)
+            expected = expected or totals
+            same = totals == expected
+            ok &= same
+            print(f"{name:<16}{load_time * 1e3:>10.0f}{report_time * 1e3:>11.1f}"
+                  f"{peak / 2**20:>10.1f}{held / 2**20:>10.1f}  {'yes' if same else 'NO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,140 @@
+"""Benchmark goodreads_stats._extract_goodreads_genres against the
+BeautifulSoup extractor it replaced.
+
+Runs over saved Goodreads book pages in benchmarks/fixtures/*.html (save a
+few with your browser's "Save Page As... > HTML only"; they aren't checked
+in). With no fixtures it falls back to two synthetic ~600KB pages: one with
+classic /genres/ anchors, one with genres only in __NEXT_DATA__.
+
+    python benchmarks/genre_extraction.py [PAGE.html ...]
+
+Reports per-page time and peak traced memory for both extractors, and
+checks they return the same genres.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import goodreads_stats  # noqa: E402
+
+FIXTURES = ROOT / "benchmarks" / "fixtures"
+GENRES = ["Fantasy", "Science Fiction", "Fiction", "Epic Fantasy", "Dystopia",
+          "Audiobook", "Adult", "Post Apocalyptic", "Magic", "Science Fiction Fantasy"]
+
+
+def soup_extractor(html: str) -> list:
+    """The BeautifulSoup/html.parser extractor, as it was before."""
+    soup = BeautifulSoup(html, "html.parser")
+    found: list = []
+    seen: set = set()
+
+    def add(name: str) -> None:
+        n = (name or "").strip()
+        if not n or n.lower() in {"...more", "more"} or n in seen:
+            return
+        seen.add(n)
+        found.append(n)
+
+    for a in soup.find_all("a", href=re.compile(r"^/genres/")):
+        text = a.get_text(strip=True)
+        if text and len(text) <= 40:
+            add(text)
+    if found:
+        return found[:15]
+
+    next_script = soup.find("script", id="__NEXT_DATA__")
+    if next_script and next_script.string:
+        try:
+            blob = json.loads(next_script.string)
+        except json.JSONDecodeError:
+            blob = None
+        if blob is not None:
+            def visit(obj):
+                if isinstance(obj, dict):
+                    if obj.get("__typename") == "Genre" and obj.get("name"):
+                        add(obj["name"])
+                    for v in obj.values():
+                        visit(v)
+                elif isinstance(obj, list):
+                    for v in obj:
+                        visit(v)
+            visit(blob)
+    return found[:15]
+
+
+def synthetic_pages() -> dict:
+    filler = "".join(
+        f'<div class="review"><p>Review paragraph {i} with <b>markup</b> &amp; text.</p>'
+        f'<a href="/user/show/{i}">Reader {i}</a></div>\n'
+        for i in range(2500)
+    )
+    anchors = "".join(
+        f'<a class="actionLinkLite bookPageGenreLink" href="/genres/{g.lower().replace(" ", "-")}">'
+        f'<span class="Button__labelItem">{g}</span></a>'
+        for g in GENRES
+    )
+    apollo = {
+        f"Review:{i}": {"__typename": "Review", "text": "x" * 40, "likes": i}
+        for i in range(3000)
+    }
+    apollo["Book:1"] = {
+        "__typename": "Book",
+        "bookGenres": [{"__typename": "BookGenre", "genre": {"__typename": "Genre", "name": g}}
+                       for g in GENRES],
+    }
+    next_data = json.dumps({"props": {"pageProps": {"apolloState": apollo}}})
+    return {
+        "synthetic-anchors": f"<html><body>{filler}<div>{anchors}</div>{filler}</body></html>",
+        "synthetic-next-data": (
+            f"<html><body>{filler}<script id=\"__NEXT_DATA__\" type=\"application/json\">"
+            f"{next_data}</script></body></html>"
+        ),
+    }
+
+
+def measure(fn, html: str, repeat: int) -> tuple:
+    fn(html)  # warm caches (regexes, imports)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(html)
+    per_call = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, per_call, peak
+
+
+def main(argv: list) -> int:
+    paths = [Path(p) for p in argv] or sorted(FIXTURES.glob("*.html"))
+    pages = {p.name: p.read_text(encoding="utf-8", errors="replace") for p in paths}
+    if not pages:
+        pages = synthetic_pages()
+
+    print(f"{'page':<28}{'KB':>7}{'soup ms':>10}{'fast ms':>10}{'soup MB':>10}{'fast MB':>10}  same")
+    ok = True
+    for name, html in pages.items():
+        old, old_t, old_mem = measure(soup_extractor, html, repeat=3)
+        new, new_t, new_mem = measure(goodreads_stats._extract_goodreads_genres, html, repeat=20)
+        same = old == new
+        ok &= same
+        print(f"{name[:27]:<28}{len(html) // 1024:>7}{old_t * 1e3:>10.1f}{new_t * 1e3:>10.2f}"
+              f"{old_mem / 2**20:>10.1f}{new_mem / 2**20:>10.2f}  {'yes' if same else 'NO'}")
+        if not same:
+            print(f"  soup: {old}\n  fast: {new}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
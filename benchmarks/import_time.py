@@ -0,0 +1,108 @@
+"""Import-time report and budget check for the entry points.
+
+Runs each entry point under `python -X importtime` a few times, keeps the
+fastest run, and reports:
+
+- total import time, excluding interpreter start-up (`site`);
+- the heaviest top-level imports;
+- any heavy dependency (selenium, playwright, jinja2, bs4, lxml, requests,
+  PIL) imported at start-up. These are meant to load on first use.
+
+    python benchmarks/import_time.py [--runs 5] [--top 8]
+
+Exits 1 when an entry point goes over its budget or loads a dependency it
+shouldn't, so it can gate changes to the import layout. Budgets are
+generous for a laptop. On a slow machine, scale them with --budget-scale.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ("selenium", "playwright", "jinja2", "bs4", "lxml", "requests", "PIL")
+
+# name -> (python arguments, budget in ms, heavy modules it may load)
+ENTRY_POINTS = {
+    "goodreads_stats.py --help": (["goodreads_stats.py", "--help"], 60, ()),
+    "book_sync.py --help": (["book_sync.py", "--help"], 80, ()),
+    # The web UI: Flask itself brings jinja2 along.
+    "import app": (["-c", "import app"], 300, ("jinja2",)),
+}
+
+
+def importtime(args: list) -> list:
+    """Run python -X importtime with args. Returns (depth, self_us,
+    cumulative_us, module, parent) for every import; importtime prints
+    children before their parent, so parents are filled in afterwards."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True, text=True, cwd=str(ROOT),
+    )
+    rows = []
+    orphans: dict = {}  # depth -> indexes of rows still waiting for a parent
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        for i in orphans.pop(depth + 1, []):
+            rows[i][4] = name
+        orphans.setdefault(depth, []).append(len(rows))
+        rows.append([depth, int(self_us), int(cumulative_us), name, None])
+    return rows
+
+
+def heaviest(rows: list, count: int) -> list:
+    """The costliest top-level imports, with this repo's own modules
+    broken down into what they import."""
+    own = {r[3] for r in rows if r[0] == 0 and (ROOT / f"{r[3]}.py").exists()}
+    picked = [r for r in rows if (r[0] == 0 and r[3] not in own | {"site"}) or r[4] in own]
+    return sorted(picked, key=lambda r: r[2], reverse=True)[:count]
+
+
+def measure(args: list, runs: int) -> tuple:
+    """Fastest of runs: (total_ms, rows)."""
+    best = None
+    for _ in range(runs):
+        rows = importtime(args)
+        total = sum(cum for depth, _, cum, name, _ in rows if depth == 0 and name != "site") / 1000
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Runs per entry point (default: 5).")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest imports to list (default: 8).")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget.")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for name, (py_args, budget, allowed) in ENTRY_POINTS.items():
+        total, rows = measure(py_args, args.runs)
+        budget *= args.budget_scale
+        loaded = sorted({
+            module.split(".")[0] for _, _, _, module, _ in rows
+            if module.split(".")[0] in HEAVY and module.split(".")[0] not in allowed
+        })
+        over = total > budget
+        ok &= not over and not loaded
+        status = "ok" if not over and not loaded else "FAIL"
+        print(f"{name:<28}{total:>8.1f} ms  (budget {budget:.0f} ms)  {status}")
+        if loaded:
+            print(f"  loaded at start-up: {', '.join(loaded)}")
+        for _, _, cumulative_us, module, parent in heaviest(rows, args.top):
+            via = f"  (via {parent})" if parent else ""
+            print(f"    {cumulative_us / 1000:>7.1f} ms  {module}{via}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,42 +1,547 @@
-import requests
 import time
-from bs4 import BeautifulSoup
+import queue
+import threading
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
 import json
 import os
+import sys
 import logging
+import argparse
+import csv
+import re
+import tempfile
+from difflib import SequenceMatcher
 from urllib.parse import quote
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('sync_log.txt'),
-        logging.StreamHandler()
-    ]
-)
+import goodreads_stats
+from work_keys import normalize_author, normalize_title
+
+# selenium is imported when the first browser opens (initialize_browser), and
+# requests/bs4 when the RSS feed is first read, so --plan, --export-csv and
+# modules importing this one start without them.
+webdriver = WebDriverWait = EC = By = None
+TimeoutException = ElementClickInterceptedException = None
+
+
+def _import_selenium():
+    global webdriver, WebDriverWait, EC, By, TimeoutException, ElementClickInterceptedException
+    if webdriver is not None:
+        return
+    from selenium import webdriver as _webdriver
+    from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+    from selenium.webdriver.support import expected_conditions as _EC
+    from selenium.webdriver.common.by import By as _By
+    from selenium.common import exceptions
+    WebDriverWait, EC, By = _WebDriverWait, _EC, _By
+    TimeoutException = exceptions.TimeoutException
+    ElementClickInterceptedException = exceptions.ElementClickInterceptedException
+    webdriver = _webdriver
+
+
+LOG_FORMAT = '%(asctime)s - %(threadName)s - %(levelname)s - %(message)s'
+CONFIG_PATH = 'config.json'
+REQUIRED_CONFIG_KEYS = ['goodreads_user_id', 'storygraph_email', 'storygraph_password']
+
+
+def configure_logging(log_path='sync_log.txt'):
+    """Command-line logging: everything to log_path and the console. Done
+    here rather than at import so sync_worker can attach its own per-run
+    handlers instead."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[
+            logging.FileHandler(log_path),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def load_config(config_path=CONFIG_PATH):
+    """Read config.json and check the keys a sync needs"""
+    if not os.path.exists(config_path):
+        logging.error(f"Config file not found at {config_path}")
+        raise FileNotFoundError(f"Config file not found at {config_path}")
+
+    with open(config_path) as f:
+        config = json.load(f)
+
+    missing_keys = [key for key in REQUIRED_CONFIG_KEYS if key not in config]
+    if missing_keys:
+        raise KeyError(f"Missing required config keys: {', '.join(missing_keys)}")
+    return config
+
+
+STORYGRAPH_URL = "https://app.thestorygraph.com/"
+
+# Pause each worker takes after finishing a book, and the minimum spacing
+# between book starts across the whole worker pool.
+DEFAULT_BOOK_DELAY_SEC = 3
+
+# A pool worker whose browser fails this many books in a row retires and
+# leaves the rest of the queue to its siblings.
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+# Local record of every book this tool has pushed to StoryGraph, plus the
+# backfill checkpoint. Lets an interrupted backfill resume where it stopped.
+LEDGER_PATH = os.path.join('output', 'sync_ledger.json')
+
+
+def sync_key(book):
+    """Stable ledger key for a sync book dict: the Goodreads book ID when
+    known, else the lowercased title plus read date"""
+    if book.get('goodreads_book_id'):
+        return f"gr:{book['goodreads_book_id']}"
+    return f"t:{book['title'].lower()}|{book['date_read'].strftime('%Y-%m-%d')}"
+
+
+def load_ledger(path=LEDGER_PATH):
+    ledger = {'books': {}, 'backfill': {}}
+    if os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                ledger.update(json.load(f))
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable sync ledger {path}: {str(e)}")
+    return ledger
+
+
+def write_json_atomic(path, data, **dump_args):
+    """Write JSON to a temp file unique to this writer, then rename it over
+    path, so a kill mid-write can't corrupt the file and concurrent writers
+    (the CLI, the web UI's sync worker, watch.py) never share a temp file"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=directory, prefix=f"{os.path.basename(path)}.",
+        suffix='.tmp', delete=False,
+    )
+    try:
+        with f:
+            json.dump(data, f, **dump_args)
+        os.replace(f.name, path)
+    except BaseException:
+        if os.path.exists(f.name):
+            os.unlink(f.name)
+        raise
+
+
+def save_ledger(ledger, path=LEDGER_PATH):
+    """Write the ledger atomically so a kill mid-write can't corrupt the
+    checkpoint"""
+    write_json_atomic(path, ledger, indent=2, sort_keys=True)
+
+
+def iter_shelf_pages(goodreads_user_id, csv_path=None, start_page=1):
+    """Yield (page, books) chunks of the full read shelf, from the paginated
+    RSS feed or, when csv_path is given, from a Goodreads library export CSV
+    (chunked the same way, so backfill checkpoints work for both)"""
+    if not csv_path:
+        yield from goodreads_stats.iter_read_shelf(goodreads_user_id, start_page=start_page)
+        return
+    chunks = goodreads_stats.iter_goodreads_export(csv_path, chunk_size=100)
+    for page, books in enumerate(chunks, 1):
+        if page >= start_page:
+            yield page, books
+
+
+def book_from_shelf(book):
+    """Convert a goodreads_stats.Book from the read-shelf feed into the
+    dict shape the sync pipeline works with"""
+    title = book.title
+    # Remove series information in parentheses, matching the updates feed
+    if " (" in title:
+        title = title.split(" (")[0].strip()
+    return {
+        'title': title,
+        'date_read': book.user_read_at,
+        'author': book.author,
+        'isbn': book.isbn,
+        'isbn13': book.isbn13,
+        'goodreads_book_id': book.goodreads_book_id,
+        'rating': book.user_rating,
+    }
+
+
+def stats_book(book):
+    """The reverse of book_from_shelf, for books from either feed: a
+    goodreads_stats.Book, as the genre prefetch takes"""
+    return goodreads_stats.Book(
+        title=book['title'],
+        author=book.get('author') or '',
+        isbn=book.get('isbn'),
+        num_pages=None,
+        user_read_at=book['date_read'],
+        user_rating=book.get('rating'),
+        goodreads_book_id=book.get('goodreads_book_id'),
+        isbn13=book.get('isbn13'),
+    )
+
+
+# Genre cache of the Year in Books report, warmed for newly synced books.
+GENRE_CACHE_PATH = os.path.join('output', goodreads_stats.GENRE_CACHE_NAME)
+
+
+# -------- Goodreads-format CSV export --------
+
+# Which books have already gone out in an export, so later exports can carry
+# only the delta.
+EXPORT_STATE_PATH = os.path.join('output', 'storygraph_export.json')
+
+# Column layout of Goodreads' "Export Library" CSV, which StoryGraph's
+# Goodreads importer expects. Columns we have no data for are left blank.
+GOODREADS_EXPORT_COLUMNS = [
+    'Book Id', 'Title', 'Author', 'Author l-f', 'Additional Authors',
+    'ISBN', 'ISBN13', 'My Rating', 'Average Rating', 'Publisher', 'Binding',
+    'Number of Pages', 'Year Published', 'Original Publication Year',
+    'Date Read', 'Date Added', 'Bookshelves', 'Bookshelves with positions',
+    'Exclusive Shelf', 'My Review', 'Spoiler', 'Private Notes', 'Read Count',
+    'Owned Copies',
+]
+
+
+def _export_isbn(isbn):
+    # Goodreads wraps ISBNs as ="..." so spreadsheets keep leading zeros
+    return f'="{isbn}"' if isbn else '=""'
+
+
+def _author_last_first(author):
+    parts = (author or "").split()
+    if len(parts) < 2:
+        return author or ""
+    return f"{parts[-1]}, {' '.join(parts[:-1])}"
+
+
+def goodreads_export_row(book):
+    """One Goodreads-export CSV row (dict) for a goodreads_stats.Book"""
+    isbn13 = book.isbn13 or (book.isbn if book.isbn and len(book.isbn) == 13 else None)
+    isbn10 = book.isbn if book.isbn and len(book.isbn) == 10 else None
+    read_date = book.user_read_at.strftime('%Y/%m/%d')
+    row = dict.fromkeys(GOODREADS_EXPORT_COLUMNS, '')
+    row.update({
+        'Book Id': book.goodreads_book_id or '',
+        'Title': book.title,
+        'Author': book.author,
+        'Author l-f': _author_last_first(book.author),
+        'ISBN': _export_isbn(isbn10),
+        'ISBN13': _export_isbn(isbn13),
+        'My Rating': book.user_rating or 0,
+        'Number of Pages': book.num_pages or '',
+        'Date Read': read_date,
+        'Date Added': read_date,
+        'Exclusive Shelf': 'read',
+        'Read Count': 1,
+        'Owned Copies': 0,
+    })
+    return row
+
+
+def export_key(book):
+    if book.goodreads_book_id:
+        return f"gr:{book.goodreads_book_id}"
+    return f"ta:{normalize_title(book.title, keep_subtitle=True)}|{normalize_author(book.author)}"
+
+
+def export_storygraph_csv(books, csv_path, full=False, state_path=EXPORT_STATE_PATH):
+    """Write a Goodreads-export-compatible CSV of `books` (goodreads_stats.Book
+    records) for StoryGraph's import page. Unless `full` is set, only books
+    that weren't in a previous export, or whose read date has changed since,
+    are written. Returns the number of rows written."""
+    state = {'exported': {}}
+    if not full and os.path.exists(state_path):
+        try:
+            with open(state_path, encoding='utf-8') as f:
+                state.update(json.load(f))
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable export state {state_path}: {str(e)}")
+
+    rows = []
+    for book in books:
+        key = export_key(book)
+        read_date = book.user_read_at.strftime('%Y-%m-%d')
+        if state['exported'].get(key) == read_date:
+            continue
+        rows.append(goodreads_export_row(book))
+        state['exported'][key] = read_date
+
+    os.makedirs(os.path.dirname(os.path.abspath(csv_path)), exist_ok=True)
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=GOODREADS_EXPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    state['last_export_at'] = datetime.now().isoformat(timespec='seconds')
+    write_json_atomic(state_path, state, indent=2, sort_keys=True)
+    return len(rows)
+
+
+GOODREADS_UPDATES_RSS_URL = "https://www.goodreads.com/user/updates_rss/{user_id}"
+UPDATES_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+
+
+def parse_updates_feed(xml_text):
+    """Rated books ("gave N stars to ...") in a Goodreads updates RSS
+    document, as book dicts with title, date_read, author and
+    goodreads_book_id"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(xml_text, 'lxml-xml')
+    items = soup.find_all('item')
+    logging.info(f"Found {len(items)} total items")
+
+    recent_books = []
+    for item in items:
+        try:
+            desc_elem = item.find('description')
+
+            if desc_elem:
+                desc_soup = BeautifulSoup(desc_elem.text, 'html.parser')
+                desc_text = desc_soup.get_text()
+            else:
+                desc_text = ""
+
+            logging.debug(f"Processing description: {desc_text}")
+
+            if "gave" in desc_text and "stars to" in desc_text:
+                parts = desc_text.split("stars to")
+                if len(parts) > 1:
+                    title_part = parts[1].strip()
+                    # Improved title extraction
+                    book_title = title_part.split(" by ")[0].strip()
+                    # Remove series information in parentheses if present
+                    if " (" in book_title:
+                        book_title = book_title.split(" (")[0].strip()
+
+                    pub_date = item.find('pubDate')
+                    if pub_date:
+                        date_text = pub_date.text
+                        date_read = datetime.strptime(date_text, '%a, %d %b %Y %H:%M:%S %z').astimezone()
+
+                        book = {
+                            'title': book_title,
+                            'date_read': date_read,
+                            'author': _updates_author(desc_soup, title_part),
+                            'goodreads_book_id': _updates_book_id(desc_soup),
+                        }
+                        recent_books.append(book)
+                        logging.info(f"Found rated book: {book_title} (Read on: {date_read.strftime('%Y-%m-%d')})")
+
+        except Exception as e:
+            logging.error(f"Error processing item: {str(e)}")
+            continue
+    return recent_books
+
+
+def _updates_author(desc_soup, title_part):
+    """Author of a "gave N stars to" update: the authorName link when the
+    description has one, else the text after " by " """
+    link = desc_soup.find('a', class_='authorName')
+    if link and link.get_text(strip=True):
+        return link.get_text(strip=True)
+    if " by " in title_part:
+        return title_part.split(" by ", 1)[1].strip().split("\n")[0].strip()
+    return ""
+
+
+def _updates_book_id(desc_soup):
+    for link in desc_soup.find_all('a', href=True):
+        match = _GOODREADS_BOOK_HREF.search(link['href'])
+        if match:
+            return match.group(1)
+    return None
+
+
+# -------- StoryGraph matching --------
+
+# Resolved Goodreads book -> StoryGraph book ID mappings, so later syncs can
+# open the book page directly instead of searching.
+STORYGRAPH_IDS_PATH = os.path.join('output', 'storygraph_ids.json')
+
+# Minimum candidate score to accept a title+author search result. ISBN
+# searches are already edition-specific, so they only need a sanity check.
+MIN_MATCH_SCORE = 0.75
+MIN_ISBN_MATCH_SCORE = 0.4
+
+# Titles and IDs of the books last seen in the StoryGraph reading journal,
+# captured whenever the sync loads the journal. Used by plan mode.
+JOURNAL_SNAPSHOT_PATH = os.path.join('output', 'storygraph_journal.json')
+
+# Plan mode flags a journal title this similar to a Goodreads title, but not
+# identical after normalization, as ambiguous rather than guessing.
+AMBIGUOUS_TITLE_SCORE = 0.85
+
+_GOODREADS_BOOK_HREF = re.compile(r'/book/show/(\d+)')
+_STORYGRAPH_BOOK_HREF = re.compile(r'/books/([0-9a-f-]{8,})')
+_storygraph_ids_lock = threading.Lock()
+
+# Collects every book link on the journal page as {href, title}.
+_JOURNAL_BOOKS_SCRIPT = """
+return Array.from(document.querySelectorAll("a[href*='/books/']")).map(a => ({
+    href: a.getAttribute('href'),
+    title: a.textContent.trim(),
+})).filter(b => b.title);
+"""
+
+# Collects every search result as {href, title, authors, text} in one call.
+_SEARCH_RESULTS_SCRIPT = """
+return Array.from(document.querySelectorAll('.book-title-author-and-series')).map(el => {
+    const link = el.querySelector("a[href*='/books/']");
+    return {
+        href: link ? link.getAttribute('href') : '',
+        title: link ? link.textContent.trim() : '',
+        authors: Array.from(el.querySelectorAll("a[href*='/authors/']")).map(a => a.textContent.trim()),
+        text: el.innerText,
+    };
+});
+"""
+
+# What the open StoryGraph book page is: a 404 (Rails' "doesn't exist"
+# page), and the title and authors in its header when they're there.
+_BOOK_PAGE_SCRIPT = """
+const el = document.querySelector('.book-title-author-and-series');
+const heading = el ? el.querySelector('h3') || el : null;
+return {
+    missing: /404|doesn.t exist|not found/i.test(document.title),
+    title: heading ? heading.textContent.trim().split('\\n')[0] : '',
+    authors: el ? Array.from(el.querySelectorAll("a[href*='/authors/']")).map(a => a.textContent.trim()) : [],
+};
+"""
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def score_candidate(book, candidate):
+    """Score a StoryGraph search result against a sync book, 0.0-1.0.
+    Title similarity dominates; author similarity is blended in when both
+    sides have an author."""
+    book_title = normalize_title(book['title'])
+    cand_title = normalize_title(candidate.get('title') or candidate.get('text', '').split('\n')[0])
+    title_score = _similarity(book_title, cand_title)
+
+    book_author = normalize_author(book.get('author'))
+    cand_authors = [normalize_author(a) for a in candidate.get('authors') or []]
+    if not book_author or not cand_authors:
+        return title_score
+    author_score = max(_similarity(book_author, a) for a in cand_authors)
+    return 0.7 * title_score + 0.3 * author_score
+
+
+def match_key(book):
+    """Key for the StoryGraph ID cache: the Goodreads book ID when known,
+    else normalized title and author"""
+    if book.get('goodreads_book_id'):
+        return f"gr:{book['goodreads_book_id']}"
+    return f"ta:{normalize_title(book['title'], keep_subtitle=True)}|{normalize_author(book.get('author'))}"
+
+
+def load_storygraph_ids(path=STORYGRAPH_IDS_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable StoryGraph ID cache {path}: {str(e)}")
+        return {}
+
+
+def load_journal_snapshot(path=JOURNAL_SNAPSHOT_PATH):
+    snapshot = {'captured_at': None, 'books': []}
+    if os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshot.update(json.load(f))
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable journal snapshot {path}: {str(e)}")
+    return snapshot
+
+
+def save_storygraph_ids(ids, path=STORYGRAPH_IDS_PATH):
+    write_json_atomic(path, ids, indent=2, sort_keys=True)
+
+
+class _RateLimiter:
+    """Global gate shared by every sync worker: hands out at most one book
+    start per `interval` seconds across the whole pool."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_at)
+            self._next_at = start_at + self.interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+
+# Sets the three read-date selects, verifies them, then clicks/submits the
+# Update button (the proven click + form.submit() combination) in one round
+# trip. Returns {missing: [...]} when the form isn't fully rendered, else the
+# read-back values and whether the form was submitted.
+_DATE_FORM_SCRIPT = """
+const wanted = {day: String(arguments[0]), month: String(arguments[1]), year: String(arguments[2])};
+const fields = {
+    day: document.getElementById('read_instance_day'),
+    month: document.querySelector("select[name='read_instance[month]']"),
+    year: document.querySelector("select[name='read_instance[year]']"),
+};
+const button = document.querySelector(
+    "input[type='submit'][name='commit'][value='Update'][data-disable-with='Update']"
+);
+const missing = Object.keys(fields).filter(k => !fields[k]);
+if (!button) missing.push('update button');
+if (missing.length) return {missing: missing};
+
+for (const k of Object.keys(fields)) {
+    fields[k].value = wanted[k];
+    fields[k].dispatchEvent(new Event('change'));
+}
+const values = {day: fields.day.value, month: fields.month.value, year: fields.year.value};
+if (Object.keys(wanted).some(k => values[k] !== wanted[k])) {
+    return {values: values, submitted: false};
+}
+button.scrollIntoView({block: 'center'});
+button.click();
+button.form.submit();
+return {values: values, submitted: true};
+"""
+
 
 class BookSyncAutomation:
-    def __init__(self, goodreads_user_id, storygraph_email, storygraph_password):
+    def __init__(self, goodreads_user_id, storygraph_email, storygraph_password,
+                 worker_name=None, book_delay=DEFAULT_BOOK_DELAY_SEC,
+                 ledger_path=LEDGER_PATH, storygraph_ids=None):
         self.goodreads_user_id = goodreads_user_id
         self.storygraph_email = storygraph_email
         self.storygraph_password = storygraph_password
+        self.worker_name = worker_name
+        self.book_delay = book_delay
+        self.ledger_path = ledger_path
+        # Shared between pool workers; loaded on first use
+        self.storygraph_ids = storygraph_ids
         self.driver = None
         
     def get_recently_read_goodreads(self):
         """Fetch recently read books from Goodreads RSS feed"""
+        import requests
+
         try:
             logging.info("Fetching Goodreads RSS feed...")
             headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+                'User-Agent': UPDATES_USER_AGENT
             }
-            rss_url = f"https://www.goodreads.com/user/updates_rss/{self.goodreads_user_id}"
+            rss_url = GOODREADS_UPDATES_RSS_URL.format(user_id=self.goodreads_user_id)
             logging.info(f"Accessing: {rss_url}")
             
             response = requests.get(rss_url, headers=headers, timeout=30)
@@ -45,49 +550,7 @@ class BookSyncAutomation:
                 logging.error("Response content: %s", response.text[:500])
                 raise Exception("Failed to access RSS feed")
 
-            # Parse content
-            soup = BeautifulSoup(response.text, 'lxml-xml')
-            items = soup.find_all('item')
-            logging.info(f"Found {len(items)} total items")
-            
-            recent_books = []
-            for item in items:
-                try:
-                    desc_elem = item.find('description')
-                    
-                    if desc_elem:
-                        desc_soup = BeautifulSoup(desc_elem.text, 'html.parser')
-                        desc_text = desc_soup.get_text()
-                    else:
-                        desc_text = ""
-                    
-                    logging.debug(f"Processing description: {desc_text}")
-                    
-                    if "gave" in desc_text and "stars to" in desc_text:
-                        parts = desc_text.split("stars to")
-                        if len(parts) > 1:
-                            title_part = parts[1].strip()
-                            # Improved title extraction
-                            book_title = title_part.split(" by ")[0].strip()
-                            # Remove series information in parentheses if present
-                            if " (" in book_title:
-                                book_title = book_title.split(" (")[0].strip()
-                            
-                            pub_date = item.find('pubDate')
-                            if pub_date:
-                                date_text = pub_date.text
-                                date_read = datetime.strptime(date_text, '%a, %d %b %Y %H:%M:%S %z').astimezone()
-                                
-                                book = {
-                                    'title': book_title,
-                                    'date_read': date_read
-                                }
-                                recent_books.append(book)
-                                logging.info(f"Found rated book: {book_title} (Read on: {date_read.strftime('%Y-%m-%d')})")
-                
-                except Exception as e:
-                    logging.error(f"Error processing item: {str(e)}")
-                    continue
+            recent_books = parse_updates_feed(response.text)
 
             if not recent_books:
                 logging.info("No recently read books found")
@@ -103,7 +566,16 @@ class BookSyncAutomation:
             raise
 
     def initialize_browser(self):
-        """Initialize browser for StoryGraph interaction"""
+        """Initialize browser for StoryGraph interaction. A browser kept
+        open from an earlier run is reused if it still responds."""
+        if self.driver and not self.browser_alive():
+            logging.info("Previous browser session is gone; starting a new one")
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+        _import_selenium()
         if not self.driver:
             chrome_options = webdriver.ChromeOptions()
             chrome_options.add_argument('--window-size=1920,1080')
@@ -117,6 +589,48 @@ class BookSyncAutomation:
             self.driver = webdriver.Chrome(options=chrome_options)
             self.driver.implicitly_wait(10)
 
+    def browser_alive(self):
+        if not self.driver:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def save_screenshot(self, filename):
+        """Save a debugging screenshot, prefixed with the worker name in pool
+        mode so parallel workers don't overwrite each other's captures"""
+        if self.worker_name:
+            filename = f"{self.worker_name}_{filename}"
+        self.driver.save_screenshot(filename)
+        return filename
+
+    def adopt_session(self, cookies):
+        """Open a browser that reuses an existing StoryGraph login by copying
+        its cookie jar, instead of signing in again"""
+        self.initialize_browser()
+        # Cookies can only be set for the domain currently loaded.
+        self.driver.get(STORYGRAPH_URL)
+        for cookie in cookies:
+            cookie = {k: v for k, v in cookie.items() if k != 'sameSite'}
+            self.driver.add_cookie(cookie)
+        self.driver.get(STORYGRAPH_URL)
+        WebDriverWait(self.driver, 20).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        )
+        if "/sign_in" in self.driver.current_url:
+            raise Exception("Shared StoryGraph session was not accepted")
+        logging.info("Joined shared StoryGraph session")
+
+    def close_browser(self):
+        if self.driver:
+            logging.info("Closing browser...")
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
+
     def login_to_storygraph(self):
         """Login to StoryGraph with improved waits and verification"""
         self.initialize_browser()
@@ -181,7 +695,7 @@ class BookSyncAutomation:
             else:
                 logging.error(f"Login may have failed. Current URL: {current_url}")
                 # Take screenshot for debugging
-                self.driver.save_screenshot("login_failed.png")
+                self.save_screenshot("login_failed.png")
                 raise Exception("Login failed - incorrect final URL")
             
         except Exception as e:
@@ -189,8 +703,8 @@ class BookSyncAutomation:
             logging.error(f"Current URL: {self.driver.current_url}")
             # Take screenshot for debugging
             try:
-                self.driver.save_screenshot("login_error.png")
-                logging.info("Screenshot saved as login_error.png")
+                path = self.save_screenshot("login_error.png")
+                logging.info(f"Screenshot saved as {path}")
             except:
                 logging.error("Could not save screenshot")
             raise
@@ -207,6 +721,8 @@ class BookSyncAutomation:
             )
             time.sleep(3)
             
+            self._save_journal_snapshot()
+
             # Try to find the book title in the journal
             page_source = self.driver.page_source.lower()
             book_title_lower = book['title'].lower()
@@ -222,79 +738,135 @@ class BookSyncAutomation:
             logging.error(f"Error checking book existence: {str(e)}")
             return False
 
-    def set_date(self, date):
-        """Set a date using the three dropdown selectors with improved error handling"""
-        logging.info(f"Setting date to {date.strftime('%Y-%m-%d')}...")
-        
+    def _save_journal_snapshot(self):
+        """Record the books on the currently loaded journal page so plan
+        mode can diff against them without a browser"""
         try:
-            # Select Day using ID with multiple attempts
-            max_attempts = 3
-            for attempt in range(max_attempts):
-                try:
-                    logging.info(f"Attempting to select day (attempt {attempt + 1})...")
-                    day_select = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.ID, "read_instance_day"))
-                    )
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", day_select)
-                    time.sleep(1)
-                    
-                    # Try to select using JavaScript
-                    self.driver.execute_script(
-                        f"arguments[0].value = '{date.day}'; arguments[0].dispatchEvent(new Event('change'));",
-                        day_select
-                    )
-                    logging.info(f"Day {date.day} selected")
-                    break
-                except Exception as e:
-                    if attempt == max_attempts - 1:
-                        raise
-                    logging.warning(f"Day selection attempt {attempt + 1} failed: {str(e)}")
-                    time.sleep(2)
-            
-            # Select Month with similar retry logic
-            for attempt in range(max_attempts):
-                try:
-                    logging.info(f"Attempting to select month (attempt {attempt + 1})...")
-                    month_select = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.NAME, "read_instance[month]"))
-                    )
-                    self.driver.execute_script(
-                        f"arguments[0].value = '{date.month}'; arguments[0].dispatchEvent(new Event('change'));",
-                        month_select
-                    )
-                    logging.info(f"Month {date.month} selected")
-                    break
-                except Exception as e:
-                    if attempt == max_attempts - 1:
-                        raise
-                    logging.warning(f"Month selection attempt {attempt + 1} failed: {str(e)}")
-                    time.sleep(2)
-            
-            # Select Year with similar retry logic
-            for attempt in range(max_attempts):
-                try:
-                    logging.info(f"Attempting to select year (attempt {attempt + 1})...")
-                    year_select = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.NAME, "read_instance[year]"))
-                    )
-                    self.driver.execute_script(
-                        f"arguments[0].value = '{date.year}'; arguments[0].dispatchEvent(new Event('change'));",
-                        year_select
-                    )
-                    logging.info(f"Year {date.year} selected")
-                    break
-                except Exception as e:
-                    if attempt == max_attempts - 1:
-                        raise
-                    logging.warning(f"Year selection attempt {attempt + 1} failed: {str(e)}")
-                    time.sleep(2)
-            
-            logging.info("Date selection complete")
-            
+            books = []
+            for link in self.driver.execute_script(_JOURNAL_BOOKS_SCRIPT) or []:
+                match = _STORYGRAPH_BOOK_HREF.search(link.get('href') or '')
+                books.append({
+                    'storygraph_id': match.group(1) if match else None,
+                    'title': link['title'],
+                })
+            snapshot = {
+                'captured_at': datetime.now().isoformat(timespec='seconds'),
+                'books': books,
+            }
+            with _storygraph_ids_lock:
+                write_json_atomic(JOURNAL_SNAPSHOT_PATH, snapshot, indent=2)
         except Exception as e:
-            logging.error(f"Error during date selection: {str(e)}")
-            self.driver.save_screenshot("date_selection_error.png")
-            raise
+            logging.warning(f"Could not snapshot StoryGraph journal: {str(e)}")
+
+    def set_date_and_submit(self, date):
+        """Fill the day/month/year selects, read them back, and submit the
+        read-date form, all in one injected script call. Retries cover the
+        whole form rather than each field."""
+        logging.info(f"Setting date to {date.strftime('%Y-%m-%d')}...")
+
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                day_select = WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.ID, "read_instance_day"))
+                )
+                result = self.driver.execute_script(
+                    _DATE_FORM_SCRIPT, date.day, date.month, date.year
+                ) or {}
+                if result.get('missing'):
+                    raise Exception(f"Date form is missing: {', '.join(result['missing'])}")
+                if not result.get('submitted'):
+                    raise Exception(f"Date did not stick, form reads back {result.get('values')}")
+                logging.info("Date selected and Update submitted")
+                break
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    logging.error(f"Error during date entry: {str(e)}")
+                    self.save_screenshot("date_selection_error.png")
+                    raise
+                logging.warning(f"Date entry attempt {attempt + 1} failed: {str(e)}")
+                time.sleep(2)
+
+        # Wait for update to complete: the submitted form is replaced
+        try:
+            WebDriverWait(self.driver, 10).until(EC.staleness_of(day_select))
+        except TimeoutException:
+            logging.warning("Date form still on page after submitting; continuing")
+
+    def _search_storygraph(self, search_term):
+        """Run a StoryGraph search and return its result candidates"""
+        self.driver.get(f"{STORYGRAPH_URL}browse?search_term={quote(search_term)}")
+        try:
+            WebDriverWait(self.driver, 20).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".book-title-author-and-series"))
+            )
+        except TimeoutException:
+            return []
+        return self.driver.execute_script(_SEARCH_RESULTS_SCRIPT) or []
+
+    def resolve_storygraph_id(self, book):
+        """Find the StoryGraph book ID for a sync book. Uses the cached
+        mapping when there is one; otherwise searches by ISBN-13/ISBN first,
+        then by title + author, and takes the best-scoring candidate above
+        the acceptance threshold. Returns None when nothing matches well
+        enough."""
+        if self.storygraph_ids is None:
+            self.storygraph_ids = load_storygraph_ids()
+        key = match_key(book)
+        cached = self.storygraph_ids.get(key)
+        if cached:
+            logging.info(f"Using cached StoryGraph match {cached}")
+            return cached
+
+        searches = [
+            (isbn, MIN_ISBN_MATCH_SCORE)
+            for isbn in dict.fromkeys([book.get('isbn13'), book.get('isbn')])
+            if isbn
+        ]
+        searches.append((f"{book['title']} {book.get('author') or ''}".strip(), MIN_MATCH_SCORE))
+        if book.get('author'):
+            # Title alone still finds books whose StoryGraph author credit
+            # is formatted very differently.
+            searches.append((book['title'], MIN_MATCH_SCORE))
+
+        for search_term, min_score in searches:
+            logging.info(f"Searching StoryGraph for '{search_term}'...")
+            best_id, best_score, best_text = None, 0.0, ""
+            for candidate in self._search_storygraph(search_term):
+                match = _STORYGRAPH_BOOK_HREF.search(candidate.get('href') or '')
+                if not match:
+                    continue
+                score = score_candidate(book, candidate)
+                if score > best_score:
+                    best_id, best_score, best_text = match.group(1), score, candidate.get('text', '')
+            if best_id and best_score >= min_score:
+                logging.info(
+                    f"Matched {' / '.join(best_text.split())!r} (score {best_score:.2f})"
+                )
+                with _storygraph_ids_lock:
+                    self.storygraph_ids[key] = best_id
+                    save_storygraph_ids(self.storygraph_ids)
+                return best_id
+            if best_id:
+                logging.info(f"Best candidate scored {best_score:.2f}, below {min_score}")
+        return None
+
+    def forget_storygraph_id(self, book):
+        with _storygraph_ids_lock:
+            if self.storygraph_ids and self.storygraph_ids.pop(match_key(book), None):
+                save_storygraph_ids(self.storygraph_ids)
+
+    def book_page_problem(self, book):
+        """Why the open StoryGraph book page can't be `book` ("returned
+        404" or "is titled ..."), or None. Only a 404 or a title that
+        clearly belongs to another book count: a slow or oddly laid out
+        page is no reason to drop a good cached match"""
+        page = self.driver.execute_script(_BOOK_PAGE_SCRIPT) or {}
+        if page.get('missing'):
+            return "returned 404"
+        if page.get('title') and score_candidate(book, page) < MIN_ISBN_MATCH_SCORE:
+            return f"is titled {page['title']!r}"
+        return None
 
     def update_book_status(self, book):
         """Update book status on StoryGraph with improved error handling"""
@@ -304,39 +876,20 @@ class BookSyncAutomation:
                 
             logging.info(f"Adding '{book['title']}' to StoryGraph...")
             
-            # URL encode the search term
-            encoded_title = quote(book['title'])
-            search_url = f"https://app.thestorygraph.com/browse?search_term={encoded_title}"
-            self.driver.get(search_url)
-            
-            # Wait for search results
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            time.sleep(3)
-            
-            logging.info("Looking for book in search results...")
-            results = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".book-title-author-and-series"))
-            )
-            
-            book_found = False
-            for result in results:
-                try:
-                    title_text = result.text.lower()
-                    if book['title'].lower() in title_text:
-                        logging.info(f"Found matching book: {result.text}")
-                        book_found = True
-                        
-                        # Scroll the result into view
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", result)
-                        time.sleep(1)
-                        break
-                except:
-                    continue
-            
-            if not book_found:
-                raise Exception(f"Could not find book '{book['title']}' in search results")
+            for _ in range(2):
+                storygraph_id = self.resolve_storygraph_id(book)
+                if not storygraph_id:
+                    raise Exception(f"Could not find book '{book['title']}' in search results")
+                self.driver.get(f"{STORYGRAPH_URL}books/{storygraph_id}")
+                problem = self.book_page_problem(book)
+                if not problem:
+                    break
+                # The remembered match is gone or points at another book:
+                # forget it and search again.
+                logging.warning(f"StoryGraph book {storygraph_id} {problem}; searching again")
+                self.forget_storygraph_id(book)
+            else:
+                raise Exception(f"No StoryGraph book page matches '{book['title']}'")
             
             # Multiple attempts for expanding dropdown
             max_attempts = 3
@@ -390,50 +943,8 @@ class BookSyncAutomation:
             except ElementClickInterceptedException:
                 self.driver.execute_script("arguments[0].click();", no_date_text)
             
-            time.sleep(2)
-            
             logging.info("Setting completion date...")
-            self.set_date(book['date_read'])
-            
-            # Find and click the Update button using exact HTML attributes
-            logging.info("Looking for Update button...")
-            
-            update_button = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((
-                    By.CSS_SELECTOR, 
-                    "input[type='submit'][name='commit'][value='Update'][data-disable-with='Update']"
-                ))
-            )
-            
-            # Ensure the button is in view and centered
-            self.driver.execute_script("""
-                arguments[0].scrollIntoView({
-                    behavior: 'smooth',
-                    block: 'center'
-                });
-            """, update_button)
-            time.sleep(2)  # Wait for scroll and any animations
-            
-            # Attempt to click the button using the proven JavaScript method
-            logging.info("Attempting to click Update button...")
-            try:
-                self.driver.execute_script("""
-                    arguments[0].click();
-                    arguments[0].form.submit();
-                """, update_button)
-                logging.info("Successfully clicked Update button using JavaScript")
-            except Exception as e:
-                logging.warning(f"JavaScript click failed: {str(e)}")
-                # Fallback to regular click if JavaScript method fails
-                try:
-                    update_button.click()
-                    logging.info("Successfully clicked Update button using regular click")
-                except Exception as e:
-                    logging.error(f"All click attempts failed: {str(e)}")
-                    raise
-            
-            # Wait for update to complete
-            time.sleep(5)
+            self.set_date_and_submit(book['date_read'])
             logging.info(f"Successfully added '{book['title']}'")
             
         except Exception as e:
@@ -441,56 +952,325 @@ class BookSyncAutomation:
             logging.error("Current URL: %s", self.driver.current_url)
             logging.info("Taking screenshot of error state...")
             try:
-                self.driver.save_screenshot(f"book_error_{book['title'].replace(' ', '_')}.png")
-                logging.info(f"Screenshot saved as book_error_{book['title'].replace(' ', '_')}.png")
+                path = self.save_screenshot(f"book_error_{book['title'].replace(' ', '_')}.png")
+                logging.info(f"Screenshot saved as {path}")
             except:
                 logging.error("Could not save screenshot")
             raise
 
-    def sync_books(self):
-        """Main sync function with improved error handling"""
+    def _spawn_workers(self, count):
+        """Start `count` extra browser sessions that share this session's
+        login cookies. A worker that can't join the session is dropped and
+        the pool carries on with whoever did."""
+        if count <= 0:
+            return []
+        cookies = self.driver.get_cookies()
+        workers = []
+        for i in range(count):
+            worker = BookSyncAutomation(
+                self.goodreads_user_id,
+                self.storygraph_email,
+                self.storygraph_password,
+                worker_name=f"worker-{i + 2}",
+                book_delay=self.book_delay,
+                ledger_path=self.ledger_path,
+                storygraph_ids=self.storygraph_ids,
+            )
+            try:
+                worker.adopt_session(cookies)
+                workers.append(worker)
+            except Exception as e:
+                logging.error(f"Could not start {worker.worker_name}: {str(e)}")
+                worker.close_browser()
+        return workers
+
+    def _work_queue(self, work, total, limiter, pool):
+        """Pull books off the shared queue until it's empty. In a pool, a
+        worker whose browser keeps failing retires (as long as another
+        worker is still running) so one broken session can't burn
+        through the whole queue."""
+        consecutive_failures = 0
+        while True:
+            try:
+                index, book = work.get_nowait()
+            except queue.Empty:
+                break
+            limiter.wait()
+            try:
+                logging.info(f"\n[{index}/{total}] Processing book: '{book['title']}'")
+                self.update_book_status(book)
+                logging.info(f"Successfully processed '{book['title']}'")
+                outcome = 'synced'
+                consecutive_failures = 0
+            except Exception as e:
+                logging.error(f"Error processing '{book['title']}': {str(e)}")
+                outcome = 'failed'
+                consecutive_failures += 1
+            with pool['lock']:
+                pool['summary'][outcome].append(book['title'])
+                pool['summary'][f'{outcome}_keys'].append(sync_key(book))
+                if outcome == 'synced':
+                    pool['ledger']['books'][sync_key(book)] = {
+                        'title': book['title'],
+                        'date_read': book['date_read'].strftime('%Y-%m-%d'),
+                        'synced_at': datetime.now().isoformat(timespec='seconds'),
+                    }
+                    save_ledger(pool['ledger'], self.ledger_path)
+                retire = (consecutive_failures >= MAX_CONSECUTIVE_FAILURES
+                          and pool['active'] > 1)
+                if retire:
+                    pool['active'] -= 1
+            if retire:
+                logging.error(
+                    f"{self.worker_name} retiring after {consecutive_failures} "
+                    "consecutive failures"
+                )
+                return
+            time.sleep(self.book_delay)  # Add delay between books
+        with pool['lock']:
+            pool['active'] -= 1
+
+    def _run_pool(self, workers, books, summary, ledger):
+        """Feed `books` through `workers` via a shared queue. A single worker
+        runs in the calling thread; more than one each get a named thread so
+        the merged log shows who did what."""
+        work = queue.Queue()
+        for index, book in enumerate(books, 1):
+            work.put((index, book))
+        limiter = _RateLimiter(self.book_delay)
+        pool = {
+            'lock': threading.Lock(),
+            'summary': summary,
+            'ledger': ledger,
+            'active': len(workers),
+        }
+
+        if len(workers) == 1:
+            workers[0]._work_queue(work, len(books), limiter, pool)
+        else:
+            threads = [
+                threading.Thread(
+                    target=worker._work_queue,
+                    args=(work, len(books), limiter, pool),
+                    name=worker.worker_name,
+                )
+                for worker in workers
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        while True:
+            try:
+                _, book = work.get_nowait()
+            except queue.Empty:
+                break
+            logging.error(f"No worker left to process '{book['title']}'")
+            summary['failed'].append(book['title'])
+            summary['failed_keys'].append(sync_key(book))
+
+    def _open_pool(self, concurrency, book_count):
+        """Log in and start up to `concurrency` workers (never more than
+        there are books). Returns the worker list, this instance first."""
+        concurrency = max(1, min(int(concurrency), book_count))
+        if self.storygraph_ids is None:
+            self.storygraph_ids = load_storygraph_ids()
+        if concurrency > 1 and not self.worker_name:
+            self.worker_name = "worker-1"
+
+        self.login_to_storygraph()
+        workers = [self] + self._spawn_workers(concurrency - 1)
+        if concurrency > 1:
+            logging.info(f"Syncing with {len(workers)} workers")
+        return workers
+
+    def sync_books(self, concurrency=1, keep_browser=False, books=None):
+        """Main sync function with improved error handling.
+
+        With concurrency > 1, extra browser sessions reuse this session's
+        login and pull books from a shared queue. With keep_browser, this
+        instance's own browser (and its StoryGraph login) stays open for the
+        next run; pool workers are always closed. books (as returned by
+        parse_updates_feed) syncs just those instead of the whole updates
+        feed. Returns a summary dict of synced and failed titles, plus
+        their ledger keys (sync_key) as synced_keys and failed_keys."""
+        summary = {'synced': [], 'failed': [], 'synced_keys': [], 'failed_keys': []}
+        workers = [self]
         try:
-            recent_books = self.get_recently_read_goodreads()
+            recent_books = self.get_recently_read_goodreads() if books is None else books
             
             if not recent_books:
                 logging.info("No books to sync")
-                return
-                
-            self.login_to_storygraph()
-            
-            for book in recent_books:
-                try:
-                    logging.info(f"\nProcessing book: '{book['title']}'")
-                    self.update_book_status(book)
-                    logging.info(f"Successfully processed '{book['title']}'")
-                    time.sleep(3)  # Add delay between books
-                except Exception as e:
-                    logging.error(f"Error processing '{book['title']}': {str(e)}")
-                    continue  # Continue with next book even if one fails
+                return summary
+
+            # New reads are what the next report will look up; fetch their
+            # genres while the browser works.
+            goodreads_stats.prefetch_in_background(
+                [stats_book(b) for b in recent_books], GENRE_CACHE_PATH
+            )
+            ledger = load_ledger(self.ledger_path)
+            workers = self._open_pool(concurrency, len(recent_books))
+            self._run_pool(workers, recent_books, summary, ledger)
+            logging.info(
+                f"Sync finished: {len(summary['synced'])} processed, "
+                f"{len(summary['failed'])} failed"
+            )
                     
         except Exception as e:
             logging.error(f"Sync error: {str(e)}")
         finally:
-            if self.driver:
-                logging.info("Closing browser...")
-                self.driver.quit()
+            for worker in workers:
+                if not (keep_browser and worker is self):
+                    worker.close_browser()
+        return summary
+
+    def plan_sync(self, backfill=False, csv_path=None):
+        """Work out what a sync (or backfill) would do without opening a
+        browser. Each Goodreads book is compared with the local sync ledger,
+        the cached StoryGraph ID mappings and the last journal snapshot, and
+        sorted into to_add, already_present or ambiguous. Returns a JSON-
+        serializable dict. A csv_path (Goodreads library export) implies the
+        full-shelf comparison."""
+        if backfill or csv_path:
+            books = [
+                book_from_shelf(b)
+                for _, page in iter_shelf_pages(self.goodreads_user_id, csv_path)
+                for b in page
+            ]
+        else:
+            books = self.get_recently_read_goodreads()
+
+        ledger = load_ledger(self.ledger_path)
+        storygraph_ids = load_storygraph_ids()
+        snapshot = load_journal_snapshot()
+        journal_ids = {b['storygraph_id'] for b in snapshot['books'] if b.get('storygraph_id')}
+        journal_titles = {normalize_title(b['title']): b['title'] for b in snapshot['books']}
+
+        plan = {
+            'source': 'export_csv' if csv_path else 'read_shelf' if backfill else 'updates',
+            'journal_snapshot_at': snapshot['captured_at'],
+            'to_add': [],
+            'already_present': [],
+            'ambiguous': [],
+        }
+        for book in books:
+            entry = {
+                'title': book['title'],
+                'author': book.get('author') or '',
+                'date_read': book['date_read'].strftime('%Y-%m-%d'),
+                'goodreads_book_id': book.get('goodreads_book_id'),
+            }
+            title = normalize_title(book['title'])
+            if sync_key(book) in ledger['books']:
+                plan['already_present'].append(dict(entry, reason='in sync ledger'))
+            elif storygraph_ids.get(match_key(book)) in journal_ids:
+                plan['already_present'].append(dict(entry, reason='in journal (matched ID)'))
+            elif title in journal_titles:
+                plan['already_present'].append(dict(entry, reason='in journal (title)'))
+            else:
+                near = max(
+                    journal_titles,
+                    key=lambda t: _similarity(title, t),
+                    default=None,
+                )
+                if near and _similarity(title, near) >= AMBIGUOUS_TITLE_SCORE:
+                    plan['ambiguous'].append(dict(entry, candidate=journal_titles[near]))
+                else:
+                    plan['to_add'].append(entry)
+        return plan
+
+    def backfill_books(self, concurrency=1, csv_path=None, keep_browser=False):
+        """Sync the complete Goodreads read shelf, not just the recent
+        updates feed. The paginated read-shelf RSS (or a library export CSV
+        given as csv_path) is streamed one page at a time; each page is a
+        chunk fed through the worker pool.
+
+        Progress is checkpointed in the sync ledger: finished books are
+        recorded as they complete and the next page to fetch after each
+        page, so an interrupted backfill resumes where it stopped. Once the
+        last page is done the checkpoint resets, so a later run re-walks the
+        shelf and retries only books that aren't in the ledger yet.
+        keep_browser works as in sync_books."""
+        summary = {'synced': [], 'failed': [], 'synced_keys': [], 'failed_keys': []}
+        workers = []
+        ledger = load_ledger(self.ledger_path)
+        source = os.path.abspath(csv_path) if csv_path else 'rss'
+        if ledger['backfill'].get('source', source) != source:
+            # Page numbers from another source mean nothing here
+            ledger['backfill'] = {}
+        ledger['backfill']['source'] = source
+        start_page = ledger['backfill'].get('next_page', 1)
+        if start_page > 1:
+            logging.info(f"Resuming backfill from page {start_page}")
+        try:
+            for page, shelf_books in iter_shelf_pages(
+                self.goodreads_user_id, csv_path, start_page=start_page
+            ):
+                books = [book_from_shelf(b) for b in shelf_books]
+                pending = [b for b in books if sync_key(b) not in ledger['books']]
+                logging.info(
+                    f"Backfill page {page}: {len(pending)} of {len(books)} books to sync"
+                )
+                if pending:
+                    if not workers:
+                        workers = self._open_pool(concurrency, len(pending))
+                    self._run_pool(workers, pending, summary, ledger)
+                ledger['backfill']['next_page'] = page + 1
+                save_ledger(ledger, self.ledger_path)
+
+            ledger['backfill'] = {
+                'source': source,
+                'completed_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            save_ledger(ledger, self.ledger_path)
+            logging.info(
+                f"Backfill finished: {len(summary['synced'])} processed, "
+                f"{len(summary['failed'])} failed"
+            )
+
+        except Exception as e:
+            logging.error(f"Backfill error: {str(e)}")
+        finally:
+            for worker in workers:
+                if not (keep_browser and worker is self):
+                    worker.close_browser()
+        return summary
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirror rated Goodreads books into StoryGraph.")
+    parser.add_argument(
+        "--concurrency", type=int,
+        help="Number of parallel browser sessions (else config sync_concurrency, default 1).",
+    )
+    parser.add_argument(
+        "--backfill", action="store_true",
+        help="Sync the whole Goodreads read shelf instead of recent ratings; resumable.",
+    )
+    parser.add_argument(
+        "--from-csv", metavar="PATH",
+        help="Use a Goodreads 'Export Library' CSV as the full-shelf source for "
+             "--backfill, --plan and --export-csv instead of the RSS feed.",
+    )
+    parser.add_argument(
+        "--export-csv", metavar="PATH",
+        help="Write books read since the last export as a Goodreads-format CSV "
+             "for StoryGraph's importer, instead of driving the browser.",
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="With --export-csv, export the whole read shelf, not just the delta.",
+    )
+    parser.add_argument(
+        "--plan", action="store_true",
+        help="Print what a sync would do as JSON, without opening a browser.",
+    )
+    args = parser.parse_args()
+    configure_logging()
+
     try:
-        # Load configuration
-        config_path = 'config.json'
-        if not os.path.exists(config_path):
-            logging.error(f"Config file not found at {config_path}")
-            raise FileNotFoundError(f"Config file not found at {config_path}")
-            
-        with open(config_path) as f:
-            config = json.load(f)
-        
-        required_keys = ['goodreads_user_id', 'storygraph_email', 'storygraph_password']
-        missing_keys = [key for key in required_keys if key not in config]
-        if missing_keys:
-            raise KeyError(f"Missing required config keys: {', '.join(missing_keys)}")
-        
+        config = load_config()
+
         # Create sync bot instance
         sync_bot = BookSyncAutomation(
             goodreads_user_id=config['goodreads_user_id'],
@@ -498,8 +1278,25 @@ if __name__ == "__main__":
             storygraph_password=config['storygraph_password']
         )
         
+        if args.export_csv:
+            shelf = [
+                b for _, page in iter_shelf_pages(config['goodreads_user_id'], args.from_csv)
+                for b in page
+            ]
+            count = export_storygraph_csv(shelf, args.export_csv, full=args.full)
+            logging.info(f"Wrote {count} books to {args.export_csv}")
+            sys.exit(0)
+
+        if args.plan:
+            print(json.dumps(sync_bot.plan_sync(backfill=args.backfill, csv_path=args.from_csv), indent=2))
+            sys.exit(0)
+
         # Run the sync
-        sync_bot.sync_books()
+        concurrency = args.concurrency or config.get('sync_concurrency', 1)
+        if args.backfill or args.from_csv:
+            sync_bot.backfill_books(concurrency=concurrency, csv_path=args.from_csv)
+        else:
+            sync_bot.sync_books(concurrency=concurrency)
         
     except Exception as e:
         logging.error(f"Fatal error: {str(e)}")
@@ -0,0 +1,235 @@
+"""Genre normalization for the stats pipeline.
+
+Google Books hands back BISAC paths ("Fiction / Science Fiction / General"),
+Goodreads hands back crowd tags ("Science Fiction", "Sci-Fi"), and the same
+genre shows up under all of them. This module compiles one taxonomy — a
+prefix trie over BISAC paths plus an alias table — and maps any raw category
+string to a canonical genre ID (a stable slug like "science-fiction").
+
+goodreads_stats applies it once, when a lookup result enters the genre
+cache, so the report aggregation only counts IDs.
+"""
+
+from __future__ import annotations
+
+import re
+
+
+# Bump when the tables below change; cached entries tagged with an older
+# version get re-canonicalized from their stored raw categories on load.
+TAXONOMY_VERSION = 1
+
+# Canonical genres: id -> (display label, aliases). Aliases are matched after
+# normalization (lowercase, "&" -> "and", punctuation dropped), so "Sci-Fi",
+# "sci fi" and "SCI-FI" are all the same alias.
+CANONICAL_GENRES = {
+    "science-fiction": ("Science Fiction", ("sci-fi", "scifi", "sf", "science fiction general")),
+    "fantasy": ("Fantasy", ("fantasy and magic", "fantasy general")),
+    "mystery": ("Mystery", ("mysteries", "mystery and detective", "mysteries and detective stories", "detective")),
+    "thriller": ("Thriller", ("thrillers", "suspense", "mystery thriller")),
+    "crime": ("Crime", ("crime fiction",)),
+    "romance": ("Romance", ("romance general",)),
+    "horror": ("Horror", ("ghost stories",)),
+    "historical-fiction": ("Historical Fiction", ("historical",)),
+    "literary-fiction": ("Literary Fiction", ("literary",)),
+    "contemporary": ("Contemporary", ("contemporary fiction", "contemporary women")),
+    "dystopian": ("Dystopian", ("dystopia",)),
+    "classics": ("Classics", ("classic", "classic literature")),
+    "short-stories": ("Short Stories", ("short stories single author", "anthologies", "anthologies multiple authors")),
+    "graphic-novels": ("Graphic Novels", ("comics and graphic novels", "graphic novel", "comics", "comic books", "manga")),
+    "poetry": ("Poetry", ("poems",)),
+    "humor": ("Humor", ("humour", "humorous", "comedy")),
+    "lgbtq": ("LGBTQ+", ("lgbt", "lgbtq", "queer", "glbt")),
+    "biography": ("Biography & Memoir", ("biography and autobiography", "biographies", "memoir", "memoirs", "personal memoirs", "autobiography")),
+    "history": ("History", ("world history",)),
+    "true-crime": ("True Crime", ()),
+    "science": ("Science", ("popular science",)),
+    "psychology": ("Psychology", ()),
+    "philosophy": ("Philosophy", ()),
+    "religion": ("Religion & Spirituality", ("religion", "spirituality", "christian", "christianity", "body mind and spirit")),
+    "self-help": ("Self-Help", ("self help", "personal development", "personal growth")),
+    "business": ("Business & Economics", ("business and economics", "economics", "finance")),
+    "politics": ("Politics", ("political science",)),
+    "social-science": ("Social Science", ("sociology",)),
+    "travel": ("Travel", ()),
+    "cooking": ("Food & Cooking", ("cooking", "cookbooks", "food", "food and drink")),
+    "nature": ("Nature", ()),
+    "art": ("Art", ()),
+    "music": ("Music", ()),
+    "sports": ("Sports", ("sports and recreation",)),
+    "health": ("Health & Fitness", ("health and fitness", "health")),
+    "family": ("Family & Relationships", ("family and relationships", "relationships", "parenting")),
+    "technology": ("Technology", ("technology and engineering", "computers")),
+    "literary-criticism": ("Literary Criticism", ()),
+    "essays": ("Essays", ("literary collections",)),
+    "drama": ("Drama", ("plays",)),
+    "education": ("Education", ()),
+}
+
+# BISAC top-levels that are genres in their own right: a path under one of
+# these counts toward the top-level genre unless a deeper entry says
+# otherwise (so "History / Europe / General" is History, not "Europe").
+BISAC_PATHS = {
+    ("biography and autobiography",): "biography",
+    ("history",): "history",
+    ("true crime",): "true-crime",
+    ("science",): "science",
+    ("psychology",): "psychology",
+    ("philosophy",): "philosophy",
+    ("religion",): "religion",
+    ("body mind and spirit",): "religion",
+    ("self help",): "self-help",
+    ("business and economics",): "business",
+    ("political science",): "politics",
+    ("social science",): "social-science",
+    ("travel",): "travel",
+    ("cooking",): "cooking",
+    ("nature",): "nature",
+    ("art",): "art",
+    ("music",): "music",
+    ("sports and recreation",): "sports",
+    ("health and fitness",): "health",
+    ("family and relationships",): "family",
+    ("technology and engineering",): "technology",
+    ("computers",): "technology",
+    ("literary criticism",): "literary-criticism",
+    ("literary collections",): "essays",
+    ("poetry",): "poetry",
+    ("drama",): "drama",
+    ("humor",): "humor",
+    ("comics and graphic novels",): "graphic-novels",
+    ("education",): "education",
+    ("social science", "sociology"): "social-science",
+    ("history", "military"): "history",
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold "&" to "and", drop punctuation, collapse whitespace."""
+    text = (text or "").lower().replace("&", " and ")
+    text = re.sub(r"[^\w\s]+", " ", text).replace("_", " ")
+    return " ".join(text.split())
+
+
+def slugify(text: str) -> str:
+    return normalize(text).replace(" ", "-")
+
+
+class _Node:
+    __slots__ = ("children", "genre")
+
+    def __init__(self) -> None:
+        self.children: dict = {}
+        self.genre: str | None = None
+
+
+class GenreTaxonomy:
+    """Compiled lookup from raw category strings to canonical genre IDs.
+
+    Resolution for one category string, split on " / ":
+    - Walk the BISAC trie; the deepest node carrying an ID wins.
+    - Otherwise, for a multi-level path, the second level is the genre
+      ("Fiction / Science Fiction / General" -> "science fiction").
+    - Otherwise the single label is the genre, unless it's a generic
+      top-level ("Fiction") or a stop-word.
+    The chosen label goes through the alias table; a label with no alias
+    becomes its own ID (its slug), so unseen genres still count.
+
+    Results are memoized per raw string — the same few hundred strings recur
+    across every book and every run.
+    """
+
+    def __init__(self, *, generic_top_levels, stopwords,
+                 genres: dict = CANONICAL_GENRES, bisac_paths: dict = BISAC_PATHS) -> None:
+        self.labels: dict = {}
+        self._aliases: dict = {}
+        self._canonical = frozenset(genres)
+        for gid, (label, aliases) in genres.items():
+            self.labels[gid] = label
+            for name in (gid, label) + tuple(aliases):
+                self._aliases[normalize(name)] = gid
+        self._trie = _Node()
+        for path, gid in bisac_paths.items():
+            node = self._trie
+            for segment in path:
+                node = node.children.setdefault(normalize(segment), _Node())
+            node.genre = gid
+        self._generic = frozenset(normalize(s) for s in generic_top_levels)
+        self._stopwords = frozenset(normalize(s) for s in stopwords)
+        self._memo: dict = {}
+
+    def classify(self, category: str) -> tuple:
+        """(genre_id or None, generic) for one raw category string. generic
+        is True when the ID only came from a generic top-level like
+        "Juvenile Fiction" on its own."""
+        hit = self._memo.get(category)
+        if hit is None:
+            hit = self._memo[category] = self._classify(category)
+        return hit
+
+    def _classify(self, category: str) -> tuple:
+        raw = [p.strip() for p in category.split(" / ") if p.strip()]
+        segments = [normalize(p) for p in raw]
+        if not segments or not segments[0]:
+            return (None, False)
+
+        node, best = self._trie, None
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.genre:
+                best = node.genre
+        if best:
+            return (best, False)
+
+        index = 1 if len(segments) >= 2 else 0
+        segment = segments[index]
+        if not segment or segment in self._stopwords:
+            return (None, False)
+        generic = index == 0 and segment in self._generic
+        gid = self._aliases.get(segment)
+        if gid is None:
+            gid = segment.replace(" ", "-")
+            self.labels.setdefault(gid, raw[index])
+        return (gid, generic)
+
+    def canonicalize(self, categories: list, max_per_book: int = 3) -> dict:
+        """Map one book's raw category list to canonical IDs.
+
+        Returns {"genres": [...], "generic": [...], "labels": {...}}: the
+        first max_per_book distinct IDs without and with generic
+        top-levels, in category order, and display labels for every ID
+        used (derived IDs keep the label they were first seen under).
+        """
+        strict: list = []
+        generic: list = []
+        for cat in categories or []:
+            gid, is_generic = self.classify(cat)
+            if gid is None:
+                continue
+            if not is_generic and gid not in strict and len(strict) < max_per_book:
+                strict.append(gid)
+            if gid not in generic and len(generic) < max_per_book:
+                generic.append(gid)
+            if len(strict) >= max_per_book and len(generic) >= max_per_book:
+                break
+        return {
+            "genres": strict,
+            "generic": generic,
+            "labels": {gid: self.label(gid) for gid in generic + strict},
+        }
+
+    def known(self, categories: list) -> bool:
+        """True when at least one category maps to a canonical genre (by
+        alias or BISAC path) rather than to a generic top-level or an ID
+        derived from an unknown label. Open Library subjects are mostly
+        topics ("Wizards", "Boarding schools"); only these are genres."""
+        for cat in categories or []:
+            gid, generic = self.classify(cat)
+            if gid in self._canonical and not generic:
+                return True
+        return False
+
+    def label(self, gid: str) -> str:
+        return self.labels.get(gid) or gid.replace("-", " ").title()
@@ -11,16 +11,29 @@ for design — there's no separate chart-rendering pipeline.
 from __future__ import annotations
 
 import argparse
+import csv
+import gzip
 import json
 import logging
+import os
+import re
+import sqlite3
 import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from html import unescape
+from itertools import accumulate
 from pathlib import Path
 from typing import Optional
 
-import requests
-from bs4 import BeautifulSoup
+import image_variants
+import svg_report
+from genre_taxonomy import TAXONOMY_VERSION, GenreTaxonomy
+from work_keys import WorkIndex
 
 
 # -------- constants --------
@@ -70,6 +83,7 @@ class Book:
     user_read_at: datetime
     user_rating: Optional[int]
     goodreads_book_id: Optional[str] = None
+    isbn13: Optional[str] = None
 
 
 @dataclass
@@ -85,18 +99,65 @@ class Stats:
     book_titles: list      # [(date, title, author), ...] reverse-chronological
     books: list            # in-window Book objects
     first_name: Optional[str] = None  # for personalizing the title line
+    average_rating: Optional[float] = None  # over rated in-window books
+    window_label: str = "last 12 months"
 
 
 # -------- fetch --------
 
+# requests, bs4/lxml, jinja2 and playwright are imported where they're first
+# used, so `--help`, the web UI and book_sync don't pay for them at import.
+
+def _http_get(url: str, **kwargs):
+    import requests
+
+    return requests.get(url, **kwargs)
+
+
 def fetch_read_shelf(user_id: str, timeout: int = 30) -> tuple:
     """Return (books, first_name). first_name is parsed from the RSS channel
     title (e.g., 'Michael\\'s bookshelf: read' -> 'Michael') and is None if
     the channel title doesn't match the expected pattern."""
     url = GOODREADS_RSS_URL.format(user_id=user_id)
-    response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    response = _http_get(url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
     response.raise_for_status()
-    soup = BeautifulSoup(response.text, "lxml-xml")
+    books, first_name, _ = parse_read_shelf(response.text)
+    return books, first_name
+
+
+def iter_read_shelf(user_id: str, start_page: int = 1, timeout: int = 30):
+    """Yield (page_number, books) for every page of the read-shelf RSS,
+    starting at start_page, until Goodreads returns a page with no items.
+
+    Pages are fetched lazily, one request per iteration, so a caller can
+    process and checkpoint each page before the next one is downloaded.
+    Requests share the Goodreads rate gate with the genre scraper."""
+    page = max(1, int(start_page))
+    url = GOODREADS_RSS_URL.format(user_id=user_id)
+    while True:
+        _goodreads_rate_gate()
+        response = _http_get(
+            url,
+            params={"page": page},
+            headers={"User-Agent": USER_AGENT},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        books, _, item_count = parse_read_shelf(response.text)
+        if item_count == 0:
+            return
+        yield page, books
+        page += 1
+
+
+def parse_read_shelf(xml_text: str) -> tuple:
+    """Parse one read-shelf RSS document. Returns (books, first_name,
+    item_count); item_count includes items that were skipped, so callers
+    paging through the feed can tell an empty page from a page of undated
+    books."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(xml_text, "lxml-xml")
 
     first_name = None
     channel = soup.find("channel")
@@ -123,7 +184,96 @@ def fetch_read_shelf(user_id: str, timeout: int = 30) -> tuple:
             len(skipped_no_date),
             ", ".join(repr(t) for t in skipped_no_date),
         )
-    return books, first_name
+    return books, first_name, len(items)
+
+
+def iter_goodreads_export(path: Path, chunk_size: int = 1000):
+    """Stream a Goodreads "Export Library" CSV, yielding lists of up to
+    chunk_size Book records. Only rows on the read shelf with a Date Read
+    are kept; undated rows are skipped with the same warning as the RSS.
+
+    Rows are read one at a time, so memory stays flat regardless of
+    library size. The export is an offline alternative to the RSS feeds:
+    no pagination, no rate limits, no network."""
+    chunk: list = []
+    skipped_no_date: list = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                # E.g. a review longer than the csv module's field limit;
+                # the reader picks up again at the next line.
+                logging.warning("Skipping unreadable export row at line %d: %s", reader.line_num, e)
+                continue
+            if (row.get("Exclusive Shelf") or "read").strip() != "read":
+                continue
+            try:
+                chunk.append(_parse_export_row(row))
+            except _NoReadDate as e:
+                skipped_no_date.append(e.title)
+                continue
+            except Exception as e:
+                logging.warning("Skipping unparseable export row at line %d (%r): %s",
+                                reader.line_num, row.get("Title"), e)
+                continue
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+    if skipped_no_date:
+        logging.warning(
+            "Skipped %d book(s) with no read date set on Goodreads; "
+            "set a finish date on each to include them: %s",
+            len(skipped_no_date),
+            ", ".join(repr(t) for t in skipped_no_date),
+        )
+
+
+def load_goodreads_export(path: Path) -> tuple:
+    """Return (books, first_name) from a Goodreads export CSV, mirroring
+    fetch_read_shelf. The export carries no display name, so first_name is
+    always None."""
+    books: list = []
+    for chunk in iter_goodreads_export(path):
+        books.extend(chunk)
+    return books, None
+
+
+def _export_isbn(value: str) -> Optional[str]:
+    # Goodreads writes ISBNs as ="0123456789" to protect leading zeros.
+    value = (value or "").strip().lstrip("=").strip('"').strip()
+    return value or None
+
+
+def _parse_export_row(row: dict) -> Book:
+    title = (row.get("Title") or "").strip()
+
+    # "Date Read" is YYYY/MM/DD. Split by hand rather than strptime; this is
+    # the hot loop for large exports.
+    read_text = (row.get("Date Read") or "").strip()
+    if not read_text:
+        raise _NoReadDate(title or "<unknown title>")
+    year, month, day = (int(p) for p in read_text.split("/"))
+    user_read_at = datetime(year, month, day).astimezone()
+
+    pages_text = (row.get("Number of Pages") or "").strip()
+    rating_text = (row.get("My Rating") or "").strip()
+    isbn13 = _export_isbn(row.get("ISBN13"))
+    return Book(
+        title=title,
+        author=(row.get("Author") or "").strip(),
+        isbn=_export_isbn(row.get("ISBN")) or isbn13,
+        num_pages=int(pages_text) if pages_text.isdigit() else None,
+        user_read_at=user_read_at,
+        user_rating=int(rating_text) if rating_text.isdigit() and int(rating_text) > 0 else None,
+        goodreads_book_id=(row.get("Book Id") or "").strip() or None,
+        isbn13=isbn13,
+    )
 
 
 def _parse_first_name(channel_title: str) -> Optional[str]:
@@ -164,7 +314,8 @@ def _parse_item(item) -> Book:
     title = _text(item.find("title"))
     author = _text(item.find("author_name"))
 
-    isbn = _text(item.find("isbn")) or _text(item.find("isbn13")) or None
+    isbn13 = _text(item.find("isbn13")) or None
+    isbn = _text(item.find("isbn")) or isbn13
 
     num_pages_text = _text(item.find("num_pages"))
     num_pages = int(num_pages_text) if num_pages_text.isdigit() else None
@@ -199,53 +350,172 @@ def _parse_item(item) -> Book:
         user_read_at=user_read_at,
         user_rating=user_rating,
         goodreads_book_id=book_id,
+        isbn13=isbn13,
     )
 
 
-# -------- aggregate --------
+# -------- book store --------
 
-def compute_highlights(stats: "Stats") -> dict:
-    """Pull a few editorial 'numbers worth knowing' from the year's data.
-    Each entry is (label, primary, detail). Missing data is omitted rather
-    than shown as a placeholder. The three-part shape supports a label /
-    big-value / small-caption render in each highlight column."""
-    h: dict = {}
+def _optional_numpy():
+    """NumPy if it's installed, else None. It's optional: every column
+    aggregation has a plain-Python loop that gives the same results."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
 
-    # Peak reading month
-    if stats.books_per_month:
-        peak_label, peak_count = max(stats.books_per_month, key=lambda x: x[1])
-        if peak_count > 0:
-            month_name = peak_label.split()[0]
-            plural = "books" if peak_count != 1 else "book"
-            h["peak_month"] = ("Peak month", month_name, f"{peak_count} {plural}")
 
-    # Most-read author
-    by_author: dict = {}
-    for b in stats.books:
-        if b.author:
-            by_author[b.author] = by_author.get(b.author, 0) + 1
-    if by_author:
-        top_author, count = max(by_author.items(), key=lambda kv: (kv[1], -len(kv[0])))
-        if count >= 2:
-            h["top_author"] = (
-                "Most-read author",
-                _truncate_label(top_author, 18),
-                f"{count} books",
-            )
+class _TextColumn:
+    """A column of strings stored end to end as UTF-8 in one buffer, with
+    an array of row offsets: a few bytes per row instead of a str object
+    (plus a list slot) per row. Missing values are stored as ""."""
 
-    # Longest book + average pages
-    with_pages = [b for b in stats.books if b.num_pages]
-    if with_pages:
-        longest = max(with_pages, key=lambda b: b.num_pages)
-        h["longest"] = (
-            "Longest book",
-            _truncate_label(longest.title, 18),
-            f"{longest.num_pages:,} pages",
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets = array("q", [0])  # row i is data[offsets[i]:offsets[i + 1]]
+
+    def extend(self, values) -> None:
+        self._extend_encoded([(v or "").encode() for v in values])
+
+    def _extend_encoded(self, encoded: list) -> None:
+        ends = accumulate(map(len, encoded), initial=self.offsets[-1])
+        next(ends)  # the initial value is already the last offset
+        self.offsets.extend(ends)
+        self.data += b"".join(encoded)
+
+    def take(self, order) -> "_TextColumn":
+        """A copy with rows in the given order."""
+        column = _TextColumn()
+        data, offsets = self.data, self.offsets
+        column._extend_encoded([data[offsets[i]:offsets[i + 1]] for i in order])
+        return column
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode()
+
+
+class BookStore:
+    """Columnar, array-backed book shelf, sorted by read time.
+
+    Numeric fields live in typed arrays (read timestamp, month index, pages,
+    rating; 0 means missing) and text fields in packed UTF-8 columns, so a
+    large shelf costs a few bytes per field rather than a Python object per
+    book. Because rows are time-sorted, any date window is a contiguous
+    [lo, hi) slice found by bisection, and aggregation runs over the
+    slice's columns (vectorized when NumPy is installed). Book objects are
+    only rebuilt for rows a caller actually needs (e.g. one window's list).
+
+    Build one from a list with BookStore(books), or with from_chunks()
+    straight from a streamed source so the whole shelf never exists as
+    Book objects at once. benchmarks/book_store.py compares both against
+    a plain Book list.
+    """
+
+    _NUMERIC = ("read_ts", "month", "pages", "rating", "utc_offset")
+    _TEXT = ("title", "author", "isbn", "isbn13", "goodreads_id")
+
+    def __init__(self, books: list = ()) -> None:
+        self.read_ts = array("d")
+        self.month = array("l")
+        self.pages = array("l")
+        self.rating = array("b")
+        # Each row's original UTC offset, so rebuilt datetimes match.
+        self.utc_offset = array("l")
+        for name in self._TEXT:
+            setattr(self, name, _TextColumn())
+        self._extend(books)
+        self._sort()
+
+    @classmethod
+    def from_chunks(cls, chunks) -> "BookStore":
+        """Build a store from an iterable of book lists, such as
+        iter_goodreads_export() or the pages of iter_read_shelf(). Each
+        chunk is copied into the columns as it arrives and can be freed
+        before the next one is read."""
+        store = cls()
+        for chunk in chunks:
+            store._extend(chunk)
+        store._sort()
+        return store
+
+    def _extend(self, books) -> None:
+        books = list(books)
+        read_at = [b.user_read_at for b in books]
+        offsets = [dt.utcoffset() for dt in read_at]
+        self.read_ts.extend(dt.timestamp() for dt in read_at)
+        self.month.extend(map(_month_index, read_at))
+        self.pages.extend(b.num_pages or 0 for b in books)
+        self.rating.extend(b.user_rating or 0 for b in books)
+        self.utc_offset.extend(int(o.total_seconds()) if o else 0 for o in offsets)
+        self.title.extend(b.title for b in books)
+        self.author.extend(b.author for b in books)
+        self.isbn.extend(b.isbn for b in books)
+        self.isbn13.extend(b.isbn13 for b in books)
+        self.goodreads_id.extend(b.goodreads_book_id for b in books)
+
+    def _sort(self) -> None:
+        """Reorder rows by read time (stable, so ties keep source order)."""
+        ts = self.read_ts
+        if all(ts[i] <= ts[i + 1] for i in range(len(ts) - 1)):
+            return
+        np = _optional_numpy()
+        if np is not None:
+            order = np.argsort(np.asarray(ts), kind="stable").tolist()
+        else:
+            order = sorted(range(len(ts)), key=ts.__getitem__)
+        for name in self._NUMERIC:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, map(column.__getitem__, order)))
+        for name in self._TEXT:
+            setattr(self, name, getattr(self, name).take(order))
+
+    def __len__(self) -> int:
+        return len(self.read_ts)
+
+    def between(self, start: datetime, end: datetime) -> tuple:
+        """Row slice [lo, hi) of books read within [start, end]."""
+        return (
+            bisect_left(self.read_ts, start.timestamp()),
+            bisect_right(self.read_ts, end.timestamp()),
         )
-        avg = stats.total_pages // max(1, len(with_pages))
-        h["avg_pages"] = ("Average length", f"{avg:,}", "pages per book")
 
-    return h
+    def book(self, i: int) -> Book:
+        tz = timezone(timedelta(seconds=self.utc_offset[i]))
+        return Book(
+            title=self.title[i],
+            author=self.author[i],
+            isbn=self.isbn[i] or None,
+            num_pages=self.pages[i] or None,
+            user_read_at=datetime.fromtimestamp(self.read_ts[i], tz),
+            user_rating=self.rating[i] or None,
+            goodreads_book_id=self.goodreads_id[i] or None,
+            isbn13=self.isbn13[i] or None,
+        )
+
+    def books(self, lo: int = 0, hi: Optional[int] = None) -> list:
+        """Materialize rows [lo, hi) as Book objects, oldest first."""
+        hi = len(self) if hi is None else hi
+        return [self.book(i) for i in range(lo, hi)]
+
+
+def _as_store(books) -> BookStore:
+    return books if isinstance(books, BookStore) else BookStore(books)
+
+
+# -------- aggregate --------
+
+def compute_highlights(stats: "Stats", model: Optional[dict] = None) -> dict:
+    """Pull a few editorial 'numbers worth knowing' from the year's data.
+    Each entry is (label, primary, detail). Missing data is omitted rather
+    than shown as a placeholder. The three-part shape supports a label /
+    big-value / small-caption render in each highlight column.
+
+    Reads the metrics from a report model (see build_report_model); one is
+    built without genre data when not supplied."""
+    if model is None:
+        model = build_report_model(stats, {})
+    return model["highlights"]
 
 
 def aggregate_last_12_months(
@@ -253,34 +523,50 @@ def aggregate_last_12_months(
     today: Optional[datetime] = None,
     first_name: Optional[str] = None,
 ) -> Stats:
+    """Rolling 365-day window ending today, bucketed into the 12 calendar
+    months ending with today's. books may be a list or a BookStore."""
     if today is None:
         today = datetime.now().astimezone()
     window_start = today - timedelta(days=365)
 
-    in_window = [b for b in books if window_start <= b.user_read_at <= today]
+    store = _as_store(books)
+    lo, hi = store.between(window_start, today)
 
     months = _month_buckets_ending_at(today, 12)
-    bpm = {label: 0 for label in months}
-    ppm = {label: 0 for label in months}
+    first_month = _month_index(today) - 11
+    bpm = [0] * 12
+    ppm = [0] * 12
 
     total_pages = 0
     books_missing_pages = 0
-    for b in in_window:
-        label = b.user_read_at.strftime("%b %Y")
-        if label not in bpm:
-            continue
-        bpm[label] += 1
-        if b.num_pages:
-            ppm[label] += b.num_pages
-            total_pages += b.num_pages
-        else:
-            books_missing_pages += 1
+    # A 365-day window can reach into the same month a year ago, which has
+    # no bucket; those books count toward the total only.
+    np = _optional_numpy()
+    if np is not None:
+        k = np.asarray(store.month)[lo:hi] - first_month
+        pages = np.asarray(store.pages)[lo:hi]
+        bucketed = k >= 0
+        k, pages = k[bucketed], pages[bucketed]
+        bpm = np.bincount(k, minlength=12).tolist()
+        ppm = np.bincount(k, weights=pages, minlength=12).astype(np.int64).tolist()
+        total_pages = int(pages.sum())
+        books_missing_pages = int((pages == 0).sum())
+    else:
+        month_col, pages_col = store.month, store.pages
+        for i in range(lo, hi):
+            k = month_col[i] - first_month
+            if k < 0:
+                continue
+            bpm[k] += 1
+            pages = pages_col[i]
+            if pages:
+                ppm[k] += pages
+                total_pages += pages
+            else:
+                books_missing_pages += 1
 
-    titles = sorted(
-        [(b.user_read_at, b.title, b.author) for b in in_window],
-        key=lambda x: x[0],
-        reverse=True,
-    )
+    in_window = store.books(lo, hi)
+    titles = [(b.user_read_at, b.title, b.author) for b in reversed(in_window)]
 
     return Stats(
         today=today,
@@ -289,8 +575,8 @@ def aggregate_last_12_months(
         total_books=len(in_window),
         total_pages=total_pages,
         books_missing_pages=books_missing_pages,
-        books_per_month=[(label, bpm[label]) for label in months],
-        pages_per_month=[(label, ppm[label]) for label in months],
+        books_per_month=list(zip(months, bpm)),
+        pages_per_month=list(zip(months, ppm)),
         book_titles=titles,
         books=in_window,
         first_name=first_name,
@@ -310,11 +596,231 @@ def _month_buckets_ending_at(today: datetime, n: int) -> list:
     return list(reversed(labels))
 
 
+# -------- windows --------
+#
+# Arbitrary reporting periods (calendar year, date range, trailing N months)
+# are month-aligned and answered from MonthlyRollup: per-month arrays built
+# in one pass over the books, with prefix sums so any window's totals are a
+# subtraction and its Stats cost O(months), not O(books).
+# aggregate_last_12_months keeps its rolling-365-day semantics for the
+# default report.
+
+def _month_index(dt: datetime) -> int:
+    return dt.year * 12 + dt.month - 1
+
+
+def _month_start(index: int) -> datetime:
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+@dataclass(frozen=True)
+class ReportWindow:
+    first_month: int  # month index (year * 12 + month - 1), inclusive
+    last_month: int   # inclusive
+    label: str
+
+    @property
+    def months(self) -> int:
+        return self.last_month - self.first_month + 1
+
+    def shifted(self, months: int) -> "ReportWindow":
+        return ReportWindow(self.first_month + months, self.last_month + months, self.label)
+
+
+def calendar_year_window(year: int) -> ReportWindow:
+    return ReportWindow(year * 12, year * 12 + 11, str(year))
+
+
+def trailing_months_window(n: int, today: Optional[datetime] = None) -> ReportWindow:
+    """The n calendar months ending with (and including) today's month."""
+    if today is None:
+        today = datetime.now().astimezone()
+    last = _month_index(today)
+    return ReportWindow(last - n + 1, last, f"last {n} months")
+
+
+def date_range_window(start: datetime, end: datetime) -> ReportWindow:
+    """Every month touched by [start, end]."""
+    first, last = _month_index(start), _month_index(end)
+    if last < first:
+        raise ValueError("window end is before its start")
+    label = f"{_month_start(first):%b %Y} – {_month_start(last):%b %Y}"
+    return ReportWindow(first, last, label)
+
+
+def parse_window(spec: str, today: Optional[datetime] = None) -> ReportWindow:
+    """Parse a CLI / web window spec:
+
+    - "2024"               calendar year
+    - "last-18"            trailing 18 months, including the current one
+    - "2023-03:2024-02"    month range, inclusive
+    """
+    spec = (spec or "").strip().lower()
+    if spec.isdigit() and len(spec) == 4:
+        return calendar_year_window(int(spec))
+    if spec.startswith("last-") and spec[5:].isdigit() and int(spec[5:]) > 0:
+        return trailing_months_window(int(spec[5:]), today=today)
+    if ":" in spec:
+        start, end = spec.split(":", 1)
+        return date_range_window(
+            datetime.strptime(start.strip(), "%Y-%m"),
+            datetime.strptime(end.strip(), "%Y-%m"),
+        )
+    raise ValueError(f"unrecognized window {spec!r}; use YYYY, last-N or YYYY-MM:YYYY-MM")
+
+
+class MonthlyRollup:
+    """Per-month book, page and rating totals over a whole shelf, plus
+    prefix sums. Built once in O(books) from a BookStore's columns; every
+    window query after that is O(months in the window)."""
+
+    def __init__(self, books) -> None:
+        self.store = store = _as_store(books)
+        n = len(store)
+        self.first_month = store.month[0] if n else 0
+        span = (store.month[n - 1] - self.first_month + 1) if n else 0
+
+        np = _optional_numpy()
+        if np is not None:
+            k = np.asarray(store.month) - self.first_month
+            pages = np.asarray(store.pages)
+            rating = np.asarray(store.rating)
+
+            def count(rows, weights=None):
+                totals = np.bincount(k[rows], weights=None if weights is None else weights[rows],
+                                     minlength=span)
+                return totals.astype(np.int64).tolist()
+
+            everything = slice(None)
+            self.books = count(everything)
+            self.pages = count(everything, pages)
+            self.missing_pages = count(pages == 0)
+            self.rating_sum = count(everything, rating)
+            self.rating_count = count(rating > 0)
+        else:
+            self.books = [0] * span
+            self.pages = [0] * span
+            self.missing_pages = [0] * span
+            self.rating_sum = [0] * span
+            self.rating_count = [0] * span
+            for i in range(n):
+                k = store.month[i] - self.first_month
+                self.books[k] += 1
+                pages = store.pages[i]
+                if pages:
+                    self.pages[k] += pages
+                else:
+                    self.missing_pages[k] += 1
+                rating = store.rating[i]
+                if rating:
+                    self.rating_sum[k] += rating
+                    self.rating_count[k] += 1
+
+        self._prefix = {
+            name: self._prefix_sums(getattr(self, name))
+            for name in ("books", "pages", "missing_pages", "rating_sum", "rating_count")
+        }
+
+    @staticmethod
+    def _prefix_sums(values: list) -> list:
+        out = [0]
+        for v in values:
+            out.append(out[-1] + v)
+        return out
+
+    def _range(self, window: ReportWindow) -> tuple:
+        """Clamp a window to array offsets [lo, hi)."""
+        span = len(self.books)
+        lo = min(max(window.first_month - self.first_month, 0), span)
+        hi = min(max(window.last_month - self.first_month + 1, 0), span)
+        return lo, max(lo, hi)
+
+    def totals(self, window: ReportWindow) -> dict:
+        """Window totals from the prefix sums, in O(1)."""
+        lo, hi = self._range(window)
+        t = {name: p[hi] - p[lo] for name, p in self._prefix.items()}
+        t["average_rating"] = (
+            round(t["rating_sum"] / t["rating_count"], 2) if t["rating_count"] else None
+        )
+        return t
+
+    def _series(self, values: list, window: ReportWindow) -> list:
+        out = []
+        for m in range(window.first_month, window.last_month + 1):
+            i = m - self.first_month
+            label = _month_start(m).strftime("%b %Y")
+            out.append((label, values[i] if 0 <= i < len(values) else 0))
+        return out
+
+    def stats(
+        self,
+        window: ReportWindow,
+        today: Optional[datetime] = None,
+        first_name: Optional[str] = None,
+    ) -> Stats:
+        if today is None:
+            today = datetime.now().astimezone()
+        lo, hi = self._range(window)
+        # Store rows are time-sorted, so a month range is one row range and
+        # the books-count prefix sums are exactly the row offsets.
+        row_offsets = self._prefix["books"]
+        in_window = self.store.books(row_offsets[lo], row_offsets[hi])
+        totals = self.totals(window)
+
+        window_start = _month_start(window.first_month).astimezone()
+        month_after = _month_start(window.last_month + 1).astimezone()
+        window_end = min(month_after - timedelta(seconds=1), today)
+        return Stats(
+            today=today,
+            window_start=window_start,
+            window_end=window_end,
+            total_books=totals["books"],
+            total_pages=totals["pages"],
+            books_missing_pages=totals["missing_pages"],
+            books_per_month=self._series(self.books, window),
+            pages_per_month=self._series(self.pages, window),
+            book_titles=[(b.user_read_at, b.title, b.author) for b in reversed(in_window)],
+            books=in_window,
+            first_name=first_name,
+            average_rating=totals["average_rating"],
+            window_label=window.label,
+        )
+
+    def year_over_year(self, window: ReportWindow) -> dict:
+        """Totals for the window and the same window one year earlier, plus
+        the change in each."""
+        current = self.totals(window)
+        previous = self.totals(window.shifted(-12))
+        change = {
+            name: current[name] - previous[name]
+            for name in ("books", "pages")
+        }
+        if current["average_rating"] is not None and previous["average_rating"] is not None:
+            change["average_rating"] = round(
+                current["average_rating"] - previous["average_rating"], 2
+            )
+        return {"current": current, "previous": previous, "change": change}
+
+
 # -------- genres --------
 
-def lookup_genres(books: list, cache_path: Path, timeout: int = 10) -> dict:
+# Held while lookup_genres reads, updates and writes the cache, so a
+# background prefetch and a report in the same process never interleave.
+# Across processes, _save_cache's atomic replace keeps the file whole.
+_genre_cache_lock = threading.Lock()
+
+
+def lookup_genres(
+    books: list,
+    cache_path: Path,
+    timeout: int = 10,
+    offline_index: Optional[Path] = None,
+) -> dict:
     """Look up genre/category data for each book. Strategy:
 
+    0. If an Open Library index (see openlibrary_index.py) is given and
+       has subjects for the book that name a known genre, use them — no
+       network call at all. Purely topical subjects fall through.
     1. If the book has an ISBN, query Google Books by ISBN.
     2. If that returned nothing or only generic top-levels, try Google
        Books with a title+author query.
@@ -324,18 +830,62 @@ def lookup_genres(books: list, cache_path: Path, timeout: int = 10) -> dict:
     A cached entry that's empty or only-generic is treated as stale so a
     re-run benefits from the new fallback chain even if older Google-only
     cache data is on disk.
+
+    Results are normalized through the genre taxonomy as they enter the
+    cache (see _genre_entry); entries from older runs — bare category
+    lists, or an older taxonomy version — are upgraded on load.
+
+    The cache is keyed by work, not edition: a work index saved next to
+    the cache (work_index.v2.json) maps each book's ISBNs, Goodreads ID and
+    normalized title/author to one work key, so every edition of a book
+    shares one lookup. Returns {_book_key(book): entry} for the books
+    given.
     """
+    with _genre_cache_lock:
+        return _lookup_genres(books, cache_path, timeout, offline_index)
+
+
+def _lookup_genres(books: list, cache_path: Path, timeout: int, offline_index: Optional[Path]) -> dict:
     cache = _load_cache(cache_path)
+    for key, entry in cache.items():
+        if not isinstance(entry, dict):
+            cache[key] = _genre_entry(entry)
+        elif entry.get("taxonomy") != TAXONOMY_VERSION:
+            cache[key] = _genre_entry(entry.get("categories", []))
+    index_path = cache_path.with_name(WORK_INDEX_NAME)
+    works = WorkIndex(_load_cache(index_path))
+    local = _open_offline_index(offline_index) if offline_index else None
+
+    by_book: dict = {}
     seen = set()
     for b in books:
-        key = _book_key(b)
-        if not key or key in seen:
+        book_key = _book_key(b)
+        key = _work_key(b, works, cache)
+        if not key:
+            continue
+        by_book[book_key] = key
+        if key in seen:
             continue
         seen.add(key)
-        if key in cache and cache[key] and not _is_only_generic(cache[key]):
+        cached = cache.get(key)
+        if cached and cached["categories"] and not _is_only_generic(cached["categories"]):
             continue
         try:
-            cats: list = []
+            local_cats: list = []
+            if local:
+                try:
+                    local_cats = local.categories(b)
+                except sqlite3.Error as e:
+                    logging.warning("Open Library index unusable, using network lookups only: %s", e)
+                    local.close()
+                    local = None
+            if _taxonomy().known(local_cats):
+                cache[key] = _genre_entry(local_cats)
+                continue
+            # Topical subjects ("Wizards", "Orphans") aren't genres: go on to
+            # the network tiers, and only fall back to a generic-only local
+            # answer, which the next run retries.
+            cats = local_cats if _is_only_generic(local_cats) else []
             if b.isbn:
                 cats = _query_google_books_isbn(b.isbn, timeout=timeout)
             if (not cats) or _is_only_generic(cats):
@@ -350,12 +900,143 @@ def lookup_genres(books: list, cache_path: Path, timeout: int = 10) -> dict:
                 gr_cats = _query_goodreads_genres(b.goodreads_book_id, timeout=timeout)
                 if gr_cats:
                     cats = gr_cats
-            cache[key] = cats
+            cache[key] = _genre_entry(cats)
         except Exception as e:
             logging.warning("Genre lookup failed for %s: %s", key, e)
-            cache[key] = []
+            cache[key] = _genre_entry([])
+    if local:
+        local.close()
     _save_cache(cache_path, cache)
-    return cache
+    _save_cache(index_path, works.aliases)
+    return {book_key: cache[key] for book_key, key in by_book.items()}
+
+
+def _open_offline_index(path: Path):
+    """The Open Library index at path, or None (with a warning) when it's
+    missing or unreadable: it's an optional first tier, and the network
+    tiers still work without it."""
+    from openlibrary_index import OpenLibraryIndex
+
+    try:
+        return OpenLibraryIndex(path)
+    except sqlite3.Error as e:
+        logging.warning("Open Library index %s unusable, using network lookups only: %s", path, e)
+        return None
+
+
+# v2: title aliases keep subtitles and no longer join works that carry
+# their own IDs. A fresh file drops works the old rules merged by mistake.
+WORK_INDEX_VERSION = 2
+WORK_INDEX_NAME = f"work_index.v{WORK_INDEX_VERSION}.json"
+GENRE_CACHE_NAME = "genres_cache.json"
+
+# Background prefetch: books read in roughly the last 13 months cover the
+# default window and the current calendar year. They're looked up a few at
+# a time with a pause in between, so a report generated meanwhile waits for
+# one small batch at most.
+PREFETCH_MONTHS = 13
+PREFETCH_BATCH = 4
+PREFETCH_PAUSE_SEC = 1.0
+
+
+def genres_missing(books: list, cache_path: Path) -> list:
+    """The books that lookup_genres would still query: no cache entry for
+    their work, or only an empty or generic one."""
+    with _genre_cache_lock:
+        cache = _load_cache(cache_path)
+        works = WorkIndex(_load_cache(cache_path.with_name(WORK_INDEX_NAME)))
+    missing = []
+    seen = set()
+    for b in books:
+        key = _work_key(b, works, cache)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        entry = cache.get(key)
+        cats = entry.get("categories") if isinstance(entry, dict) else entry
+        if not cats or _is_only_generic(cats):
+            missing.append(b)
+    return missing
+
+
+def prefetch_genres(
+    books: list,
+    cache_path: Path,
+    offline_index: Optional[Path] = None,
+    since: Optional[datetime] = None,
+) -> int:
+    """Warm the genre cache for books read since `since` (default: the
+    last PREFETCH_MONTHS months), newest first, so the next report finds
+    their genres cached. Returns how many books were looked up."""
+    cache_path = Path(cache_path)
+    since = since or datetime.now().astimezone() - timedelta(days=31 * PREFETCH_MONTHS)
+    recent = sorted(
+        (b for b in books if b.user_read_at >= since), key=lambda b: b.user_read_at, reverse=True
+    )
+    missing = genres_missing(recent, cache_path)
+    if missing:
+        logging.info("Prefetching genres for %d book(s)", len(missing))
+    for i in range(0, len(missing), PREFETCH_BATCH):
+        if i:
+            time.sleep(PREFETCH_PAUSE_SEC)
+        lookup_genres(missing[i:i + PREFETCH_BATCH], cache_path, offline_index=offline_index)
+    return len(missing)
+
+
+def prefetch_in_background(books, cache_path: Path, offline_index: Optional[Path] = None) -> threading.Thread:
+    """Run prefetch_genres on a daemon thread. books may be a list or a
+    callable returning one (e.g. a feed fetch), so slow loading also stays
+    off the caller's thread. Failures are logged, never raised."""
+    def run() -> None:
+        try:
+            prefetch_genres(books() if callable(books) else books, cache_path, offline_index)
+        except Exception as e:
+            logging.warning("Genre prefetch failed: %s", e)
+
+    thread = threading.Thread(target=run, name="genre-prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
+def _work_key(book, works: WorkIndex, cache: dict) -> str:
+    """Resolve book to its work key, folding into the work's cache entry
+    anything stored under a merged work key or under the per-edition key
+    older runs used."""
+    key, absorbed = works.resolve(book)
+    if not key:
+        return ""
+    for old in absorbed + [_book_key(book)]:
+        if old == key or old not in cache:
+            continue
+        entry = cache.pop(old)
+        current = cache.get(key)
+        if not current or (entry["genres"] and not current["genres"]):
+            cache[key] = entry
+    return key
+
+
+_TAXONOMY: Optional[GenreTaxonomy] = None
+
+
+def _taxonomy() -> GenreTaxonomy:
+    """The compiled genre taxonomy, built once per process."""
+    global _TAXONOMY
+    if _TAXONOMY is None:
+        _TAXONOMY = GenreTaxonomy(
+            generic_top_levels=GENERIC_TOP_LEVELS, stopwords=GENRE_STOPWORDS,
+        )
+    return _TAXONOMY
+
+
+def _genre_entry(cats: list) -> dict:
+    """Cache entry for one book: the raw categories (kept so the
+    only-generic staleness check and future taxonomy versions can re-run)
+    plus their canonical genre IDs."""
+    cats = list(cats or [])
+    entry = _taxonomy().canonicalize(cats)
+    entry["categories"] = cats
+    entry["taxonomy"] = TAXONOMY_VERSION
+    return entry
 
 
 def _is_only_generic(cats: list) -> bool:
@@ -365,7 +1046,7 @@ def _is_only_generic(cats: list) -> bool:
     if not cats:
         return False
     for cat in cats:
-        parts = [p.strip() for p in cat.split(" / ") if p.strip()]
+        parts = _category_parts(cat)
         if len(parts) >= 2:
             return False
         if parts and parts[0] not in GENERIC_TOP_LEVELS:
@@ -384,7 +1065,7 @@ def _book_key(book) -> str:
 
 
 def _query_google_books_isbn(isbn: str, timeout: int = 10) -> list:
-    response = requests.get(
+    response = _http_get(
         GOOGLE_BOOKS_URL,
         params={"q": f"isbn:{isbn}"},
         headers={"User-Agent": USER_AGENT},
@@ -401,7 +1082,7 @@ def _query_google_books_title_author(title: str, author: str, timeout: int = 10)
         parts.append(f'inauthor:"{author.strip()}"')
     if not parts:
         return []
-    response = requests.get(
+    response = _http_get(
         GOOGLE_BOOKS_URL,
         params={"q": "+".join(parts), "maxResults": 1},
         headers={"User-Agent": USER_AGENT},
@@ -427,10 +1108,9 @@ _GR_REQUEST_DELAY_SEC = 0.4
 _GR_LAST_REQUEST_AT = 0.0
 
 
-def _query_goodreads_genres(book_id: str, timeout: int = 15) -> list:
-    """Scrape the Goodreads book page for crowd-sourced genre tags. Returns
-    a list of genre name strings (e.g., ["Fantasy", "Epic Fantasy"]) or an
-    empty list if the page can't be parsed."""
+def _goodreads_rate_gate() -> None:
+    """Sleep as needed so consecutive Goodreads requests are at least
+    _GR_REQUEST_DELAY_SEC apart."""
     import time as _time
 
     global _GR_LAST_REQUEST_AT
@@ -439,8 +1119,15 @@ def _query_goodreads_genres(book_id: str, timeout: int = 15) -> list:
         _time.sleep(_GR_REQUEST_DELAY_SEC - delta)
     _GR_LAST_REQUEST_AT = _time.time()
 
+
+def _query_goodreads_genres(book_id: str, timeout: int = 15) -> list:
+    """Scrape the Goodreads book page for crowd-sourced genre tags. Returns
+    a list of genre name strings (e.g., ["Fantasy", "Epic Fantasy"]) or an
+    empty list if the page can't be parsed."""
+    _goodreads_rate_gate()
+
     url = f"https://www.goodreads.com/book/show/{book_id}"
-    response = requests.get(
+    response = _http_get(
         url,
         headers={"User-Agent": USER_AGENT},
         timeout=timeout,
@@ -451,14 +1138,23 @@ def _query_goodreads_genres(book_id: str, timeout: int = 15) -> list:
     return _extract_goodreads_genres(response.text)
 
 
+# Goodreads book pages run to 500KB+; the genre extractor scans the raw text
+# for just the two things it needs instead of building a DOM.
+_GENRE_ANCHOR_RE = re.compile(
+    r"""<a\s[^>]*?\bhref\s*=\s*(["'])/genres/[^>]*>(.*?)</a\s*>""", re.I | re.S
+)
+_TAG_RE = re.compile(r"<[^>]*>")
+_NEXT_DATA_RE = re.compile(r"""<script[^>]*\bid\s*=\s*(["'])__NEXT_DATA__\1[^>]*>""", re.I)
+
+
 def _extract_goodreads_genres(html: str) -> list:
     """Two-pattern extractor for Goodreads' genre tags. Tries the classic
-    HTML pattern first, then walks the React __NEXT_DATA__ JSON blob for
-    Genre objects. Returns deduped names in insertion order."""
-    import re as _re
-
-    soup = BeautifulSoup(html, "html.parser")
+    HTML pattern first, then the Genre objects in the React __NEXT_DATA__
+    JSON blob. Returns deduped names in insertion order.
 
+    Both patterns are located with precompiled regexes over the page text,
+    so no DOM is built; the JSON blob is only parsed when it mentions a
+    Genre at all, and then only Genre objects are looked at."""
     found: list = []
     seen: set = set()
 
@@ -471,8 +1167,8 @@ def _extract_goodreads_genres(html: str) -> list:
 
     # Pattern 1: anchor links to /genres/* — works on classic and many
     # current Goodreads pages.
-    for a in soup.find_all("a", href=_re.compile(r"^/genres/")):
-        text = a.get_text(strip=True)
+    for m in _GENRE_ANCHOR_RE.finditer(html):
+        text = unescape(_TAG_RE.sub("", m.group(2))).strip()
         if text and len(text) <= 40:
             add(text)
 
@@ -481,24 +1177,21 @@ def _extract_goodreads_genres(html: str) -> list:
 
     # Pattern 2: React __NEXT_DATA__ JSON blob. Genre objects look like
     # {"__typename": "Genre", "name": "Fantasy", ...} nested in the apollo
-    # cache. Walk the whole blob and harvest names.
-    next_script = soup.find("script", id="__NEXT_DATA__")
-    if next_script and next_script.string:
-        try:
-            blob = json.loads(next_script.string)
-        except json.JSONDecodeError:
-            blob = None
-        if blob is not None:
-            def visit(obj):
-                if isinstance(obj, dict):
-                    if obj.get("__typename") == "Genre" and obj.get("name"):
-                        add(obj["name"])
-                    for v in obj.values():
-                        visit(v)
-                elif isinstance(obj, list):
-                    for v in obj:
-                        visit(v)
-            visit(blob)
+    # cache. json's object_hook sees every object once, in document order,
+    # without a second recursive walk.
+    m = _NEXT_DATA_RE.search(html)
+    if m:
+        end = html.find("</script>", m.end())
+        blob = html[m.end():end if end != -1 else len(html)]
+        if '"Genre"' in blob:
+            def on_object(obj: dict) -> dict:
+                if obj.get("__typename") == "Genre" and obj.get("name"):
+                    add(obj["name"])
+                return obj
+            try:
+                json.loads(blob, object_hook=on_object)
+            except json.JSONDecodeError:
+                pass
 
     return found[:15]
 
@@ -513,8 +1206,13 @@ def _load_cache(path: Path) -> dict:
 
 
 def _save_cache(path: Path, cache: dict) -> None:
+    # Write-then-rename: other processes (the web UI, the sync worker,
+    # watch.py) may read the cache at any moment and must never see half a
+    # file, which _load_cache would take for an empty cache.
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(cache, indent=2, sort_keys=True), encoding="utf-8")
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(cache, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
 
 
 def aggregate_genres(books: list, genres_by_key: dict) -> tuple:
@@ -522,63 +1220,221 @@ def aggregate_genres(books: list, genres_by_key: dict) -> tuple:
 
     Bucketing rules:
     - Per book, walk its category list in order. Take the first 3 distinct
-      genre tags (after filtering format/age/shelf-management stop-words
-      and generic top-levels like "Fiction" alone). This stops Goodreads'
-      noisier 10-15-tag results from inflating an "Other" bar.
+      canonical genres (after filtering format/age/shelf-management
+      stop-words and generic top-levels like "Fiction" alone). This stops
+      Goodreads' noisier 10-15-tag results from inflating an "Other" bar.
+      The mapping to canonical genres lives in genre_taxonomy and is
+      already applied to genre cache entries.
     - Each kept tag contributes 1 to that bucket's count.
     - Show the top 10 buckets, sorted by count (ties alphabetical). No
       "Other" rollup — readers care about what they read, not the long
       tail.
-    - If the strict pass returns nothing, retry once allowing generic
-      top-levels so a book tagged only "Fiction" still appears.
+    - If the strict pass returns nothing, fall back to the counts that
+      allow generic top-levels so a book tagged only "Fiction" still
+      appears. Both tallies are kept in the same pass over the books.
     """
-    counter, uncategorized = _bucket_genres(books, genres_by_key, allow_generic=False)
-    if not counter:
-        counter, uncategorized = _bucket_genres(books, genres_by_key, allow_generic=True)
+    tally = _GenreTally()
+    for b in books:
+        tally.add(genres_by_key.get(_book_key(b), []))
+    return tally.result()
+
+
+class _GenreTally:
+    """Strict and generic-allowed genre counts accumulated side by side, so
+    the aggregate_genres fallback never needs a second pass. Counts are
+    keyed by canonical genre ID and only mapped to labels in result()."""
+
+    def __init__(self) -> None:
+        self.strict: dict = {}
+        self.generic: dict = {}
+        self.strict_uncategorized = 0
+        self.generic_uncategorized = 0
+        self.labels: dict = {}
+
+    def add(self, entry) -> None:
+        """Count one book from its genre cache entry (a bare category list
+        is canonicalized on the spot)."""
+        if not isinstance(entry, dict):
+            entry = _genre_entry(entry)
+        strict = entry.get("genres", [])
+        generic = entry.get("generic", [])
+        self.labels.update(entry.get("labels", {}))
+        if not strict:
+            self.strict_uncategorized += 1
+        if not generic:
+            self.generic_uncategorized += 1
+        for bucket in strict:
+            self.strict[bucket] = self.strict.get(bucket, 0) + 1
+        for bucket in generic:
+            self.generic[bucket] = self.generic.get(bucket, 0) + 1
+
+    def counts(self) -> tuple:
+        """(counter, uncategorized) after the strict -> generic fallback,
+        with the counter keyed by display label."""
+        if self.strict:
+            counter, uncategorized = self.strict, self.strict_uncategorized
+        else:
+            counter, uncategorized = self.generic, self.generic_uncategorized
+        label = self.labels.get
+        taxonomy = _taxonomy()
+        return (
+            {label(gid) or taxonomy.label(gid): n for gid, n in counter.items()},
+            uncategorized,
+        )
 
-    if not counter:
-        return ([], uncategorized)
+    def result(self, limit: int = 8) -> tuple:
+        counter, uncategorized = self.counts()
+        if not counter:
+            return ([], uncategorized)
+        items = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
+        return (items[:limit], uncategorized)
+
+
+# Split BISAC-style "A / B / C" categories once per distinct string: the
+# same few hundred strings recur across every book and every run.
+_CATEGORY_PARTS: dict = {}
+
+
+def _category_parts(cat: str) -> tuple:
+    parts = _CATEGORY_PARTS.get(cat)
+    if parts is None:
+        parts = _CATEGORY_PARTS[cat] = tuple(p.strip() for p in cat.split(" / ") if p.strip())
+    return parts
+
+
+# -------- multi-year --------
+#
+# One comparison page across several years. Each year's aggregates come out
+# of a single pass over the books; years that have ended are cached on disk
+# for good (their books don't change), so later runs only recompute the
+# current year.
+
+YEARLY_CACHE_NAME = "yearly_aggregates.json"
+
+
+def aggregate_years(books: list, genres_by_key: dict, years: list) -> dict:
+    """Return {year: aggregate} for the requested years in one pass over
+    books. Each aggregate is a JSON-ready dict: books, pages,
+    books_missing_pages, books_per_month (12 counts), top_genres and
+    top_authors as [label, count] lists, and the longest book."""
+    wanted = set(years)
+    acc = {
+        y: {
+            "books": 0, "pages": 0, "missing": 0, "with_pages": 0,
+            "months": [0] * 12, "genres": _GenreTally(), "authors": {},
+            "longest": None,
+        }
+        for y in wanted
+    }
+    for b in books:
+        a = acc.get(b.user_read_at.year)
+        if a is None:
+            continue
+        a["books"] += 1
+        a["months"][b.user_read_at.month - 1] += 1
+        if b.num_pages:
+            a["pages"] += b.num_pages
+            a["with_pages"] += 1
+            if a["longest"] is None or b.num_pages > a["longest"][1]:
+                a["longest"] = (b.title, b.num_pages)
+        else:
+            a["missing"] += 1
+        if b.author:
+            a["authors"][b.author] = a["authors"].get(b.author, 0) + 1
+        a["genres"].add(genres_by_key.get(_book_key(b), []))
 
-    items = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0]))
-    return (items[:8], uncategorized)
+    out: dict = {}
+    for y, a in acc.items():
+        out[y] = {
+            "year": y,
+            "books": a["books"],
+            "pages": a["pages"],
+            "books_missing_pages": a["missing"],
+            "avg_pages": a["pages"] // a["with_pages"] if a["with_pages"] else None,
+            "books_per_month": a["months"],
+            "top_genres": [list(kv) for kv in a["genres"].result(limit=5)[0]],
+            "top_authors": [
+                list(kv)
+                for kv in sorted(a["authors"].items(), key=lambda kv: (-kv[1], kv[0]))[:3]
+                if kv[1] >= 2
+            ],
+            "longest": (
+                {"title": _split_title_series(a["longest"][0])[0], "pages": a["longest"][1]}
+                if a["longest"] else None
+            ),
+        }
+    return out
 
 
-def _bucket_genres(
-    books: list,
-    genres_by_key: dict,
-    *,
-    allow_generic: bool,
-    max_per_book: int = 3,
-) -> tuple:
-    counter: dict = {}
-    uncategorized = 0
-    for b in books:
-        cats = genres_by_key.get(_book_key(b), [])
-        book_buckets: list = []
-        for cat in cats:
-            parts = [p.strip() for p in cat.split(" / ") if p.strip()]
-            if len(parts) >= 2:
-                bucket = parts[1]
-            elif parts:
-                if allow_generic or parts[0] not in GENERIC_TOP_LEVELS:
-                    bucket = parts[0]
-                else:
-                    continue
-            else:
-                continue
-            if bucket.lower() in GENRE_STOPWORDS:
-                continue
-            if bucket in book_buckets:
-                continue
-            book_buckets.append(bucket)
-            if len(book_buckets) >= max_per_book:
-                break
-        if not book_buckets:
-            uncategorized += 1
-            continue
-        for bucket in book_buckets:
-            counter[bucket] = counter.get(bucket, 0) + 1
-    return counter, uncategorized
+def generate_multi_year(
+    user_id: Optional[str],
+    output_dir: Path,
+    years: int = 10,
+    today: Optional[datetime] = None,
+    source_csv: Optional[Path] = None,
+    refresh: bool = False,
+    offline_index: Optional[Path] = None,
+) -> dict:
+    """Render a side-by-side comparison of the last `years` calendar years
+    (including the current one). Closed years are served from the on-disk
+    yearly cache; only the current year, years missing from the cache, or
+    everything when refresh is set, are recomputed — and only those years'
+    books go through genre lookup."""
+    if today is None:
+        today = datetime.now().astimezone()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if source_csv:
+        store = BookStore.from_chunks(iter_goodreads_export(Path(source_csv)))
+        source_key = f"csv:{Path(source_csv).resolve()}"
+    else:
+        store = BookStore.from_chunks(page for _, page in iter_read_shelf(user_id))
+        source_key = f"user:{user_id}"
+    first_name = None
+
+    year_list = list(range(today.year - years + 1, today.year + 1))
+    cache_path = output_dir / YEARLY_CACHE_NAME
+    cache = _load_cache(cache_path)
+    # A closed year's genre mix depends on the taxonomy and on how books map
+    # to works; entries built under other versions are recomputed.
+    versions = {"taxonomy": TAXONOMY_VERSION, "work_index": WORK_INDEX_VERSION}
+    valid = {year: a for year, a in cache.get(source_key, {}).items() if a.get("versions") == versions}
+    cached = {} if refresh else valid
+    stale = [y for y in year_list if y == today.year or str(y) not in cached]
+
+    fresh: dict = {}
+    if stale:
+        stale_set = set(stale)
+        stale_books = [store.book(i) for i, month in enumerate(store.month) if month // 12 in stale_set]
+        genres = lookup_genres(
+            stale_books, output_dir / GENRE_CACHE_NAME, offline_index=offline_index,
+        ) if stale_books else {}
+        fresh = aggregate_years(stale_books, genres, stale)
+        logging.info("Recomputed %d of %d year(s)", len(stale), len(year_list))
+
+    per_year = [fresh[y] if y in fresh else cached[str(y)] for y in year_list]
+
+    closed = {str(a["year"]): dict(a, versions=versions) for a in per_year if a["year"] < today.year}
+    cache[source_key] = {**valid, **closed}
+    _save_cache(cache_path, cache)
+
+    html_path = output_dir / "years_compared.html"
+    render_multi_year_report(per_year, first_name, html_path)
+    precompress(html_path)
+    paths = {"html": html_path}
+    try:
+        paths["pdf"] = render_html_pdf(html_path, output_dir / "years_compared.pdf")
+    except Exception as e:
+        logging.exception("Playwright render failed: %s", e)
+
+    return {
+        "years": [
+            {k: a[k] for k in ("year", "books", "pages")} for a in per_year
+        ],
+        "recomputed": stale,
+        "outputs": {name: str(p) for name, p in paths.items()},
+    }
 
 
 # -------- HTML report --------
@@ -599,6 +1455,14 @@ def _split_title_series(title: str) -> tuple:
     return (title, None)
 
 
+def _truncate_label(text: str, max_len: int) -> str:
+    """Shorten text to max_len characters, ending with an ellipsis when cut."""
+    text = text or ""
+    if len(text) <= max_len:
+        return text
+    return text[: max_len - 1].rstrip() + "…"
+
+
 def _gridline_levels(max_books: int) -> list:
     """Return a list of (value, percent_from_bottom, label) tuples for the
     chart's dotted gridlines. Positions match the actual bar-stack geometry
@@ -634,23 +1498,80 @@ def _gridline_levels(max_books: int) -> list:
     return levels
 
 
-def render_html_report(stats: Stats, genre_data, output_path: Path) -> Path:
-    """Render the full year-in-books as standalone HTML/CSS using Jinja2.
-    Templated against year_in_books_report.html — editorial typographic
-    design with Fraunces serif + Inter sans, warm cream palette, terracotta
-    accent. Independent of the matplotlib pipeline."""
+def _template_env():
     from jinja2 import Environment, FileSystemLoader, select_autoescape
 
     templates_dir = Path(__file__).resolve().parent / "templates"
-    env = Environment(
+    return Environment(
         loader=FileSystemLoader(str(templates_dir)),
         autoescape=select_autoescape(["html"]),
     )
-    template = env.get_template("year_in_books_report.html")
 
-    # ----- Stats strip (four highlights) -----
+
+def render_multi_year_report(per_year: list, first_name: Optional[str], output_path: Path) -> Path:
+    """Render the multi-year comparison page: a totals table plus a small-
+    multiples grid of per-year monthly charts sharing one vertical scale,
+    so years can be compared at a glance."""
+    template = _template_env().get_template("multi_year_report.html")
+    month_max = max((c for a in per_year for c in a["books_per_month"]), default=0)
+    books_max = max((a["books"] for a in per_year), default=0)
+    month_initials = [datetime(2000, m, 1).strftime("%b")[0] for m in range(1, 13)]
+    html = template.render(
+        first_name=first_name,
+        years=per_year,
+        first_year=per_year[0]["year"] if per_year else "",
+        last_year=per_year[-1]["year"] if per_year else "",
+        month_max=month_max or 1,
+        books_max=books_max or 1,
+        month_initials=month_initials,
+        generated_str=datetime.now().astimezone().strftime("%d %B %Y"),
+    )
+    output_path = Path(output_path)
+    output_path.write_text(html, encoding="utf-8")
+    return output_path
+
+
+def build_report_model(stats: Stats, genres_by_key: dict) -> dict:
+    """Compute every value the year-in-books template needs in one pass
+    over stats.books (newest first): author counts, longest book, page
+    coverage, both genre tallies and the grouped book list. Month buckets
+    come pre-aggregated on stats. The returned dict is the template's whole
+    context; render_html_report does no computation of its own."""
+    by_author: dict = {}
+    longest = None
+    with_pages = 0
+    genres = _GenreTally()
+    groups: list = []
+    cur_label = None
+    cur_list: list = []
+    num = stats.total_books
+
+    for b in sorted(stats.books, key=lambda b: b.user_read_at, reverse=True):
+        if b.author:
+            by_author[b.author] = by_author.get(b.author, 0) + 1
+        if b.num_pages:
+            with_pages += 1
+            # >= keeps the earliest-read book on ties (we walk newest first)
+            if longest is None or b.num_pages >= longest.num_pages:
+                longest = b
+        genres.add(genres_by_key.get(_book_key(b), []))
+
+        label = b.user_read_at.strftime("%B %Y")
+        if label != cur_label:
+            if cur_list:
+                groups.append((cur_label, cur_list))
+            cur_label = label
+            cur_list = []
+        main_title, series = _split_title_series(b.title)
+        cur_list.append((num, main_title, series, b.author))
+        num -= 1
+    if cur_list:
+        groups.append((cur_label, cur_list))
+
+    highlights: dict = {}
     stats_strip: list = []
-    # Peak month
+
+    # ----- Peak month -----
     peak_count = 0
     peak_month_short = ""
     if stats.books_per_month:
@@ -660,6 +1581,8 @@ def render_html_report(stats: Stats, genre_data, output_path: Path) -> Path:
             month_name = parts[0]
             year_short = parts[1][-2:] if len(parts) == 2 else ""
             peak_month_short = f"{month_name} '{year_short}" if year_short else month_name
+            plural = "books" if peak_count != 1 else "book"
+            highlights["peak_month"] = ("Peak month", month_name, f"{peak_count} {plural}")
             stats_strip.append({
                 "label": "Peak Month",
                 "primary": month_name,
@@ -668,7 +1591,7 @@ def render_html_report(stats: Stats, genre_data, output_path: Path) -> Path:
                 "numeric": True,
             })
 
-    # Books read
+    # ----- Books read -----
     if stats.total_books:
         stats_strip.append({
             "label": "Books Read",
@@ -678,10 +1601,25 @@ def render_html_report(stats: Stats, genre_data, output_path: Path) -> Path:
             "numeric": True,
         })
 
-    # Longest read
-    with_pages = [b for b in stats.books if b.num_pages]
-    if with_pages:
-        longest = max(with_pages, key=lambda b: b.num_pages)
+    # ----- Most-read author -----
+    if by_author:
+        top_author, count = max(by_author.items(), key=lambda kv: (kv[1], -len(kv[0])))
+        if count >= 2:
+            highlights["top_author"] = (
+                "Most-read author",
+                _truncate_label(top_author, 18),
+                f"{count} books",
+            )
+
+    # ----- Longest read + average length -----
+    if longest is not None:
+        avg = stats.total_pages // max(1, with_pages)
+        highlights["longest"] = (
+            "Longest book",
+            _truncate_label(longest.title, 18),
+            f"{longest.num_pages:,} pages",
+        )
+        highlights["avg_pages"] = ("Average length", f"{avg:,}", "pages per book")
         long_title, _ = _split_title_series(longest.title)
         stats_strip.append({
             "label": "Longest Read",
@@ -690,13 +1628,11 @@ def render_html_report(stats: Stats, genre_data, output_path: Path) -> Path:
             "detail": f"{longest.num_pages:,} pages &middot; {longest.author}",
             "numeric": False,
         })
-        # Average length
-        avg = stats.total_pages // max(1, len(with_pages))
         stats_strip.append({
             "label": "Average Length",
             "primary": f"{avg:,}",
             "primary_small": "pp.",
-            "detail": f"per book, across {len(with_pages)} finished",
+            "detail": f"per book, across {with_pages} finished",
             "numeric": True,
         })
 
@@ -705,20 +1641,16 @@ def render_html_report(stats: Stats, genre_data, output_path: Path) -> Path:
     months_data = []
     for label, count in stats.books_per_month:
         parts = label.split()
-        short_name = parts[0] if parts else label
-        year_short = parts[1][-2:] if len(parts) == 2 else ""
         months_data.append({
             "label": label,
-            "short_name": short_name,
-            "year_short": year_short,
+            "short_name": parts[0] if parts else label,
+            "year_short": parts[1][-2:] if len(parts) == 2 else "",
             "count": count,
             "peak": count > 0 and count == max_books,
         })
 
-    gridlines = _gridline_levels(max_books)
-
     # ----- Genres -----
-    genre_items = genre_data[0] if genre_data else []
+    genre_items, uncategorized = genres.result()
     genre_max = max((v for _, v in genre_items), default=1)
     # Editorial aside: derive a short headline from the data
     genre_aside = None
@@ -729,150 +1661,254 @@ def render_html_report(stats: Stats, genre_data, output_path: Path) -> Path:
         elif len(genre_items) >= 5:
             genre_aside = "a wide-ranging year"
 
-    # ----- Book list groups -----
-    groups: list = []
-    cur_label = None
-    cur_list: list = []
-    num = stats.total_books
-    for date, title, author in stats.book_titles:
-        label = date.strftime("%B %Y")
-        if label != cur_label:
-            if cur_list:
-                groups.append((cur_label, cur_list))
-            cur_label = label
-            cur_list = []
-        main_title, series = _split_title_series(title)
-        cur_list.append((num, main_title, series, author))
-        num -= 1
-    if cur_list:
-        groups.append((cur_label, cur_list))
+    return {
+        "stats": stats,
+        "first_name": stats.first_name,
+        "window_start_str": stats.window_start.strftime("%B %Y"),
+        "window_end_str": stats.window_end.strftime("%B %Y"),
+        "highlights": highlights,
+        "stats_strip": stats_strip,
+        "peak_count": peak_count,
+        "peak_month_short": peak_month_short,
+        "months": months_data,
+        "gridlines": _gridline_levels(max_books),
+        "genre_items": genre_items,
+        "genre_max": genre_max,
+        "genre_aside": genre_aside,
+        "genre_uncategorized": uncategorized,
+        "groups": groups,
+        "generated_str": datetime.now().astimezone().strftime("%d %B %Y"),
+    }
 
-    # ----- Render -----
-    today = datetime.now().astimezone()
-    html = template.render(
-        stats=stats,
-        first_name=stats.first_name,
-        window_start_str=stats.window_start.strftime("%B %Y"),
-        window_end_str=stats.window_end.strftime("%B %Y"),
-        stats_strip=stats_strip,
-        peak_count=peak_count,
-        peak_month_short=peak_month_short,
-        months=months_data,
-        gridlines=gridlines,
-        genre_items=genre_items,
-        genre_max=genre_max,
-        genre_aside=genre_aside,
-        groups=groups,
-        generated_str=today.strftime("%d %B %Y"),
-    )
+
+def render_html_report(model: dict, output_path: Path) -> Path:
+    """Render the full year-in-books as standalone HTML/CSS using Jinja2.
+    Templated against year_in_books_report.html — editorial typographic
+    design with Fraunces serif + Inter sans, warm cream palette, terracotta
+    accent. The template consumes only the view model from
+    build_report_model."""
+    template = _template_env().get_template("year_in_books_report.html")
+    html = template.render(**model)
     output_path = Path(output_path)
     output_path.write_text(html, encoding="utf-8")
     return output_path
 
 
+def precompress(path: Path) -> list:
+    """Write gzip (and, when the optional brotli package is installed,
+    brotli) copies of a text output next to it — name.gz / name.br — so the
+    web UI can serve them without compressing per request. Returns the
+    paths written."""
+    path = Path(path)
+    data = path.read_bytes()
+    written = []
+    gz_path = path.with_name(path.name + ".gz")
+    gz_path.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(gz_path)
+    try:
+        import brotli
+    except ImportError:
+        return written
+    br_path = path.with_name(path.name + ".br")
+    br_path.write_bytes(brotli.compress(data, mode=brotli.MODE_TEXT, quality=11))
+    written.append(br_path)
+    return written
+
+
 # -------- end-to-end --------
 
-def generate(user_id: str, output_dir: Path, today: Optional[datetime] = None) -> dict:
+def generate(
+    user_id: Optional[str],
+    output_dir: Path,
+    today: Optional[datetime] = None,
+    source_csv: Optional[Path] = None,
+    window: Optional[ReportWindow] = None,
+    offline_index: Optional[Path] = None,
+    lazy_outputs: bool = False,
+    image_widths: tuple = (),
+    svg_only: bool = False,
+    shelf: Optional[tuple] = None,
+) -> dict:
+    """Run the whole pipeline. Books come from the read-shelf RSS for
+    user_id, or from a Goodreads library export CSV when source_csv is
+    given, or are passed in already fetched as shelf=(books, first_name).
+    Without a window the report covers the rolling last 12 months;
+    with one, it covers that month-aligned period. offline_index is an
+    optional Open Library genre index tried before any network lookup.
+
+    With lazy_outputs, only the HTML is written: the PDF/PNG paths are
+    still returned, but any previous files there are removed and it's up
+    to the caller to render each one on first use (render_html_outputs
+    with formats=[...]). Otherwise the PNGs go through image_variants
+    (lossless recompression plus WebP/AVIF copies, and narrower copies
+    for each of image_widths) and the result reports the bytes saved.
+
+    The monthly chart, genre chart and social card are also always written
+    as SVG (svg_report) — no browser needed. svg_only stops there and skips
+    Chromium entirely."""
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-    cache_path = output_dir / "genres_cache.json"
+    cache_path = output_dir / GENRE_CACHE_NAME
+
+    if shelf is not None:
+        books, first_name = shelf
+        store = BookStore(books)
+    elif source_csv:
+        # The export can be a whole reading history: stream it into the
+        # store's columns rather than loading it as Book objects first.
+        store, first_name = BookStore.from_chunks(iter_goodreads_export(Path(source_csv))), None
+    else:
+        books, first_name = fetch_read_shelf(user_id)
+        store = BookStore(books)
+        del books  # the store holds everything the report needs
 
-    books, first_name = fetch_read_shelf(user_id)
-    stats = aggregate_last_12_months(books, today=today, first_name=first_name)
+    year_over_year = None
+    if window is None:
+        stats = aggregate_last_12_months(store, today=today, first_name=first_name)
+    else:
+        rollup = MonthlyRollup(store)
+        stats = rollup.stats(window, today=today, first_name=first_name)
+        year_over_year = rollup.year_over_year(window)
 
     if stats.total_books == 0:
-        genre_data = ([], 0)
+        genres_by_key = {}
     else:
-        genres_by_isbn = lookup_genres(stats.books, cache_path)
-        genre_data = aggregate_genres(stats.books, genres_by_isbn)
+        genres_by_key = lookup_genres(stats.books, cache_path, offline_index=offline_index)
+    model = build_report_model(stats, genres_by_key)
 
     # HTML is the single source of truth for design. PDF and PNGs are
     # rendered FROM the HTML via headless Chromium (Playwright).
     html_path = output_dir / "year_in_books.html"
-    render_html_report(stats, genre_data, html_path)
+    render_html_report(model, html_path)
     paths = {"html": html_path}
-    try:
-        paths.update(render_html_outputs(html_path, output_dir))
-    except Exception as e:
-        logging.exception("Playwright render failed: %s", e)
+    paths.update(svg_report.render_svg_outputs(model, output_dir))
+    for name in ("html", *svg_report.SVG_FILES):
+        precompress(paths[name])
+    if svg_only:
+        pass
+    elif lazy_outputs:
+        for name, filename in OUTPUT_FILES.items():
+            paths[name] = output_dir / filename
+            paths[name].unlink(missing_ok=True)
+            image_variants.remove_variants(paths[name])
+    else:
+        try:
+            paths.update(render_html_outputs(html_path, output_dir))
+        except Exception as e:
+            logging.exception("Playwright render failed: %s", e)
+    pngs = [p for name, p in paths.items() if name in ("web", "social") and p.exists()]
+    image_reports = image_variants.optimize_images(pngs, widths=image_widths)
 
-    return {
+    result = {
+        "window": stats.window_label,
         "total_books": stats.total_books,
         "total_pages": stats.total_pages,
         "books_missing_pages": stats.books_missing_pages,
         "outputs": {name: str(p) for name, p in paths.items()},
     }
+    if year_over_year is not None:
+        result["year_over_year"] = year_over_year
+    if image_reports:
+        result["images"] = image_variants.savings(image_reports)
+    return result
+
 
+# Chromium-rendered outputs of the Year in Books report, by format.
+OUTPUT_FILES = {
+    "pdf": "year_in_books.pdf",
+    "web": "year_in_books_web.png",
+    "social": "year_in_books_social.png",
+}
 
-def render_html_outputs(html_path: Path, output_dir: Path) -> dict:
+
+def render_html_outputs(html_path: Path, output_dir: Path, formats=None) -> dict:
     """Render the HTML report to PDF, web PNG, and 9:16 social card PNG
     via headless Chromium (Playwright). Single browser launch shared
     across the renders for speed. Returns a dict of {format: path} with
-    keys: pdf, web, social."""
+    keys: pdf, web, social — or only the ones named in formats."""
     from playwright.sync_api import sync_playwright
 
-    html_path = Path(html_path).resolve()
-    html_url = html_path.as_uri()
+    html_url = Path(html_path).resolve().as_uri()
+    renderers = {"pdf": _render_pdf, "web": _render_web_png, "social": _render_social_png}
     out: dict = {}
 
     with sync_playwright() as p:
         browser = p.chromium.launch()
         try:
-            # ---- PDF (Letter portrait) ----
-            page = browser.new_page()
-            page.goto(html_url, wait_until="networkidle")
-            pdf_path = output_dir / "year_in_books.pdf"
-            page.pdf(
-                path=str(pdf_path),
-                format="Letter",
-                print_background=True,
-                margin={"top": "0.5in", "bottom": "0.5in",
-                        "left": "0.5in", "right": "0.5in"},
-            )
-            out["pdf"] = pdf_path
-            page.close()
-
-            # ---- Web PNG (desktop viewport sized to match typical embed
-            # widths (~720-800px logical). DPR=2 keeps it crisp on retina;
-            # rendering at this viewport instead of 1200 prevents the heavy
-            # downscale that made the previous 2400px-wide PNG hard to read. ----
-            ctx = browser.new_context(viewport={"width": 800, "height": 1200},
-                                      device_scale_factor=2)
-            page = ctx.new_page()
-            page.goto(html_url, wait_until="networkidle")
-            web_path = output_dir / "year_in_books_web.png"
-            page.screenshot(path=str(web_path), full_page=True)
-            out["web"] = web_path
-            ctx.close()
-
-            # ---- Social card (9:16, 1080×1920) ----
-            # Viewport 540 × DPR 2 = 1080-wide output. The @media (max-width:
-            # 720px) rules in the template trigger at this viewport, applying
-            # the larger mobile type scale. Adding `card-mode` to <body>
-            # activates the dense 9:16 layout (masthead + stats + chart +
-            # 2-col book list) defined in the template's .card-mode CSS,
-            # which is then clipped to 540×960 CSS px (= 1080×1920 PNG at
-            # DPR=2). This format fits feed-based platforms (Bluesky,
-            # Mastodon, Instagram Stories) without the cropping/blurring
-            # that very tall images get on those services.
-            ctx = browser.new_context(viewport={"width": 540, "height": 960},
-                                      device_scale_factor=2)
-            page = ctx.new_page()
-            page.goto(html_url, wait_until="networkidle")
-            page.evaluate("document.body.classList.add('card-mode')")
-            social_path = output_dir / "year_in_books_social.png"
-            page.screenshot(
-                path=str(social_path),
-                clip={"x": 0, "y": 0, "width": 540, "height": 960},
-            )
-            out["social"] = social_path
-            ctx.close()
+            for name in formats or OUTPUT_FILES:
+                path = Path(output_dir) / OUTPUT_FILES[name]
+                renderers[name](browser, html_url, path)
+                out[name] = path
         finally:
             browser.close()
 
     return out
 
 
+def _render_pdf(browser, html_url: str, pdf_path: Path) -> None:
+    # ---- PDF (Letter portrait) ----
+    page = browser.new_page()
+    page.goto(html_url, wait_until="networkidle")
+    page.pdf(
+        path=str(pdf_path),
+        format="Letter",
+        print_background=True,
+        margin={"top": "0.5in", "bottom": "0.5in",
+                "left": "0.5in", "right": "0.5in"},
+    )
+    page.close()
+
+
+def _render_web_png(browser, html_url: str, web_path: Path) -> None:
+    # ---- Web PNG (desktop viewport sized to match typical embed
+    # widths (~720-800px logical). DPR=2 keeps it crisp on retina;
+    # rendering at this viewport instead of 1200 prevents the heavy
+    # downscale that made the previous 2400px-wide PNG hard to read. ----
+    ctx = browser.new_context(viewport={"width": 800, "height": 1200},
+                              device_scale_factor=2)
+    page = ctx.new_page()
+    page.goto(html_url, wait_until="networkidle")
+    page.screenshot(path=str(web_path), full_page=True)
+    ctx.close()
+
+
+def _render_social_png(browser, html_url: str, social_path: Path) -> None:
+    # ---- Social card (9:16, 1080×1920) ----
+    # Viewport 540 × DPR 2 = 1080-wide output. The @media (max-width:
+    # 720px) rules in the template trigger at this viewport, applying
+    # the larger mobile type scale. Adding `card-mode` to <body>
+    # activates the dense 9:16 layout (masthead + stats + chart +
+    # 2-col book list) defined in the template's .card-mode CSS,
+    # which is then clipped to 540×960 CSS px (= 1080×1920 PNG at
+    # DPR=2). This format fits feed-based platforms (Bluesky,
+    # Mastodon, Instagram Stories) without the cropping/blurring
+    # that very tall images get on those services.
+    ctx = browser.new_context(viewport={"width": 540, "height": 960},
+                              device_scale_factor=2)
+    page = ctx.new_page()
+    page.goto(html_url, wait_until="networkidle")
+    page.evaluate("document.body.classList.add('card-mode')")
+    page.screenshot(
+        path=str(social_path),
+        clip={"x": 0, "y": 0, "width": 540, "height": 960},
+    )
+    ctx.close()
+
+
+def render_html_pdf(html_path: Path, pdf_path: Path) -> Path:
+    """Print one HTML file to a Letter-portrait PDF via headless Chromium."""
+    from playwright.sync_api import sync_playwright
+
+    html_url = Path(html_path).resolve().as_uri()
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        try:
+            _render_pdf(browser, html_url, Path(pdf_path))
+        finally:
+            browser.close()
+    return Path(pdf_path)
+
+
 def main(argv: Optional[list] = None) -> int:
     parser = argparse.ArgumentParser(
         description="Generate a 'year in books' visualization from a Goodreads read shelf."
@@ -880,10 +1916,52 @@ def main(argv: Optional[list] = None) -> int:
     parser.add_argument("--user-id", help="Goodreads user ID (else read from config.json).")
     parser.add_argument("--output-dir", default="output", help="Output directory (default: output).")
     parser.add_argument("--config", default="config.json", help="Path to config.json.")
+    parser.add_argument(
+        "--from-csv", metavar="PATH",
+        help="Read books from a Goodreads 'Export Library' CSV instead of the RSS feed.",
+    )
+    parser.add_argument(
+        "--openlibrary-index", metavar="PATH",
+        help="Open Library genre index (built with openlibrary_index.py) to try "
+             "before Google Books and Goodreads.",
+    )
+    parser.add_argument(
+        "--svg-only", action="store_true",
+        help="Write the HTML and the SVG charts/social card only; skip the "
+             "Chromium PDF/PNG renders.",
+    )
+    parser.add_argument(
+        "--image-widths", metavar="W[,W...]",
+        help="Also write the PNG outputs (and their WebP/AVIF variants) at these "
+             "narrower widths in pixels, e.g. 540,1080.",
+    )
+    parser.add_argument(
+        "--window", metavar="SPEC",
+        help="Report period instead of the rolling last 12 months: YYYY (calendar "
+             "year), last-N (trailing N months) or YYYY-MM:YYYY-MM.",
+    )
+    parser.add_argument(
+        "--years", type=int, metavar="N",
+        help="Instead of one period, render a comparison of the last N calendar years.",
+    )
+    parser.add_argument(
+        "--refresh-years", action="store_true",
+        help="With --years, recompute closed years instead of using their cached aggregates.",
+    )
     args = parser.parse_args(argv)
 
+    image_widths = tuple(int(w) for w in args.image_widths.split(",") if w.strip()) if args.image_widths else ()
+
+    window = None
+    if args.window:
+        try:
+            window = parse_window(args.window)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
     user_id = args.user_id
-    if not user_id:
+    if not user_id and not args.from_csv:
         config_path = Path(args.config)
         if not config_path.exists():
             print(f"config not found at {config_path} and no --user-id supplied", file=sys.stderr)
@@ -895,7 +1973,18 @@ def main(argv: Optional[list] = None) -> int:
             return 2
 
     logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
-    result = generate(user_id, Path(args.output_dir))
+    if args.years:
+        result = generate_multi_year(
+            user_id, Path(args.output_dir), years=args.years,
+            source_csv=args.from_csv, refresh=args.refresh_years,
+            offline_index=args.openlibrary_index,
+        )
+    else:
+        result = generate(
+            user_id, Path(args.output_dir), source_csv=args.from_csv, window=window,
+            offline_index=args.openlibrary_index, image_widths=image_widths,
+            svg_only=args.svg_only,
+        )
     print(json.dumps(result, indent=2))
     return 0
 
@@ -0,0 +1,168 @@
+"""Post-render image stage for the PNG outputs.
+
+Chromium writes its DPR-2 screenshots with fast, light compression, so the
+web and social PNGs come out at several MB. This stage runs after render:
+
+- recompresses each PNG losslessly (Pillow's optimize pass at maximum zlib
+  level) and replaces it only if the result is smaller;
+- writes WebP and, when Pillow has AVIF support, AVIF variants next to it
+  (name.webp / name.avif);
+- optionally writes narrower copies for responsive embeds
+  (name-540w.webp, ...).
+
+The work is CPU-bound, so optimize_images() spreads several files over a
+process pool; a single file is done in the calling process.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+WEBP_QUALITY = 90
+AVIF_QUALITY = 60
+VARIANT_SUFFIXES = (".avif", ".webp")
+
+
+def optimize_image(png_path: Path, widths: tuple = ()) -> dict:
+    """Optimize one PNG in place and write its variants. Returns a report:
+    {"file", "png_before", "png_after", "variants": {filename: bytes}}."""
+    from PIL import Image, features
+
+    png_path = Path(png_path)
+    before = png_path.stat().st_size
+    report = {"file": png_path.name, "png_before": before, "png_after": before, "variants": {}}
+
+    with Image.open(png_path) as img:
+        img.load()
+    tmp = png_path.with_name(png_path.name + ".tmp")
+    img.save(tmp, format="PNG", optimize=True, compress_level=9)
+    if tmp.stat().st_size < before:
+        os.replace(tmp, png_path)
+        report["png_after"] = png_path.stat().st_size
+    else:
+        tmp.unlink()
+
+    formats = [("webp", {"quality": WEBP_QUALITY, "method": 6})]
+    if features.check("avif"):
+        formats.insert(0, ("avif", {"quality": AVIF_QUALITY}))
+
+    sizes = [(None, img)]
+    for width in widths:
+        if width < img.width:
+            height = round(img.height * width / img.width)
+            sizes.append((width, img.resize((width, height), Image.LANCZOS)))
+
+    for width, frame in sizes:
+        stem = png_path.stem if width is None else f"{png_path.stem}-{width}w"
+        if width is not None:
+            path = png_path.with_name(f"{stem}.png")
+            frame.save(path, format="PNG", optimize=True, compress_level=9)
+            report["variants"][path.name] = path.stat().st_size
+        for ext, options in formats:
+            path = png_path.with_name(f"{stem}.{ext}")
+            tmp = path.with_name(path.name + ".tmp")
+            frame.save(tmp, format=ext.upper(), **options)
+            os.replace(tmp, path)
+            report["variants"][path.name] = path.stat().st_size
+    return report
+
+
+def optimize_images(png_paths: list, widths: tuple = (), workers: Optional[int] = None) -> list:
+    """Optimize several PNGs in a process pool. Returns one report per file
+    (see optimize_image). Failures are logged and skipped.
+
+    One file (or workers=1) runs in the calling process instead: the web UI
+    optimizes one PNG at a time from its job thread, and forking a threaded
+    server would copy whatever locks its other threads hold."""
+    if not png_paths:
+        return []
+    workers = workers or min(len(png_paths), os.cpu_count() or 1)
+
+    reports = []
+    if workers == 1:
+        for path in png_paths:
+            try:
+                reports.append(optimize_image(Path(path), widths))
+            except Exception as e:
+                logging.warning("Image optimization failed for %s: %s", path, e)
+    else:
+        # Imported here: it pulls in multiprocessing, which the web UI and
+        # --svg-only runs would otherwise load for nothing.
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(optimize_image, Path(p), widths): p for p in png_paths}
+            for future, path in futures.items():
+                try:
+                    reports.append(future.result())
+                except Exception as e:
+                    logging.warning("Image optimization failed for %s: %s", path, e)
+    for r in reports:
+        logging.info(
+            "%s: PNG %s -> %s; %s", r["file"], _kb(r["png_before"]), _kb(r["png_after"]),
+            ", ".join(f"{name} {_kb(size)}" for name, size in r["variants"].items()),
+        )
+    return reports
+
+
+def savings(reports: list) -> dict:
+    """Totals across optimize_images reports: PNG bytes before and after,
+    and the bytes saved by serving the smallest variant of each file."""
+    before = sum(r["png_before"] for r in reports)
+    after = sum(r["png_after"] for r in reports)
+    smallest = sum(
+        min([r["png_after"]] + [
+            size for name, size in r["variants"].items()
+            if Path(name).stem == Path(r["file"]).stem
+        ])
+        for r in reports
+    )
+    return {
+        "png_bytes_before": before,
+        "png_bytes_after": after,
+        "smallest_variant_bytes": smallest,
+        "saved_bytes": before - smallest,
+    }
+
+
+def best_variant(png_path: Path, accept: str) -> Path:
+    """The smallest up-to-date file for png_path that the client accepts:
+    png_path itself, or its .avif/.webp sibling when the Accept header
+    names that type explicitly (a bare */* doesn't count — plenty of
+    clients that send it only handle PNG)."""
+    png_path = Path(png_path)
+    if not png_path.exists():
+        return png_path
+    best = png_path
+    best_size = png_path.stat().st_size
+    png_mtime = png_path.stat().st_mtime
+    for suffix in VARIANT_SUFFIXES:
+        variant = png_path.with_suffix(suffix)
+        if f"image/{suffix[1:]}" not in (accept or ""):
+            continue
+        try:
+            stat = variant.stat()
+        except FileNotFoundError:
+            continue
+        # A variant older than the PNG belongs to a previous render.
+        if stat.st_mtime >= png_mtime and stat.st_size < best_size:
+            best, best_size = variant, stat.st_size
+    return best
+
+
+def remove_variants(png_path: Path) -> None:
+    """Delete the variants of png_path (all widths), e.g. before a
+    re-render makes them stale."""
+    png_path = Path(png_path)
+    for path in png_path.parent.glob(f"{png_path.stem}*"):
+        if path != png_path and (
+            path.suffix in VARIANT_SUFFIXES or path.name.startswith(f"{png_path.stem}-")
+        ):
+            path.unlink(missing_ok=True)
+
+
+def _kb(n: int) -> str:
+    return f"{n / 1024:,.0f} KB"
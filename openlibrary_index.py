@@ -0,0 +1,270 @@
+"""Offline genre source built from the Open Library data dumps.
+
+Open Library publishes full dumps of its authors, works and editions
+(https://openlibrary.org/developers/dumps). This module streams those dumps
+into a compact SQLite index. The index holds subjects per work and maps
+ISBN-13s and normalized title|author keys onto works. goodreads_stats
+checks it before any network lookup, so most books resolve locally.
+
+Build it once (the dumps are large; this takes a while but runs in
+constant memory):
+
+    python openlibrary_index.py build ol_dump_authors.txt.gz \\
+        ol_dump_works.txt.gz ol_dump_editions.txt.gz \\
+        --output output/openlibrary.sqlite
+
+then pass --openlibrary-index output/openlibrary.sqlite to
+goodreads_stats.py, or set "openlibrary_index" in config.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import logging
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Optional
+
+from work_keys import canonical_isbn, normalize_author, normalize_title
+
+# Subjects on Open Library works are free-form and carry catalogue
+# housekeeping alongside real subjects. These never describe a genre.
+SUBJECT_NOISE = frozenset({
+    "accessible book", "protected daisy", "in library", "lending library",
+    "large type books", "open library staff picks", "overdrive",
+    "reading level-grade 9", "reading level-grade 10", "reading level-grade 11",
+    "reading level-grade 12", "english language", "fiction in english",
+})
+SUBJECT_NOISE_PREFIXES = ("nyt:", "series:", "award:", "collectionid:", "openlibrary_")
+
+MAX_SUBJECTS = 15
+BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    work TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT,
+    subjects TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS authors (
+    author TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS isbns (
+    isbn TEXT PRIMARY KEY,
+    work TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS titles (
+    ta TEXT PRIMARY KEY,
+    work TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+# -------- build --------
+
+def _open_dump(path: Path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def iter_dump(path: Path):
+    """Yield (type, key, record) for each line of an Open Library dump.
+    Dump lines are tab-separated: type, key, revision, last_modified,
+    JSON record. Lines that don't parse are skipped."""
+    with _open_dump(path) as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t", 4)
+            if len(parts) != 5:
+                continue
+            try:
+                record = json.loads(parts[4])
+            except json.JSONDecodeError:
+                continue
+            yield parts[0], parts[1], record
+
+
+def clean_subjects(subjects) -> list:
+    """Drop catalogue noise and turn BISAC-style "Fiction, Science fiction,
+    General" subjects into "Fiction / Science fiction / General" so the
+    genre taxonomy reads them like Google Books categories."""
+    out: list = []
+    for subject in subjects or []:
+        if not isinstance(subject, str):
+            continue
+        subject = subject.strip()
+        lowered = subject.lower()
+        if not subject or lowered in SUBJECT_NOISE or lowered.startswith(SUBJECT_NOISE_PREFIXES):
+            continue
+        head = lowered.split(",", 1)[0]
+        if "," in subject and head in {"fiction", "juvenile fiction", "young adult fiction"}:
+            subject = " / ".join(p.strip() for p in subject.split(",") if p.strip())
+        if subject not in out:
+            out.append(subject)
+        if len(out) >= MAX_SUBJECTS:
+            break
+    return out
+
+
+def _first_author(record: dict) -> Optional[str]:
+    for entry in record.get("authors") or []:
+        if not isinstance(entry, dict):
+            continue
+        ref = entry.get("author", entry)
+        key = ref.get("key") if isinstance(ref, dict) else ref
+        if isinstance(key, str):
+            return key
+    return None
+
+
+def build_index(dump_paths: list, index_path: Path) -> dict:
+    """Stream the given dumps (any mix of authors, works and editions,
+    plain or gzipped) into a fresh SQLite index at index_path, replacing
+    any existing one. Returns row counts per table."""
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    if index_path.exists():
+        index_path.unlink()
+    conn = sqlite3.connect(index_path)
+    conn.executescript(SCHEMA)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    batches: dict = {"authors": [], "works": [], "isbns": []}
+    inserts = {
+        "authors": "INSERT OR REPLACE INTO authors VALUES (?, ?)",
+        "works": "INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?)",
+        "isbns": "INSERT OR REPLACE INTO isbns VALUES (?, ?)",
+    }
+
+    def flush(table: str) -> None:
+        if batches[table]:
+            conn.executemany(inserts[table], batches[table])
+            batches[table].clear()
+
+    for path in dump_paths:
+        logging.info("Indexing %s", path)
+        for kind, key, record in iter_dump(Path(path)):
+            if kind == "/type/author":
+                if record.get("name"):
+                    batches["authors"].append((key, record["name"]))
+            elif kind == "/type/work":
+                subjects = clean_subjects(record.get("subjects"))
+                if subjects and record.get("title"):
+                    batches["works"].append(
+                        (key, record["title"], _first_author(record), json.dumps(subjects))
+                    )
+            elif kind == "/type/edition":
+                works = record.get("works") or []
+                work = works[0].get("key") if works and isinstance(works[0], dict) else None
+                if not work:
+                    continue
+                for isbn in (record.get("isbn_13") or []) + (record.get("isbn_10") or []):
+                    isbn = canonical_isbn(isbn)
+                    if isbn:
+                        batches["isbns"].append((isbn, work))
+            else:
+                continue
+            for table, rows in batches.items():
+                if len(rows) >= BATCH_SIZE:
+                    flush(table)
+        for table in batches:
+            flush(table)
+        conn.commit()
+
+    _finish_index(conn)
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("works", "isbns", "titles")
+    }
+    conn.close()
+    return counts
+
+
+def _finish_index(conn) -> None:
+    """Build the title|author table, then drop everything lookups never
+    need: author names, and ISBNs of works that have no subjects."""
+    conn.execute("DELETE FROM titles")
+    rows = conn.execute(
+        "SELECT w.work, w.title, a.name FROM works w LEFT JOIN authors a ON a.author = w.author"
+    )
+    batch: list = []
+    for work, title, author in rows:
+        title = normalize_title(title)
+        if title:
+            batch.append((f"ta:{title}|{normalize_author(author)}", work))
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany("INSERT OR IGNORE INTO titles VALUES (?, ?)", batch)
+            batch.clear()
+    conn.executemany("INSERT OR IGNORE INTO titles VALUES (?, ?)", batch)
+    conn.execute("DELETE FROM isbns WHERE work NOT IN (SELECT work FROM works)")
+    conn.execute("DELETE FROM authors")
+    conn.commit()
+    conn.execute("VACUUM")
+
+
+# -------- lookup --------
+
+class OpenLibraryIndex:
+    """Read-only genre lookups against a built index."""
+
+    def __init__(self, index_path: Path) -> None:
+        uri = Path(index_path).resolve().as_uri() + "?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def categories(self, book) -> list:
+        """Subjects for the book's work, matched by ISBN first and then by
+        normalized title and author; [] when the index doesn't know it."""
+        work = None
+        for isbn in (getattr(book, "isbn13", None), book.isbn):
+            isbn = canonical_isbn(isbn)
+            if isbn:
+                work = self._one("SELECT work FROM isbns WHERE isbn = ?", isbn)
+                if work:
+                    break
+        if not work:
+            title = normalize_title(book.title)
+            if title:
+                ta = f"ta:{title}|{normalize_author(book.author)}"
+                work = self._one("SELECT work FROM titles WHERE ta = ?", ta)
+        if not work:
+            return []
+        subjects = self._one("SELECT subjects FROM works WHERE work = ?", work)
+        return json.loads(subjects) if subjects else []
+
+    def _one(self, sql: str, arg: str):
+        row = self._conn.execute(sql, (arg,)).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# -------- CLI --------
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Build an offline genre index from Open Library data dumps."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Index authors/works/editions dumps.")
+    build.add_argument("dumps", nargs="+", help="Dump files (.txt or .txt.gz), in any order.")
+    build.add_argument(
+        "--output", default="output/openlibrary.sqlite",
+        help="Index file to write (default: output/openlibrary.sqlite).",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    counts = build_index(args.dumps, Path(args.output))
+    print(json.dumps(counts, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
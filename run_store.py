@@ -0,0 +1,190 @@
+"""Process-safe state for the web UI's background work.
+
+Sync runs and report-generation jobs used to live in a dict inside the
+Flask process, which only works while a single process serves every
+request. RunStore keeps them in a small SQLite file instead (WAL mode, one
+connection per call), so any worker thread or process can start a run,
+poll it, or see that one is already active.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started TEXT NOT NULL,
+    ended TEXT,
+    exit_code INTEGER,
+    owner_pid INTEGER,
+    log_path TEXT,
+    result TEXT,
+    error TEXT,
+    key TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_kind_status ON runs (kind, status);
+CREATE INDEX IF NOT EXISTS runs_kind_key ON runs (kind, key, status);
+"""
+
+FIELDS = ("status", "ended", "exit_code", "log_path", "result", "error")
+
+
+class RunStore:
+    """Runs keyed by id, each with a kind ("sync", "stats"), a status
+    ("running", "done", "failed", "cancelled"), timestamps, an optional
+    JSON result and an optional key describing the inputs (so the last
+    result for the same inputs can be found again with latest())."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+            if columns and "key" not in columns:  # store from before run keys
+                conn.execute("ALTER TABLE runs ADD COLUMN key TEXT")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create(self, run_id: str, kind: str, *, exclusive: bool = False, **fields) -> Optional[dict]:
+        """Insert a running run. With exclusive, the insert only happens if
+        no other run of this kind is running — checked and written in one
+        transaction, so two workers can't both start one. Returns the new
+        run, or None when exclusive and one is already active."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if exclusive and self._active(conn, kind):
+                    conn.execute("ROLLBACK")
+                    return None
+                conn.execute(
+                    "INSERT INTO runs (id, kind, status, started, owner_pid, log_path, key) "
+                    "VALUES (?, ?, 'running', ?, ?, ?, ?)",
+                    (run_id, kind, datetime.now().isoformat(), os.getpid(),
+                     str(fields["log_path"]) if fields.get("log_path") else None,
+                     fields.get("key")),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(run_id)
+
+    def finish(self, run_id: str, status: str, **fields) -> None:
+        """Mark a run finished with status; fields may set exit_code,
+        result (any JSON-able value) or error."""
+        fields["status"] = status
+        fields["ended"] = datetime.now().isoformat()
+        self.update(run_id, **fields)
+
+    def update(self, run_id: str, **fields) -> None:
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"unknown run fields: {sorted(unknown)}")
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE runs SET {assignments} WHERE id = ?", (*fields.values(), run_id))
+
+    def get(self, run_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return _as_dict(row)
+
+    def active(self, kind: str) -> Optional[dict]:
+        with self._connect() as conn:
+            return self._active(conn, kind)
+
+    def latest(self, kind: str, key: str, status: str = "done") -> Optional[dict]:
+        """The most recently finished run of this kind and key with the
+        given status, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM runs WHERE kind = ? AND key = ? AND status = ? "
+                "ORDER BY ended DESC LIMIT 1",
+                (kind, key, status),
+            ).fetchone()
+        return _as_dict(row)
+
+    @staticmethod
+    def _active(conn, kind: str) -> Optional[dict]:
+        row = conn.execute(
+            "SELECT * FROM runs WHERE kind = ? AND status = 'running' ORDER BY started DESC LIMIT 1",
+            (kind,),
+        ).fetchone()
+        return _as_dict(row)
+
+    def interrupt_running(self) -> int:
+        """Mark runs left over from a dead server as failed: called at
+        server start. Only runs owned by this process or by one that no
+        longer exists are touched; another live server sharing the store
+        keeps its runs."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute("SELECT id, owner_pid FROM runs WHERE status = 'running'").fetchall()
+                stale = [
+                    row["id"] for row in rows
+                    if row["owner_pid"] is None or row["owner_pid"] == os.getpid()
+                    or not pid_alive(row["owner_pid"])
+                ]
+                conn.executemany(
+                    "UPDATE runs SET status = 'failed', ended = ?, error = 'server restarted' "
+                    "WHERE id = ?",
+                    [(datetime.now().isoformat(), run_id) for run_id in stale],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(stale)
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this ID exists. On Windows os.kill(pid, 0)
+    would terminate it, so ask OpenProcess instead."""
+    if os.name == "nt":
+        import ctypes
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        handle = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _as_dict(row) -> Optional[dict]:
+    if row is None:
+        return None
+    run = dict(row)
+    if run.get("result"):
+        run["result"] = json.loads(run["result"])
+    if run.get("log_path"):
+        run["log_path"] = Path(run["log_path"])
+    return run
@@ -0,0 +1,255 @@
+"""Chromium-free SVG versions of the Year in Books graphics.
+
+Draws the monthly chart, the genre chart and the 9:16 social card as
+standalone SVG straight from the view model that build_report_model
+produces for the HTML template, so they need no browser and render in
+milliseconds. Palette and type follow year_in_books_report.html; text
+widths are estimated rather than measured, so long titles are cut a little
+conservatively. The Chromium PDF/PNG outputs remain the pixel-exact ones.
+"""
+
+from __future__ import annotations
+
+from html import escape, unescape
+from pathlib import Path
+
+# Palette from year_in_books_report.html
+PAGE_BG = "#ece4d3"
+INK = "#1a1814"
+INK_SOFT = "#3b362d"
+MUTED = "#7a7164"
+RULE = "#c9bfa8"
+RULE_SOFT = "#d6cdb8"
+ACCENT = "#a23416"
+BAR = "#2b1d18"
+
+SERIF = "Fraunces, Georgia, 'Times New Roman', serif"
+SANS = "Inter, 'Segoe UI', -apple-system, 'Helvetica Neue', Arial, sans-serif"
+
+SVG_FILES = {
+    "months_svg": "year_in_books_months.svg",
+    "genres_svg": "year_in_books_genres.svg",
+    "social_svg": "year_in_books_social.svg",
+}
+
+
+def _text(s) -> str:
+    """Model strings may carry HTML entities (&rsquo;, &middot;) meant for
+    the template; decode them, then escape for XML. (html.escape rather
+    than xml.sax.saxutils, which drags in urllib.request and ssl.)"""
+    return escape(unescape(str(s)), quote=False)
+
+
+def _fit(s: str, size: float, width: float, ratio: float = 0.56) -> str:
+    """Cut s with an ellipsis so it fits roughly width px at font size."""
+    s = unescape(str(s))
+    limit = max(1, int(width / (size * ratio)))
+    if len(s) <= limit:
+        return s
+    return s[: limit - 1].rstrip() + "…"
+
+
+def _label(x, y, s, size, *, fill=INK, family=SANS, weight=400, anchor="start",
+           style="normal", spacing=None) -> str:
+    extra = f' letter-spacing="{spacing}"' if spacing else ""
+    if style != "normal":
+        extra += f' font-style="{style}"'
+    return (
+        f'<text x="{x:.1f}" y="{y:.1f}" font-family="{family}" font-size="{size}" '
+        f'font-weight="{weight}" fill="{fill}" text-anchor="{anchor}"{extra}>{_text(s)}</text>'
+    )
+
+
+def _svg(width: int, height: int, body: list) -> str:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">\n'
+        f'<rect width="{width}" height="{height}" fill="{PAGE_BG}"/>\n'
+        + "\n".join(body)
+        + "\n</svg>\n"
+    )
+
+
+def _heading(x, y, width, left, right=None, size=13) -> list:
+    parts = [_label(x, y, left.upper(), size, weight=700, spacing="0.24em")]
+    if right:
+        parts.append(_label(x + width, y, right, size, fill=MUTED, anchor="end", style="italic"))
+    parts.append(f'<line x1="{x}" y1="{y + 10}" x2="{x + width}" y2="{y + 10}" stroke="{INK}"/>')
+    return parts
+
+
+# -------- charts --------
+
+def _month_chart(model: dict, x: float, y: float, width: float, height: float,
+                 label_size: float = 13) -> list:
+    """Stacked-spine monthly chart with its month labels below; (x, y) is
+    the top-left of the plot area."""
+    months = model["months"]
+    if not months:
+        return []
+    peak = max(m["count"] for m in months) or 1
+    gap = width * 0.0125
+    col = (width - gap * (len(months) - 1)) / len(months)
+    spine_gap = 2 if height / peak > 6 else 1
+    spine = min(16.0, (height - spine_gap * (peak - 1)) / peak)
+    base = y + height
+
+    def top_of(v: int) -> float:
+        return base - (v * spine + max(0, v - 1) * spine_gap)
+
+    parts = []
+    for g in model["gridlines"]:
+        gy = top_of(g["value"])
+        parts.append(
+            f'<line x1="{x}" y1="{gy:.1f}" x2="{x + width}" y2="{gy:.1f}" '
+            f'stroke="{RULE_SOFT}" stroke-dasharray="1 3"/>'
+        )
+        size = label_size * 0.92
+        box = len(g["label"]) * size * 0.6 + 12
+        parts.append(f'<rect x="{x + width - box:.1f}" y="{gy - size:.1f}" width="{box:.1f}" '
+                     f'height="{size * 1.4:.1f}" fill="{PAGE_BG}"/>')
+        parts.append(_label(x + width - 6, gy + size * 0.35, g["label"], size,
+                            fill=MUTED, weight=600, anchor="end"))
+    for i, m in enumerate(months):
+        cx = x + i * (col + gap)
+        fill = ACCENT if m["peak"] else BAR
+        if m["count"] == 0:
+            parts.append(_label(cx + col / 2, base - 4, "·", label_size * 1.4,
+                                fill=MUTED, anchor="middle"))
+        for k in range(m["count"]):
+            sy = base - (k + 1) * spine - k * spine_gap
+            parts.append(f'<rect x="{cx:.1f}" y="{sy:.1f}" width="{col:.1f}" '
+                         f'height="{spine:.1f}" fill="{fill}"/>')
+        color = ACCENT if m["peak"] else INK
+        parts.append(_label(cx + col / 2, base + label_size + 8, m["short_name"][:3],
+                            label_size, fill=color, weight=600, anchor="middle"))
+        parts.append(_label(cx + col / 2, base + 2 * label_size + 10, f"’{m['year_short']}",
+                            label_size * 0.85, fill=ACCENT if m["peak"] else MUTED,
+                            anchor="middle"))
+    parts.append(f'<line x1="{x}" y1="{base}" x2="{x + width}" y2="{base}" stroke="{INK}"/>')
+    return parts
+
+
+def render_month_chart_svg(model: dict, width: int = 800) -> str:
+    pad = 24
+    aside = (f"peak: {model['peak_count']} in {model['peak_month_short']}"
+             if model["peak_count"] > 0 else None)
+    body = _heading(pad, pad + 13, width - 2 * pad, "Books Read by Month", aside)
+    body += _month_chart(model, pad, pad + 48, width - 2 * pad, 200)
+    return _svg(width, pad + 48 + 200 + 52 + pad, body)
+
+
+def render_genre_chart_svg(model: dict, width: int = 800) -> str:
+    pad = 24
+    items = model["genre_items"]
+    row_h = 38
+    body = _heading(pad, pad + 13, width - 2 * pad, "Top Genres", model["genre_aside"])
+    inner = width - 2 * pad
+    genre_max = model["genre_max"] or 1
+    y = pad + 58
+    for i, (label, value) in enumerate(items):
+        top = i < 2
+        color = ACCENT if top else INK
+        body.append(_label(pad, y, _fit(label, 15, inner - 60), 15, weight=700 if top else 600))
+        body.append(_label(pad + inner, y, value, 20, family=SERIF, fill=color, anchor="end"))
+        body.append(f'<line x1="{pad}" y1="{y + 9}" x2="{pad + inner}" y2="{y + 9}" stroke="{RULE_SOFT}"/>')
+        body.append(f'<rect x="{pad}" y="{y + 7 if top else y + 8}" width="{inner * value / genre_max:.1f}" '
+                    f'height="{3 if top else 2}" fill="{color if top else INK}"/>')
+        y += row_h
+    if not items:
+        body.append(_label(pad, y, "No genre data", 15, fill=MUTED, style="italic"))
+        y += row_h
+    return _svg(width, int(y - row_h + 9 + pad + 8), body)
+
+
+# -------- social card --------
+
+def render_social_card_svg(model: dict) -> str:
+    """1080×1920 (9:16) card: masthead, stats strip, monthly chart and as
+    much of the book list as fits, in two columns, newest first."""
+    W, H, pad = 1080, 1920, 48
+    inner = W - 2 * pad
+    body = []
+
+    title = (f"{model['first_name']}’s Year in Books" if model["first_name"]
+             else "Your Year in Books")
+    body.append(_label(W / 2, pad + 60, _fit(title, 62, inner, 0.6), 62, family=SERIF,
+                       weight=800, anchor="middle"))
+    body.append(_label(W / 2, pad + 108,
+                       f"{model['window_start_str']}  —  {model['window_end_str']}".upper(),
+                       22, fill=INK_SOFT, weight=600, anchor="middle", spacing="0.2em"))
+    y = pad + 132
+    body.append(f'<line x1="{pad}" y1="{y}" x2="{W - pad}" y2="{y}" stroke="{INK}" stroke-width="2"/>')
+
+    strip = model["stats_strip"][:4]
+    if strip:
+        y += 24
+        cell = inner / len(strip)
+        for i, s in enumerate(strip):
+            cx = pad + i * cell + (16 if i else 0)
+            width = cell - (32 if i else 16)
+            if i:
+                body.append(f'<line x1="{pad + i * cell}" y1="{y}" x2="{pad + i * cell}" '
+                            f'y2="{y + 150}" stroke="{RULE}"/>')
+            body.append(_label(cx, y + 24, s["label"].upper(), 17, weight=700, spacing="0.14em"))
+            # Shrink long primaries ("September") before resorting to a cut.
+            primary = unescape(str(s["primary"]))
+            size = min(60 if s["numeric"] else 34, max(28, int(width / (len(primary) * 0.55))))
+            primary = _fit(primary, size, width, 0.55)
+            body.append(_label(cx, y + 96, primary, size, family=SERIF,
+                               weight=700 if s["numeric"] else 500,
+                               fill=ACCENT if i == 0 else INK))
+            body.append(_label(cx, y + 138, _fit(s["detail"], 17, width), 17,
+                               fill=MUTED, style="italic"))
+        y += 170
+
+    y += 40
+    aside = (f"peak: {model['peak_count']} in {model['peak_month_short']}"
+             if model["peak_count"] > 0 else None)
+    body += _heading(pad, y, inner, "Books Read by Month", aside, size=19)
+    y += 44
+    body += _month_chart(model, pad, y, inner, 190, label_size=20)
+    y += 190 + 70
+
+    body += _heading(pad, y, inner, "What You Read", f"all {model['stats'].total_books}", size=19)
+    y += 40
+    books = [b for _, group in model["groups"] for b in group]
+    row_h, col_gap = 74, 36
+    col_w = (inner - col_gap) / 2
+    rows = int((H - pad - y) // row_h)
+    shown = books[: rows * 2]
+    if len(shown) < len(books):
+        shown = books[: rows * 2 - 1]
+    for i, (num, title_main, _series, author) in enumerate(shown):
+        col, row = divmod(i, rows) if rows else (0, 0)
+        bx = pad + col * (col_w + col_gap)
+        by = y + row * row_h + 30
+        body.append(_label(bx + 40, by, num, 20, family=SERIF, fill=MUTED, anchor="end",
+                           style="italic"))
+        body.append(_label(bx + 54, by, _fit(title_main, 25, col_w - 54, 0.5), 25,
+                           family=SERIF, weight=500))
+        body.append(_label(bx + 54, by + 28, _fit((author or "").upper(), 15, col_w - 54, 0.7),
+                           15, fill=INK_SOFT, weight=600, spacing="0.1em"))
+    if len(shown) < len(books):
+        bx = pad + (col_w + col_gap) + 54
+        by = y + (rows - 1) * row_h + 30
+        body.append(_label(bx, by, f"+ {len(books) - len(shown)} more", 25, family=SERIF,
+                           fill=MUTED, style="italic"))
+    return _svg(W, H, body)
+
+
+def render_svg_outputs(model: dict, output_dir: Path) -> dict:
+    """Write the monthly chart, genre chart and social card SVGs into
+    output_dir. Returns {format: path} with keys months_svg, genres_svg,
+    social_svg."""
+    renderers = {
+        "months_svg": render_month_chart_svg,
+        "genres_svg": render_genre_chart_svg,
+        "social_svg": render_social_card_svg,
+    }
+    out = {}
+    for name, render in renderers.items():
+        path = Path(output_dir) / SVG_FILES[name]
+        path.write_text(render(model), encoding="utf-8")
+        out[name] = path
+    return out
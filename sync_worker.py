@@ -0,0 +1,251 @@
+"""Long-lived StoryGraph sync worker for the web UI.
+
+Starting book_sync.py once per click pays for a fresh interpreter, the
+Selenium/BeautifulSoup imports and a new Chrome plus StoryGraph login every
+time. Instead app.py keeps one worker process running (python
+sync_worker.py) and hands it sync runs and sync plans over a line-based JSON protocol:
+
+    stdin   {"run_id": "...", "log_path": "..."}            one line per sync
+            {"run_id": "...", "kind": "plan"}               one line per plan
+    stdout  {"run_id": "...", "status": "done" | "failed",
+             "exit_code": 0 | 1, "error": null | "...",
+             "plan": {...}}                                 one line per job
+                                                            ("plan" for plans)
+
+The worker imports book_sync once, keeps one BookSyncAutomation (and its
+logged-in browser) between runs, and sends each sync's log to that run's
+log file. Plans need no browser; they reuse the warm imports and config. The browser is closed after BROWSER_IDLE_SEC without work, on
+EOF on stdin, and on SIGTERM.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+ROOT = Path(__file__).resolve().parent
+BROWSER_IDLE_SEC = 10 * 60
+STOP_TIMEOUT_SEC = 10
+PLAN_TIMEOUT_SEC = 300
+
+
+# -------- parent side --------
+
+class SyncWorker:
+    """Handle on the worker process, used by app.py. The process starts on
+    the first submit() or plan() and is restarted if it dies. on_finish is
+    called (from a reader thread) with each sync's result message; syncs
+    still pending when the process exits are reported as failed."""
+
+    def __init__(self, on_finish: Callable[[dict], None]) -> None:
+        self.on_finish = on_finish
+        self._process: Optional[subprocess.Popen] = None
+        self._pending: dict = {}  # run_id -> process running it
+        self._plans: dict = {}    # run_id -> {"done": Event, "message": ...}
+        self._lock = threading.Lock()
+
+    def submit(self, run_id: str, log_path: Path) -> None:
+        self._send({"run_id": run_id, "log_path": str(log_path)})
+
+    def plan(self, timeout: float = PLAN_TIMEOUT_SEC) -> dict:
+        """Have the worker build a sync plan (book_sync's plan_sync) and
+        wait for it. Returns the result message, with the plan under
+        "plan" when status is "done"; raises TimeoutError."""
+        run_id = f"plan-{uuid.uuid4().hex[:8]}"
+        waiter = {"done": threading.Event(), "message": None}
+        with self._lock:
+            self._plans[run_id] = waiter
+        try:
+            self._send({"run_id": run_id, "kind": "plan"})
+            if not waiter["done"].wait(timeout):
+                raise TimeoutError("sync plan timed out")
+            return waiter["message"]
+        finally:
+            with self._lock:
+                self._plans.pop(run_id, None)
+
+    def _send(self, job: dict) -> None:
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            self._pending[job["run_id"]] = self._process
+            try:
+                self._process.stdin.write(json.dumps(job) + "\n")
+                self._process.stdin.flush()
+            except OSError:
+                self._pending.pop(job["run_id"], None)
+                raise
+
+    def pending(self) -> list:
+        """Sync runs the worker hasn't finished (plans not included)."""
+        with self._lock:
+            return sorted(r for r in self._pending if r not in self._plans)
+
+    def _start(self) -> None:
+        self._process = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve())],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            cwd=str(ROOT),
+        )
+        threading.Thread(
+            target=self._read_results, args=(self._process,), name="sync-worker-results", daemon=True
+        ).start()
+
+    def _read_results(self, process: subprocess.Popen) -> None:
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                self._pending.pop(message.get("run_id"), None)
+            self._deliver(message)
+        code = process.wait()
+        with self._lock:
+            lost = sorted(r for r, p in self._pending.items() if p is process)
+            for run_id in lost:
+                del self._pending[run_id]
+        for run_id in lost:
+            self._deliver({
+                "run_id": run_id, "status": "failed", "exit_code": code,
+                "error": f"sync worker exited with code {code}",
+            })
+
+    def _deliver(self, message: dict) -> None:
+        with self._lock:
+            waiter = self._plans.get(message.get("run_id"))
+        if waiter is None:
+            self.on_finish(message)
+        else:
+            waiter["message"] = message
+            waiter["done"].set()
+
+    def stop(self, timeout: float = STOP_TIMEOUT_SEC) -> None:
+        """Ask the worker to exit (EOF on stdin) once its current run is
+        done, waiting up to timeout; then SIGTERM, which interrupts the run
+        and closes its browser; then kill."""
+        with self._lock:
+            process = self._process
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=timeout)
+            return
+        except subprocess.TimeoutExpired:
+            process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# -------- worker side --------
+
+class _Runner:
+    """Runs sync jobs inside the worker, keeping the browser warm."""
+
+    def __init__(self) -> None:
+        import book_sync  # the expensive imports, paid once per worker
+        self.book_sync = book_sync
+        self.bot = None
+
+    def run(self, job: dict) -> dict:
+        if job.get("kind") == "plan":
+            return self.plan(job)
+        book_sync = self.book_sync
+        handler = logging.FileHandler(job["log_path"], encoding="utf-8")
+        handler.setFormatter(logging.Formatter(book_sync.LOG_FORMAT))
+        root = logging.getLogger()
+        root.addHandler(handler)
+        try:
+            config = book_sync.load_config()
+            self._bot_for(config).sync_books(concurrency=config.get('sync_concurrency', 1), keep_browser=True)
+            return {"run_id": job["run_id"], "status": "done", "exit_code": 0, "error": None}
+        except Exception as e:
+            logging.error(f"Fatal error: {str(e)}")
+            return {"run_id": job["run_id"], "status": "failed", "exit_code": 1, "error": str(e)}
+        finally:
+            root.removeHandler(handler)
+            handler.close()
+
+    def plan(self, job: dict) -> dict:
+        try:
+            plan = self._bot_for(self.book_sync.load_config()).plan_sync()
+            return {"run_id": job["run_id"], "status": "done", "exit_code": 0, "error": None, "plan": plan}
+        except Exception as e:
+            logging.exception("Sync plan failed")
+            return {"run_id": job["run_id"], "status": "failed", "exit_code": 1, "error": str(e)}
+
+    def _bot_for(self, config: dict):
+        """The warm BookSyncAutomation, replaced (and its browser closed)
+        when the configured credentials change."""
+        credentials = tuple(config[key] for key in self.book_sync.REQUIRED_CONFIG_KEYS)
+        if self.bot is None or self._credentials() != credentials:
+            self.close()
+            self.bot = self.book_sync.BookSyncAutomation(*credentials)
+        return self.bot
+
+    def _credentials(self) -> tuple:
+        return (self.bot.goodreads_user_id, self.bot.storygraph_email, self.bot.storygraph_password)
+
+    def close(self) -> None:
+        if self.bot is not None:
+            self.bot.close_browser()
+
+
+def main() -> int:
+    # stdout carries the protocol; anything else printed goes to stderr.
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - sync-worker - %(levelname)s - %(message)s")
+
+    jobs: queue.Queue = queue.Queue()
+
+    def read_jobs() -> None:
+        for line in sys.stdin:
+            try:
+                jobs.put(json.loads(line))
+            except ValueError:
+                logging.warning("Ignoring malformed job line: %r", line)
+        jobs.put(None)
+
+    threading.Thread(target=read_jobs, name="sync-worker-stdin", daemon=True).start()
+
+    runner = _Runner()
+    try:
+        while True:
+            try:
+                job = jobs.get(timeout=BROWSER_IDLE_SEC)
+            except queue.Empty:
+                runner.close()
+                continue
+            if job is None:
+                break
+            result = runner.run(job)
+            protocol.write(json.dumps(result) + "\n")
+            protocol.flush()
+    finally:
+        runner.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import pytest
+
+import app
+import goodreads_stats
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    output = tmp_path / "output"
+    output.mkdir()
+    monkeypatch.setattr(app, "OUTPUT_DIR", output)
+    html = output / "year_in_books.html"
+    html.write_text("<p>" + "Thirty-one books this year. " * 50 + "</p>", encoding="utf-8")
+    goodreads_stats.precompress(html)
+    (tmp_path / "config.json").write_text('{"storygraph_password": "secret"}', encoding="utf-8")
+    return app.app.test_client()
+
+
+def test_matching_etag_gets_304(client):
+    first = client.get("/output/year_in_books.html")
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = client.get("/output/year_in_books.html", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+
+def test_gzip_response_has_its_own_etag(client):
+    plain = client.get("/output/year_in_books.html")
+    gzipped = client.get("/output/year_in_books.html", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in gzipped.headers["Vary"]
+    assert gzipped.headers["ETag"].strip('"').endswith("-gzip")
+    assert gzipped.headers["ETag"] != plain.headers["ETag"]
+    again = client.get("/output/year_in_books.html", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"],
+    })
+    assert again.status_code == 304
+
+
+def test_only_the_current_version_is_immutable(client):
+    version = app._version("year_in_books.html")
+    current = client.get(f"/output/year_in_books.html?v={version}")
+    assert current.cache_control.immutable
+    assert current.cache_control.max_age == app.IMMUTABLE_MAX_AGE
+    assert not current.cache_control.no_cache
+
+    unversioned = client.get("/output/year_in_books.html")
+    assert unversioned.cache_control.no_cache
+    assert not unversioned.cache_control.immutable
+
+
+def test_stale_version_is_not_immutable(client):
+    stale = app._version("year_in_books.html")
+    (app.OUTPUT_DIR / "year_in_books.html").write_text("<p>Thirty-two books.</p>", encoding="utf-8")
+    response = client.get(f"/output/year_in_books.html?v={stale}")
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == "<p>Thirty-two books.</p>"
+    assert response.cache_control.no_cache
+    assert not response.cache_control.immutable
+
+
+@pytest.mark.parametrize("path", [
+    "/output/..%2fconfig.json",
+    "/output/%2e%2e/config.json",
+    "/output/missing.html",
+])
+def test_paths_outside_the_output_dir_are_404(client, path):
+    response = client.get(path)
+    assert response.status_code == 404
+    assert b"secret" not in response.get_data()
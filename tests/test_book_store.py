@@ -0,0 +1,61 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import goodreads_stats
+from goodreads_stats import Book, BookStore, MonthlyRollup
+
+TODAY = datetime(2025, 6, 15, tzinfo=timezone.utc)
+
+
+def shelf(n=500, seed=7):
+    rng = random.Random(seed)
+    zones = [timezone.utc, timezone(timedelta(hours=-5)), timezone(timedelta(hours=9))]
+    return [
+        Book(
+            title=f"Book {i}", author=f"Author {i % 40}", isbn=None,
+            num_pages=rng.choice([None, rng.randint(80, 900)]),
+            user_read_at=datetime(2019, 1, 1, tzinfo=rng.choice(zones)) + timedelta(hours=rng.randint(0, 57000)),
+            user_rating=rng.choice([None, 1, 2, 3, 4, 5]), goodreads_book_id=str(i),
+        )
+        for i in range(n)
+    ]
+
+
+def test_from_chunks_matches_a_list_build():
+    books = shelf()
+    chunks = [books[i:i + 64] for i in range(0, len(books), 64)]
+    streamed, listed = BookStore.from_chunks(iter(chunks)), BookStore(books)
+    assert streamed.books() == listed.books() == sorted(books, key=lambda b: b.user_read_at)
+
+
+@pytest.fixture(params=["numpy", "plain"])
+def numpy_or_not(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(goodreads_stats, "_optional_numpy", lambda: None)
+
+
+def test_aggregates_match_a_per_book_count(numpy_or_not):
+    books = shelf()
+    store = BookStore.from_chunks([books[:200], books[200:]])
+
+    stats = goodreads_stats.aggregate_last_12_months(store, today=TODAY)
+    in_window = [b for b in books if TODAY - timedelta(days=365) <= b.user_read_at <= TODAY]
+    assert stats.total_books == len(in_window)
+    # The month a year ago that the 365 days reach into has no bucket, so
+    # its books count toward the total only.
+    bucketed = [b for b in in_window if goodreads_stats._month_index(b.user_read_at) > goodreads_stats._month_index(TODAY) - 12]
+    assert stats.total_pages == sum(b.num_pages or 0 for b in bucketed)
+    assert stats.books_missing_pages == sum(1 for b in bucketed if not b.num_pages)
+    assert sum(n for _, n in stats.books_per_month) == len(bucketed)
+
+    totals = MonthlyRollup(store).totals(goodreads_stats.calendar_year_window(2022))
+    year = [b for b in books if b.user_read_at.year == 2022]
+    rated = [b.user_rating for b in year if b.user_rating]
+    assert totals["books"] == len(year)
+    assert totals["pages"] == sum(b.num_pages or 0 for b in year)
+    assert totals["missing_pages"] == sum(1 for b in year if not b.num_pages)
+    assert (totals["rating_sum"], totals["rating_count"]) == (sum(rated), len(rated))
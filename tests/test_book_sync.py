@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import pytest
+
+import book_sync
+
+BOOK = {
+    "title": "The Fifth Season", "author": "N.K. Jemisin", "goodreads_book_id": "19161852",
+    "date_read": datetime(2025, 3, 1),
+}
+
+
+def test_concurrent_atomic_writes_never_mix(tmp_path):
+    path = str(tmp_path / "sync_ledger.json")
+
+    def writer(n):
+        for i in range(30):
+            book_sync.write_json_atomic(path, {"books": {f"w{n}-{j}": j for j in range(50 + i)}})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(json.loads(open(path, encoding="utf-8").read())["books"]) == 79
+    assert os.listdir(tmp_path) == ["sync_ledger.json"]
+
+
+class FakeDriver:
+    current_url = "https://app.thestorygraph.com/books/x"
+
+    def __init__(self, pages):
+        self.pages = pages  # storygraph_id -> what _BOOK_PAGE_SCRIPT returns
+        self.opened = []
+
+    def get(self, url):
+        self.opened.append(url.rsplit("/", 1)[-1])
+
+    def execute_script(self, script, *args):
+        assert script == book_sync._BOOK_PAGE_SCRIPT
+        return self.pages[self.opened[-1]]
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = book_sync.BookSyncAutomation("1", "e", "p", storygraph_ids={book_sync.match_key(BOOK): "cached"})
+    monkeypatch.setattr(bot, "check_book_exists", lambda book: False)
+    monkeypatch.setattr(bot, "save_screenshot", lambda name: name)
+    monkeypatch.setattr(bot, "_search_storygraph", lambda term: [
+        {"href": "/books/0fd2c6a1-5d2b", "title": BOOK["title"], "authors": [BOOK["author"]]},
+    ])
+    return bot
+
+
+def test_transient_error_keeps_cached_id(bot, monkeypatch):
+    bot.driver = FakeDriver({"cached": {"missing": False, "title": "The Fifth Season", "authors": []}})
+
+    def timeout(*args, **kwargs):
+        raise TimeoutError("page took too long")
+
+    monkeypatch.setattr(book_sync, "WebDriverWait", timeout)
+    with pytest.raises(TimeoutError):
+        bot.update_book_status(BOOK)
+    assert bot.storygraph_ids[book_sync.match_key(BOOK)] == "cached"
+
+
+@pytest.mark.parametrize("page", [
+    {"missing": True, "title": "", "authors": []},
+    {"missing": False, "title": "A Completely Different Book", "authors": []},
+])
+def test_missing_or_mismatched_page_forgets_cached_id(bot, monkeypatch, page):
+    found = {"missing": False, "title": "The Fifth Season", "authors": []}
+    bot.driver = FakeDriver({"cached": page, "0fd2c6a1-5d2b": found})
+
+    def stop(*args, **kwargs):
+        raise TimeoutError("stop after the page check")
+
+    monkeypatch.setattr(book_sync, "WebDriverWait", stop)
+    with pytest.raises(TimeoutError):
+        bot.update_book_status(BOOK)
+    assert bot.driver.opened == ["cached", "0fd2c6a1-5d2b"]
+    assert bot.storygraph_ids[book_sync.match_key(BOOK)] == "0fd2c6a1-5d2b"
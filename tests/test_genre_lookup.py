@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import goodreads_stats
+import openlibrary_index
+from goodreads_stats import Book
+
+BOOK = Book(
+    title="Harry Potter and the Philosopher's Stone", author="J.K. Rowling", isbn="0747532699",
+    num_pages=223, user_read_at=datetime(2025, 3, 1, tzinfo=timezone.utc), user_rating=5,
+    goodreads_book_id="3",
+)
+
+
+@pytest.fixture
+def lookup(tmp_path, monkeypatch):
+    """lookup_genres with a fake Open Library index and recorded network tiers."""
+    calls = []
+
+    def run(local_subjects, google=(), goodreads=()):
+        class FakeIndex:
+            def __init__(self, path):
+                pass
+
+            def categories(self, book):
+                return list(local_subjects)
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(openlibrary_index, "OpenLibraryIndex", FakeIndex)
+        monkeypatch.setattr(goodreads_stats, "_query_google_books_isbn",
+                            lambda *a, **k: calls.append("isbn") or list(google))
+        monkeypatch.setattr(goodreads_stats, "_query_google_books_title_author",
+                            lambda *a, **k: calls.append("title") or [])
+        monkeypatch.setattr(goodreads_stats, "_query_goodreads_genres",
+                            lambda *a, **k: calls.append("goodreads") or list(goodreads))
+        genres = goodreads_stats.lookup_genres(
+            [BOOK], tmp_path / "genres_cache.json", offline_index=tmp_path / "ol.sqlite"
+        )
+        return genres[goodreads_stats._book_key(BOOK)]
+
+    run.calls = calls
+    return run
+
+
+def test_known_genre_subjects_skip_the_network(lookup):
+    entry = lookup(["Fiction / Fantasy / General", "Wizards"])
+    assert entry["genres"] == ["fantasy", "wizards"]
+    assert lookup.calls == []
+
+
+def test_topical_subjects_fall_through_to_network_tiers(lookup):
+    entry = lookup(["Wizards", "Orphans", "Boarding schools"], goodreads=["Fantasy", "Young Adult"])
+    assert lookup.calls == ["isbn", "title", "goodreads"]
+    assert entry["categories"] == ["Fantasy", "Young Adult"]
+    assert "wizards" not in entry["genres"]
+
+
+def test_topical_subjects_are_not_cached_as_final(lookup):
+    entry = lookup(["Wizards", "Orphans", "Boarding schools"])
+    assert entry["categories"] == []
+    lookup.calls.clear()
+    lookup(["Wizards", "Orphans", "Boarding schools"])
+    assert lookup.calls == ["isbn", "title", "goodreads"]
+
+
+def test_missing_or_corrupt_index_falls_back_to_network(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(goodreads_stats, "_query_google_books_isbn", lambda *a, **k: ["Fiction / Fantasy / General"])
+    other = Book(
+        title="Another Book", author="Someone Else", isbn="0140449132", num_pages=100,
+        user_read_at=BOOK.user_read_at, user_rating=None,
+    )
+    corrupt = tmp_path / "corrupt.sqlite"
+    corrupt.write_bytes(b"not a database" * 100)
+    for n, index in enumerate((tmp_path / "missing.sqlite", corrupt)):
+        caplog.clear()
+        genres = goodreads_stats.lookup_genres(
+            [BOOK, other], tmp_path / f"genres_cache_{n}.json", offline_index=index
+        )
+        assert all(entry["genres"] == ["fantasy"] for entry in genres.values())
+        warnings = [r for r in caplog.records if "Open Library index" in r.getMessage()]
+        assert len(warnings) == 1
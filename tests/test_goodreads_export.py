@@ -0,0 +1,52 @@
+import csv
+import logging
+from datetime import datetime
+
+import book_sync
+import goodreads_stats
+from goodreads_stats import Book, BookStore
+
+BOOKS = [
+    Book(title="Harry Potter and the Philosopher's Stone (Harry Potter, #1)", author="J.K. Rowling",
+         isbn="0747532699", num_pages=223, user_read_at=datetime(2024, 2, 29).astimezone(),
+         user_rating=5, goodreads_book_id="3", isbn13="9780747532699"),
+    Book(title='Crime and Punishment, "Annotated"', author="Fyodor Dostoevsky", isbn="9780143058144",
+         num_pages=None, user_read_at=datetime(2023, 12, 31).astimezone(), user_rating=None,
+         goodreads_book_id="7144", isbn13="9780143058144"),
+    Book(title="Der Zauberberg: Roman", author="Thomas Mann", isbn="3596294339", num_pages=1008,
+         user_read_at=datetime(2025, 1, 1).astimezone(), user_rating=3, goodreads_book_id=None),
+]
+
+
+def test_export_round_trips_through_the_importer(tmp_path):
+    path = tmp_path / "storygraph_import.csv"
+    store = BookStore(BOOKS)
+    written = book_sync.export_storygraph_csv(
+        store.books(), path, full=True, state_path=tmp_path / "storygraph_export.json",
+    )
+    assert written == len(BOOKS)
+
+    imported, first_name = goodreads_stats.load_goodreads_export(path)
+    assert first_name is None
+    assert sorted(imported, key=lambda b: b.user_read_at) == store.books()
+    assert BookStore.from_chunks(goodreads_stats.iter_goodreads_export(path, chunk_size=2)).books() == store.books()
+
+
+def test_malformed_rows_are_reported_and_skipped(tmp_path, caplog):
+    path = tmp_path / "goodreads_library_export.csv"
+    rows = [book_sync.goodreads_export_row(b) for b in BOOKS]
+    rows.insert(1, dict(rows[0], **{"Title": "Bad Date", "Date Read": "2024/13/45"}))
+    rows.insert(2, dict(rows[0], **{"Title": "Huge Review", "My Review": "x" * 200_000}))
+    rows.append(dict(rows[0], **{"Title": "Unread", "Date Read": "", "Exclusive Shelf": "read"}))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=book_sync.GOODREADS_EXPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    with caplog.at_level(logging.WARNING):
+        books, _ = goodreads_stats.load_goodreads_export(path)
+    assert sorted(b.title for b in books) == sorted(b.title for b in BOOKS)
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("line 3" in m and "'Bad Date'" in m for m in messages)
+    assert any("unreadable export row" in m and "field limit" in m for m in messages)
+    assert any("'Unread'" in m and "no read date" in m for m in messages)
@@ -0,0 +1,65 @@
+import pytest
+
+import app
+import goodreads_stats
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "OUTPUT_DIR", tmp_path)
+    (tmp_path / "year_in_books.html").write_text("<p>v1</p>", encoding="utf-8")
+    return tmp_path
+
+
+def fake_render(on_render=None):
+    """render_html_outputs stand-in: the "PDF" is a copy of the HTML it
+    read when the render started."""
+    def render(html_path, output_dir, formats):
+        html = html_path.read_text(encoding="utf-8")
+        if on_render:
+            on_render()
+        path = output_dir / goodreads_stats.OUTPUT_FILES[formats[0]]
+        path.write_text(html, encoding="utf-8")
+        return {formats[0]: path}
+    return render
+
+
+def test_render_is_reused_until_the_report_changes(output_dir, monkeypatch):
+    renders = []
+    monkeypatch.setattr(goodreads_stats, "render_html_outputs",
+                        fake_render(lambda: renders.append(1)))
+    first = app._ensure_rendered("pdf")
+    assert app._ensure_rendered("pdf") == first
+    assert len(renders) == 1
+
+    (output_dir / "year_in_books.html").write_text("<p>v2, same mtime or not</p>", encoding="utf-8")
+    assert app._ensure_rendered("pdf") != first
+    assert len(renders) == 2
+
+
+def test_render_that_outlives_its_report_is_not_kept(output_dir, monkeypatch):
+    html = output_dir / "year_in_books.html"
+    replaced = []
+
+    def regenerate():
+        # A report job finishes while Chromium is still on the old HTML.
+        if not replaced:
+            replaced.append(1)
+            html.write_text("<p>v2</p>", encoding="utf-8")
+
+    monkeypatch.setattr(goodreads_stats, "render_html_outputs", fake_render(regenerate))
+    version = app._ensure_rendered("pdf")
+    assert version == app._content_hash(html)
+    assert (output_dir / "year_in_books.pdf").read_text(encoding="utf-8") == "<p>v2</p>"
+
+    response = app.app.test_client().get(f"/output/year_in_books.pdf?v={version}")
+    assert response.get_data(as_text=True) == "<p>v2</p>"
+    assert response.cache_control.immutable
+
+
+def test_stale_output_left_on_disk_is_rerendered(output_dir, monkeypatch):
+    monkeypatch.setattr(goodreads_stats, "render_html_outputs", fake_render())
+    stale = output_dir / "year_in_books.pdf"
+    stale.write_text("<p>v0</p>", encoding="utf-8")  # newer than the HTML, but no stamp
+    app._ensure_rendered("pdf")
+    assert stale.read_text(encoding="utf-8") == "<p>v1</p>"
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import goodreads_stats
+from goodreads_stats import Book
+
+TODAY = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    books = [
+        Book(title=f"Book {y}", author="A", isbn=None, num_pages=200,
+             user_read_at=datetime(y, 3, 1, tzinfo=timezone.utc), user_rating=4,
+             goodreads_book_id=str(y))
+        for y in (2022, 2023, 2024, 2025)
+    ]
+    monkeypatch.setattr(goodreads_stats, "iter_read_shelf", lambda user_id: [(1, books)])
+    monkeypatch.setattr(goodreads_stats, "lookup_genres", lambda books, *a, **k: {})
+    monkeypatch.setattr(goodreads_stats, "render_html_pdf", lambda html, pdf: pdf)
+    return lambda: goodreads_stats.generate_multi_year("42", tmp_path, years=4, today=TODAY)["recomputed"]
+
+
+def test_closed_years_come_from_the_cache(run):
+    assert run() == [2022, 2023, 2024, 2025]
+    assert run() == [2025]
+
+
+@pytest.mark.parametrize("constant", ["TAXONOMY_VERSION", "WORK_INDEX_VERSION"])
+def test_cache_from_another_version_is_recomputed(run, monkeypatch, constant):
+    run()
+    monkeypatch.setattr(goodreads_stats, constant, getattr(goodreads_stats, constant) + 1)
+    assert run() == [2022, 2023, 2024, 2025]
+    assert run() == [2025]
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+import run_store
+from run_store import RunStore
+
+
+def test_interrupt_running_leaves_live_owners_alone(tmp_path):
+    store = RunStore(tmp_path / "runs.sqlite")
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    gone = subprocess.Popen([sys.executable, "-c", "pass"])
+    gone.wait()
+    try:
+        for run_id, pid in (("mine", None), ("other", other.pid), ("gone", gone.pid)):
+            store.create(run_id, "sync")
+            if pid:
+                with store._connect() as conn:
+                    conn.execute("UPDATE runs SET owner_pid = ? WHERE id = ?", (pid, run_id))
+
+        assert store.interrupt_running() == 2
+        assert store.get("mine")["status"] == "failed"
+        assert store.get("gone")["status"] == "failed"
+        assert store.get("other")["status"] == "running"
+    finally:
+        other.kill()
+        other.wait()
+
+
+def test_pid_alive():
+    assert run_store.pid_alive(os.getpid())
+
+
+def test_shutdown_cancels_queued_stats_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "_STORE", RunStore(tmp_path / "runs.sqlite"))
+    jobs = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(app, "_jobs", jobs)
+    release = threading.Event()
+    jobs.submit(release.wait)  # e.g. an image optimization ahead in the queue
+
+    run_id = app._start_stats_job("key", "42", None, None, None)
+    assert app._store().get(run_id)["status"] == "running"
+
+    threading.Timer(0.2, release.set).start()
+    app.shutdown()
+    run = app._store().get(run_id)
+    assert run["status"] == "cancelled"
+    assert app._store().active("stats") is None
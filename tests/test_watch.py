@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+
+import book_sync
+import watch
+
+
+def updates_book(title, goodreads_book_id, date_read):
+    return {
+        "title": title, "author": "Someone", "rating": 4, "goodreads_book_id": goodreads_book_id,
+        "date_read": datetime.strptime(date_read, "%Y-%m-%d"),
+    }
+
+
+def test_failed_book_is_retried_when_another_shares_its_title(tmp_path, monkeypatch):
+    ok = updates_book("Beloved", "1", "2025-03-01")
+    broken = updates_book("Beloved", "2", "2025-03-02")
+
+    class FakeBot:
+        def sync_books(self, concurrency, books):
+            return {
+                "synced": [ok["title"]], "failed": [broken["title"]],
+                "synced_keys": [book_sync.sync_key(ok)], "failed_keys": [book_sync.sync_key(broken)],
+            }
+
+    monkeypatch.setattr(watch, "poll", lambda *a, **k: "<rss/>")
+    monkeypatch.setattr(book_sync, "parse_updates_feed", lambda text: [ok, broken])
+    monkeypatch.setattr(book_sync, "load_ledger", lambda: {"books": {}, "backfill": {}})
+    monkeypatch.setattr(book_sync, "load_config", lambda: {})
+
+    watcher = watch.Watcher("42", tmp_path, sync=True)
+    watcher._feed("updates")["seen"] = []
+    watcher._bot = FakeBot()
+    assert watcher.check_updates()
+    assert watcher._feed("updates")["seen"] == [book_sync.sync_key(ok)]
+
+
+def test_state_is_replaced_not_rewritten_in_place(tmp_path):
+    watcher = watch.Watcher("42", tmp_path)
+    watcher._feed("shelf")["etag"] = '"abc"'
+    watcher._save_state()
+    assert json.loads((tmp_path / watch.STATE_NAME).read_text())["feeds"]["shelf"]["etag"] == '"abc"'
+    assert [p.name for p in tmp_path.iterdir()] == [watch.STATE_NAME]
@@ -0,0 +1,88 @@
+import random
+from datetime import datetime
+
+import pytest
+
+import app
+import goodreads_stats
+from goodreads_stats import Book, MonthlyRollup, ReportWindow, parse_window
+
+TODAY = datetime(2025, 1, 15).astimezone()
+
+
+def read_on(*ymd, pages=300, rating=4, n=0):
+    return Book(title=f"Book {ymd} {n}", author="A", isbn=None, num_pages=pages,
+                user_read_at=datetime(*ymd).astimezone(), user_rating=rating)
+
+
+@pytest.mark.parametrize("spec, window", [
+    ("2024", ReportWindow(2024 * 12, 2024 * 12 + 11, "2024")),
+    (" LAST-3 ", ReportWindow(2024 * 12 + 10, 2025 * 12, "last 3 months")),  # crosses New Year
+    ("last-1", ReportWindow(2025 * 12, 2025 * 12, "last 1 months")),
+    ("2023-12:2024-01", ReportWindow(2023 * 12 + 11, 2024 * 12, "Dec 2023 – Jan 2024")),
+    ("2024-02:2024-02", ReportWindow(2024 * 12 + 1, 2024 * 12 + 1, "Feb 2024 – Feb 2024")),
+])
+def test_parse_window(spec, window):
+    assert parse_window(spec, today=TODAY) == window
+
+
+@pytest.mark.parametrize("spec", [
+    "", "24", "20245", "last-0", "last--2", "last-x", "2024-13:2025-01", "2024-00:2024-05",
+    "2025-03:2024-01", "2024-01:", "2024/01:2024/02",
+])
+def test_parse_window_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_window(spec, today=TODAY)
+
+
+def test_invalid_window_is_a_400(monkeypatch):
+    monkeypatch.setattr(app, "_start_stats_job", lambda *a: pytest.fail("job started"))
+    response = app.app.test_client().post("/generate-stats", json={"window": "2025-03:2024-01"})
+    assert response.status_code == 400
+    assert "before its start" in response.get_json()["error"]
+
+
+def test_month_and_leap_day_boundaries():
+    books = [
+        read_on(2024, 1, 31, 23, 59), read_on(2024, 2, 1), read_on(2024, 2, 29, 23, 30),
+        read_on(2024, 3, 1), read_on(2023, 12, 31, 23, 59), read_on(2025, 1, 1, pages=None),
+    ]
+    rollup = MonthlyRollup(books)
+
+    feb = rollup.stats(parse_window("2024-02:2024-02"), today=TODAY)
+    assert sorted(b.user_read_at.day for b in feb.books) == [1, 29]
+    assert feb.window_end.replace(tzinfo=None) == datetime(2024, 2, 29, 23, 59, 59)
+    assert feb.books_per_month == [("Feb 2024", 2)]
+
+    year = rollup.totals(parse_window("2024"))
+    assert (year["books"], year["pages"]) == (4, 1200)
+    turn = rollup.stats(parse_window("last-2", today=TODAY), today=TODAY)
+    assert turn.books_per_month == [("Dec 2024", 0), ("Jan 2025", 1)]
+    assert (turn.total_books, turn.books_missing_pages) == (1, 1)
+    assert turn.window_end == TODAY  # the current month is cut off at today
+
+
+def test_rollup_matches_a_per_book_count():
+    rng = random.Random(3)
+    books = [
+        read_on(rng.randint(2015, 2025), rng.randint(1, 12), rng.randint(1, 28),
+                pages=rng.choice([None, rng.randint(50, 900)]),
+                rating=rng.choice([None, 1, 2, 3, 4, 5]), n=i)
+        for i in range(400)
+    ]
+    rollup = MonthlyRollup(books)
+    for _ in range(50):
+        first = rng.randint(2014 * 12, 2026 * 12)
+        window = ReportWindow(first, first + rng.randint(0, 40), "random")
+        inside = [b for b in books
+                  if window.first_month <= goodreads_stats._month_index(b.user_read_at) <= window.last_month]
+        ratings = [b.user_rating for b in inside if b.user_rating]
+        totals = rollup.totals(window)
+        assert totals["books"] == len(inside)
+        assert totals["pages"] == sum(b.num_pages or 0 for b in inside)
+        assert totals["missing_pages"] == sum(1 for b in inside if not b.num_pages)
+        assert (totals["rating_sum"], totals["rating_count"]) == (sum(ratings), len(ratings))
+        assert sorted(b.title for b in rollup.stats(window, today=TODAY).books) == sorted(b.title for b in inside)
+
+        yoy = rollup.year_over_year(window)
+        assert yoy["change"]["books"] == totals["books"] - rollup.totals(window.shifted(-12))["books"]
@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+
+import goodreads_stats
+from goodreads_stats import Book
+from work_keys import WorkIndex, normalize_title, work_aliases
+
+READ_AT = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+def book(title, isbn=None, goodreads_book_id=None, author="Brandon Sanderson"):
+    return Book(
+        title=title, author=author, isbn=isbn, num_pages=None, user_read_at=READ_AT,
+        user_rating=None, goodreads_book_id=goodreads_book_id,
+    )
+
+
+FINAL_EMPIRE = book("Mistborn: The Final Empire (Mistborn, #1)", isbn="0765311786", goodreads_book_id="68428")
+WELL_OF_ASCENSION = book("Mistborn: The Well of Ascension (Mistborn, #2)", isbn="0765316889", goodreads_book_id="68429")
+
+
+def test_title_alias_keeps_subtitle():
+    assert normalize_title("Mistborn: The Final Empire") == "mistborn"
+    ta = [a for a in work_aliases(FINAL_EMPIRE) if a.startswith("ta:")]
+    assert ta == ["ta:mistborn the final empire|brandon sanderson"]
+
+
+def test_books_in_one_series_stay_separate_works():
+    works = WorkIndex()
+    first, _ = works.resolve(FINAL_EMPIRE)
+    second, absorbed = works.resolve(WELL_OF_ASCENSION)
+    assert first != second
+    assert absorbed == []
+
+
+def test_title_match_does_not_join_works_with_their_own_ids():
+    works = WorkIndex()
+    hardcover, _ = works.resolve(book("Elantris", isbn="0765311771", goodreads_book_id="68427"))
+    other, absorbed = works.resolve(book("Elantris", isbn="9780765350374", goodreads_book_id="99999"))
+    assert other != hardcover
+    assert absorbed == []
+    # A title-only record still joins the work that registered the title.
+    bare, _ = works.resolve(book("Elantris"))
+    assert bare == hardcover
+
+
+def test_title_match_joins_edition_without_ids():
+    works = WorkIndex()
+    bare, _ = works.resolve(book("Elantris"))
+    edition, absorbed = works.resolve(book("Elantris", isbn="0765311771"))
+    assert edition == bare
+    assert absorbed == []
+
+
+def test_series_books_get_their_own_genres(tmp_path, monkeypatch):
+    answers = {
+        "0765311786": ["Fiction / Fantasy / Epic"],
+        "0765316889": ["Fiction / Fantasy / Action & Adventure"],
+    }
+    monkeypatch.setattr(goodreads_stats, "_query_google_books_isbn", lambda isbn, timeout: answers[isbn])
+    monkeypatch.setattr(goodreads_stats, "_query_google_books_title_author", lambda *a, **k: [])
+    monkeypatch.setattr(goodreads_stats, "_query_goodreads_genres", lambda *a, **k: [])
+
+    genres = goodreads_stats.lookup_genres([FINAL_EMPIRE, WELL_OF_ASCENSION], tmp_path / "genres_cache.json")
+    first = genres[goodreads_stats._book_key(FINAL_EMPIRE)]
+    second = genres[goodreads_stats._book_key(WELL_OF_ASCENSION)]
+    assert first["categories"] == answers["0765311786"]
+    assert second["categories"] == answers["0765316889"]
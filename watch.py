@@ -0,0 +1,323 @@
+"""Watch mode: keep the Year in Books report (and, optionally, StoryGraph)
+up to date as you read, doing work only when Goodreads shows activity.
+
+    python watch.py [--interval 15] [--sync] [--window SPEC] [--svg-only] [--once]
+
+Polls the Goodreads read-shelf RSS and, with --sync, the updates RSS:
+
+- Polls are conditional GETs (ETag / Last-Modified), and a body identical
+  to the last one is dropped before parsing.
+- Read-shelf items are compared with the last poll by Goodreads book ID
+  (date read, rating, page count). Only when something was added,
+  changed or removed is the report regenerated. Genre lookups go through
+  the genre cache, so only the new books hit the network. The report is
+  also regenerated when a new month starts and the rolling window moves.
+- Rated books in the updates feed that weren't in the previous poll (and
+  aren't in the sync ledger) are pushed to StoryGraph. Just those books,
+  not the whole feed, and their genres are prefetched into the genre cache
+  while the browser works. The first poll only records what's there; run
+  book_sync.py once to catch up on older ratings.
+- Each feed is polled every --interval minutes. The interval stretches up
+  to 4x while a feed stays quiet and snaps back on activity. Errors back
+  off exponentially, up to 6 hours. Every delay is jittered by ±20%.
+
+State lives in OUTPUT_DIR/watch_state.json, so a restart (or --once from
+cron) carries on where the last poll stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import signal
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import goodreads_stats
+
+STATE_NAME = "watch_state.json"
+DEFAULT_INTERVAL_MIN = 15
+QUIET_GROWTH = 1.5      # each unchanged poll stretches the interval by this
+MAX_QUIET_FACTOR = 4    # ... up to this multiple of --interval
+MAX_BACKOFF_SEC = 6 * 3600
+JITTER = 0.2
+
+
+# -------- polling --------
+
+def poll(url: str, feed: dict, user_agent: str, force: bool = False, timeout: int = 30) -> Optional[str]:
+    """Fetch a feed with the validators saved in feed (its state dict).
+    Returns the body, or None when it hasn't changed (a 304, or the same
+    bytes as last time). force skips both checks."""
+    import requests
+
+    headers = {"User-Agent": user_agent}
+    if not force:
+        if feed.get("etag"):
+            headers["If-None-Match"] = feed["etag"]
+        if feed.get("last_modified"):
+            headers["If-Modified-Since"] = feed["last_modified"]
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    feed["etag"] = response.headers.get("ETag")
+    feed["last_modified"] = response.headers.get("Last-Modified")
+    digest = hashlib.sha256(response.content).hexdigest()[:16]
+    if digest == feed.get("digest") and not force:
+        return None
+    feed["digest"] = digest
+    return response.text
+
+
+def forget_validators(feed: dict) -> None:
+    """Make the next poll refetch and reparse the feed, e.g. because the
+    work its last body triggered failed."""
+    for name in ("etag", "last_modified", "digest"):
+        feed.pop(name, None)
+
+
+def next_delay(interval_sec: float, feed: dict) -> float:
+    """Seconds until the feed's next poll."""
+    if feed.get("failures"):
+        delay = min(interval_sec * 2 ** feed["failures"], MAX_BACKOFF_SEC)
+    else:
+        delay = interval_sec * min(QUIET_GROWTH ** feed.get("quiet", 0), MAX_QUIET_FACTOR)
+    return delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+# -------- change detection --------
+
+def shelf_key(book) -> str:
+    return book.goodreads_book_id or f"{book.title}|{book.author}"
+
+
+def shelf_fingerprints(books: list) -> dict:
+    """{book key: "read_at|rating|pages"} for read-shelf books."""
+    return {
+        shelf_key(b): f"{b.user_read_at.date().isoformat()}|{b.user_rating}|{b.num_pages}"
+        for b in books
+    }
+
+
+def diff(old: dict, new: dict) -> tuple:
+    """(added, changed, removed) keys between two fingerprint dicts."""
+    added = [k for k in new if k not in old]
+    changed = [k for k in new if k in old and old[k] != new[k]]
+    removed = [k for k in old if k not in new]
+    return added, changed, removed
+
+
+# -------- watcher --------
+
+class Watcher:
+    def __init__(self, user_id: str, output_dir: Path, interval_min: float = DEFAULT_INTERVAL_MIN,
+                 window_spec: Optional[str] = None, svg_only: bool = False,
+                 sync: bool = False, offline_index: Optional[Path] = None) -> None:
+        self.user_id = user_id
+        self.output_dir = Path(output_dir)
+        self.interval_sec = interval_min * 60
+        self.window_spec = window_spec
+        self.svg_only = svg_only
+        self.sync = sync
+        self.offline_index = offline_index
+        self.state_path = self.output_dir / STATE_NAME
+        self.state = self._load_state()
+        self.checks = {"shelf": self.check_shelf}
+        if sync:
+            self.checks["updates"] = self.check_updates
+        self._bot = None
+
+    def _load_state(self) -> dict:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("feeds", {})
+        return state
+
+    def _save_state(self) -> None:
+        # Write-then-rename, so a crash or Ctrl-C mid-write can't lose the
+        # baseline and validators.
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(f"{self.state_path.name}.tmp")
+        tmp.write_text(json.dumps(self.state, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _feed(self, name: str) -> dict:
+        return self.state["feeds"].setdefault(name, {})
+
+    # -------- stages --------
+
+    def check_shelf(self) -> bool:
+        """Poll the read shelf; regenerate the report if it changed.
+        Returns whether anything changed."""
+        feed = self._feed("shelf")
+        month = datetime.now().strftime("%Y-%m")
+        new_month = feed.get("rendered_month") != month
+        url = goodreads_stats.GOODREADS_RSS_URL.format(user_id=self.user_id)
+        text = poll(url, feed, goodreads_stats.USER_AGENT, force=new_month)
+        if text is None:
+            return False
+        books, first_name, _ = goodreads_stats.parse_read_shelf(text)
+        prints = shelf_fingerprints(books)
+        added, changed, removed = diff(feed.get("items") or {}, prints)
+        if not (added or changed or removed or new_month):
+            return False
+
+        by_key = {shelf_key(b): b for b in books}
+        for key in added + changed:
+            logging.info("Shelf %s: %s", "new" if key in added else "changed", by_key[key].title)
+        if removed:
+            logging.info("Shelf: %d book(s) removed", len(removed))
+        window = goodreads_stats.parse_window(self.window_spec) if self.window_spec else None
+        result = goodreads_stats.generate(
+            self.user_id, self.output_dir, window=window, offline_index=self.offline_index,
+            svg_only=self.svg_only, shelf=(books, first_name),
+        )
+        logging.info("Report regenerated: %d books, %d pages (%s)",
+                     result["total_books"], result["total_pages"], result["window"])
+        # Only remember the shelf once the report reflects it; a failed
+        # render leaves the old items, and run() drops the validators.
+        feed["items"] = prints
+        feed["rendered_month"] = month
+        return True
+
+    def check_updates(self) -> bool:
+        """Poll the updates feed; sync newly rated books to StoryGraph.
+        Returns whether anything changed."""
+        import book_sync
+
+        feed = self._feed("updates")
+        url = book_sync.GOODREADS_UPDATES_RSS_URL.format(user_id=self.user_id)
+        text = poll(url, feed, book_sync.UPDATES_USER_AGENT)
+        if text is None:
+            return False
+        books = {book_sync.sync_key(b): b for b in book_sync.parse_updates_feed(text)}
+        first_poll = "seen" not in feed
+        seen = set(feed.get("seen") or [])
+        feed["seen"] = sorted(books)
+        if first_poll:
+            logging.info("Updates feed: recorded %d rated book(s); syncing new ratings from now on", len(books))
+            return False
+
+        ledger = book_sync.load_ledger()
+        new = [b for key, b in books.items() if key not in seen and key not in ledger["books"]]
+        if not new:
+            return False
+        logging.info("Updates feed: %d new rating(s) to sync", len(new))
+        config = book_sync.load_config()
+        if self._bot is None:
+            self._bot = book_sync.BookSyncAutomation(
+                *(config[key] for key in book_sync.REQUIRED_CONFIG_KEYS)
+            )
+        summary = self._bot.sync_books(concurrency=config.get("sync_concurrency", 1), books=new)
+        # By ledger key, not title: a re-read or two books sharing a title
+        # must not hide each other's failures.
+        retry = {book_sync.sync_key(b) for b in new} - set(summary["synced_keys"])
+        if retry:
+            # Unsee what didn't make it, so the next poll tries it again.
+            feed["seen"] = sorted(set(feed["seen"]) - retry)
+            forget_validators(feed)
+        return True
+
+    # -------- loop --------
+
+    def run(self, once: bool = False) -> None:
+        while True:
+            now = time.time()
+            for name, check in self.checks.items():
+                feed = self._feed(name)
+                if feed.get("next_poll", 0) > now and not once:
+                    continue
+                try:
+                    changed = check()
+                    feed["failures"] = 0
+                    feed["quiet"] = 0 if changed else feed.get("quiet", 0) + 1
+                except Exception as e:
+                    forget_validators(feed)
+                    feed["failures"] = feed.get("failures", 0) + 1
+                    logging.warning("Polling %s failed (%d in a row): %s", name, feed["failures"], e)
+                feed["next_poll"] = time.time() + next_delay(self.interval_sec, feed)
+                self._save_state()
+            if once:
+                return
+            wake = min(self._feed(name)["next_poll"] for name in self.checks)
+            time.sleep(max(1.0, wake - time.time()))
+
+
+# -------- CLI --------
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Watch Goodreads and regenerate the report (and sync StoryGraph) only on change."
+    )
+    parser.add_argument("--user-id", help="Goodreads user ID (else read from config.json).")
+    parser.add_argument("--output-dir", default="output", help="Output directory (default: output).")
+    parser.add_argument("--config", default="config.json", help="Path to config.json.")
+    parser.add_argument(
+        "--interval", type=float, default=DEFAULT_INTERVAL_MIN, metavar="MINUTES",
+        help=f"Base poll interval per feed (default: {DEFAULT_INTERVAL_MIN}).",
+    )
+    parser.add_argument(
+        "--sync", action="store_true",
+        help="Also watch the updates feed and sync new ratings to StoryGraph.",
+    )
+    parser.add_argument(
+        "--window", metavar="SPEC",
+        help="Report period, as for goodreads_stats.py (default: rolling last 12 months).",
+    )
+    parser.add_argument(
+        "--svg-only", action="store_true",
+        help="Regenerate the HTML and SVGs only; skip the Chromium PDF/PNG renders.",
+    )
+    parser.add_argument(
+        "--openlibrary-index", metavar="PATH",
+        help="Open Library genre index to try before network lookups.",
+    )
+    parser.add_argument(
+        "--once", action="store_true",
+        help="Poll each feed once and exit (for cron); state is kept between runs.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.window:
+        try:
+            goodreads_stats.parse_window(args.window)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    user_id = args.user_id
+    if not user_id:
+        config_path = Path(args.config)
+        if not config_path.exists():
+            print(f"config not found at {config_path} and no --user-id supplied", file=sys.stderr)
+            return 2
+        user_id = json.loads(config_path.read_text(encoding="utf-8")).get("goodreads_user_id")
+        if not user_id:
+            print("goodreads_user_id missing from config.json", file=sys.stderr)
+            return 2
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    watcher = Watcher(
+        user_id, Path(args.output_dir), interval_min=args.interval, window_spec=args.window,
+        svg_only=args.svg_only, sync=args.sync, offline_index=args.openlibrary_index,
+    )
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Edition-agnostic work identity.
+
+The hardcover, paperback, Kindle and audiobook editions of one book carry
+different ISBNs and often differently decorated titles ("The Fifth Season
+(The Broken Earth, #1)" vs "The Fifth Season: A Novel"). Anything keyed per
+edition — the genre cache, most of all — looks them up again for each one.
+
+WorkIndex maps every identifier a book carries (its ISBNs as ISBN-13, its
+Goodreads book ID, and its normalized title and author) to one work key.
+Two editions that share any of those identifiers end up with the same key,
+except that a title match never joins two works that each already carry
+ISBNs or Goodreads IDs of their own.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+
+def normalize_title(title, keep_subtitle=False):
+    """Lowercase, drop series/edition parentheticals and subtitles, and
+    strip punctuation so "The Fifth Season (The Broken Earth, #1)" and
+    "Fifth Season: A Novel" compare equal. With keep_subtitle the part
+    after ':' stays, for keys that must tell "Mistborn: The Final Empire"
+    from "Mistborn: The Well of Ascension"."""
+    title = (title or "").lower()
+    title = re.sub(r'\s*[(\[][^)\]]*[)\]]', ' ', title)
+    if not keep_subtitle:
+        title = title.split(':')[0]
+    title = title.replace('&', ' and ')
+    title = re.sub(r'[^a-z0-9 ]+', ' ', title)
+    title = re.sub(r'^(the|a|an) ', '', title.strip())
+    return ' '.join(title.split())
+
+
+def normalize_author(author):
+    """Lowercase surname-first-insensitive author key: punctuation and
+    initials' dots removed, tokens sorted"""
+    author = re.sub(r'[^a-z0-9 ]+', ' ', (author or "").lower())
+    return ' '.join(sorted(author.split()))
+
+
+# -------- ISBNs --------
+
+def isbn10_to_13(isbn10: str) -> Optional[str]:
+    """ISBN-13 for a 10-digit ISBN (978 prefix, recomputed check digit)."""
+    if not re.fullmatch(r"\d{9}[\dX]", isbn10 or ""):
+        return None
+    body = "978" + isbn10[:9]
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+    return body + str((10 - total % 10) % 10)
+
+
+def canonical_isbn(isbn: Optional[str]) -> Optional[str]:
+    """Normalize an ISBN-10 or ISBN-13 (hyphens and spaces allowed) to
+    ISBN-13, or None when it isn't one."""
+    isbn = re.sub(r"[\s-]+", "", isbn or "").upper()
+    if len(isbn) == 10:
+        return isbn10_to_13(isbn)
+    if re.fullmatch(r"97[89]\d{10}", isbn):
+        return isbn
+    return None
+
+
+# -------- work index --------
+
+def work_aliases(book) -> list:
+    """Every identifier for one book, strongest first: ISBN-13s, the
+    Goodreads book ID, then normalized title|author. Works with
+    goodreads_stats.Book records."""
+    aliases: list = []
+    for isbn in (getattr(book, "isbn13", None), book.isbn):
+        isbn = canonical_isbn(isbn)
+        if isbn and f"isbn:{isbn}" not in aliases:
+            aliases.append(f"isbn:{isbn}")
+    if getattr(book, "goodreads_book_id", None):
+        aliases.append(f"gr:{book.goodreads_book_id}")
+    title = normalize_title(book.title, keep_subtitle=True)
+    author = normalize_author(book.author)
+    # Title alone is too weak to join editions on; only fall back to it when
+    # the book carries nothing else.
+    if title and (author or not aliases):
+        aliases.append(f"ta:{title}|{author}")
+    return aliases
+
+
+class WorkIndex:
+    """Alias -> work key index. The work key is the first alias a work was
+    registered under; it never changes afterwards unless two known works
+    turn out to be one (see resolve).
+
+    Backed by a plain dict so callers can persist it next to the cache it
+    serves.
+    """
+
+    def __init__(self, aliases: Optional[dict] = None) -> None:
+        self.aliases: dict = dict(aliases or {})
+        # Work keys that own at least one ISBN or Goodreads ID alias.
+        self._identified = {key for alias, key in self.aliases.items() if not alias.startswith("ta:")}
+
+    def resolve(self, book) -> tuple:
+        """(work_key, absorbed_keys) for one book, registering any aliases
+        the index hasn't seen. absorbed_keys lists previously separate work
+        keys that this book links to work_key (e.g. an edition whose ISBN
+        was known as one work and whose title as another); callers should
+        fold anything stored under them into work_key.
+
+        A title|author alias only links works when one side has no ISBN or
+        Goodreads ID yet: two books that both carry IDs and share none are
+        different works with the same title, and the alias stays with the
+        work that registered it first."""
+        aliases = work_aliases(book)
+        if not aliases:
+            return ("", [])
+        identified = any(not alias.startswith("ta:") for alias in aliases)
+        keys: list = []
+        skipped: set = set()
+        for alias in aliases:
+            key = self.aliases.get(alias)
+            if not key or key in keys:
+                continue
+            if alias.startswith("ta:") and identified and key in self._identified:
+                skipped.add(alias)
+                continue
+            keys.append(key)
+        work_key = keys[0] if keys else aliases[0]
+        absorbed = keys[1:]
+        if absorbed:
+            gone = set(absorbed)
+            for alias, key in self.aliases.items():
+                if key in gone:
+                    self.aliases[alias] = work_key
+            self._identified -= gone
+        for alias in aliases:
+            if alias not in skipped:
+                self.aliases[alias] = work_key
+        if identified:
+            self._identified.add(work_key)
+        return (work_key, absorbed)